@@ -1,38 +1,58 @@
+from typing import Optional
+
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.prebuilt import ToolNode, tools_condition
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
-from utils.model_loader import ModelLoader
-from prompt_library.prompt import SYSTEM_PROMPT
+from agent.context_manager import ContextManager
+from utils.llm_cache import LLMResponseCache
+from utils.logger import Truncated, get_logger
+from utils.service_registry import services
+from utils.tool_output import ToolOutputCompactor
+from agent.section_planner import PlannerState, SectionPlanner
+from prompt_library.prompt import SECTIONED_SYSTEM_PROMPT, SYSTEM_PROMPT
 
 from tools.weather_info_tool import WeatherInfoTool
 from tools.place_search_tool import PlaceSearchTool
 from tools.expense_calculator_tool import CalculatorTool
 from tools.currency_conversion_tool import CurrencyConverterTool
 
+logger = get_logger(__name__)
+
 
 class GraphBuilder:
-    def __init__(self, model_provider: str = "google"):
+    def __init__(self, model_provider: str = "google", planner_mode: Optional[str] = None):
         """
         Initialize the GraphBuilder.
-        - Load the LLM from the chosen provider (default = google).
-        - Load all tools (weather, place search, calculator, currency conversion).
+        - Load the LLM from the chosen provider (default = google), or a
+          ModelPool over several providers when model_provider is "pool".
+        - Load all tools (weather, place search, calculator, currency conversion)
+          and wrap them so oversized outputs are compacted.
+        - In "sections" planner mode (config `planner.mode`, or planner_mode),
+          add the `write_final_plan` tool that writes the final plan in parallel sections.
         - Bind the tools to the LLM for tool calling.
         """
 
-        print(f"[agentic_workflow.py] LOG: GraphBuilder initializing with provider: '{model_provider}'")
+        logger.info("GraphBuilder initializing with provider: '%s'", model_provider)
 
-        # Load model using ModelLoader
-        self.model_loader = ModelLoader(model_provider=model_provider)
-        self.llm = self.model_loader.load_llm()
+        # The LLM and upstream clients are process-wide and built once by the registry;
+        # "pool" is a ModelPool with latency-aware routing, failover and optional hedging
+        self.llm = services.llm(model_provider)
+
+        config = services.config
+        # Keeps long sessions within a token budget (summaries use the plain LLM, no tools)
+        self.context_manager = ContextManager.from_config(config.get("context"), llm=self.llm)
 
         # Initialize tools list
         self.tools = []
 
         # Load each tool category
-        self.weather_tools = WeatherInfoTool()
-        self.place_search_tools = PlaceSearchTool()
-        self.calculator_tools = CalculatorTool()
-        self.currency_converter_tools = CurrencyConverterTool()
+        self.weather_tools = WeatherInfoTool(weather_service=services.weather_service())
+        self.place_search_tools = PlaceSearchTool(tavily_search=services.place_search(),
+                                                  destination_index=services.destination_index())
+        self.currency_converter_tools = CurrencyConverterTool(currency_service=services.currency_service())
+        # The budget tool converts mixed-currency items with the shared currency service
+        self.calculator_tools = CalculatorTool(currency_service=self.currency_converter_tools.currency_service)
 
         # Extend tool list with all available tools
         self.tools.extend([
@@ -43,57 +63,149 @@ class GraphBuilder:
         ])
 
         tool_names = [tool.name for tool in self.tools]
-        print(f"[agentic_workflow.py] LOG: All tools loaded: {tool_names}")
+        logger.info("All tools loaded: %s", tool_names)
+
+        # Trim large tool outputs (raw search results, forecasts) to per-tool token
+        # budgets before they become ToolMessages that every later turn re-sends
+        self.tool_output_compactor = ToolOutputCompactor.from_config(
+            config.get("tool_output"),
+            count_tokens=self.context_manager.counter.count_text if self.context_manager is not None else None,
+        )
+        if self.tool_output_compactor is not None:
+            self.tools = [self.tool_output_compactor.wrap(tool) for tool in self.tools]
+
+        # "sections": Phase 3 writes the plan sections as parallel branches and merges them
+        planner_settings = config.get("planner") or {}
+        self.planner_mode = planner_mode or planner_settings.get("mode", "single")
+        self.section_planner = None
+        self.system_prompt = SYSTEM_PROMPT
+        if self.planner_mode == "sections":
+            self.section_planner = SectionPlanner(self.llm, self.tools, sections=planner_settings.get("sections"))
+            self.tools.append(self.section_planner.plan_tool)
+            self.system_prompt = SECTIONED_SYSTEM_PROMPT
+        elif self.planner_mode != "single":
+            raise ValueError(f"Unknown planner mode: {self.planner_mode!r} (expected 'single' or 'sections')")
+        logger.info("Planner mode: %s", self.planner_mode)
 
         self.llm_with_tools = self.llm.bind_tools(tools=self.tools)
         self.graph = None
-        self.system_prompt = SYSTEM_PROMPT
 
-    def agent_function(self, state: MessagesState):
+        # Optional cache of final answers to repeated short prompts (e.g. first-turn trip requests)
+        model_name = getattr(self.llm, "model", None) or getattr(self.llm, "model_name", "")
+        self.response_cache = LLMResponseCache.from_config(
+            config.get("llm_cache"), model_id=f"{model_provider}:{model_name}", tools=self.tools
+        )
+
+    @staticmethod
+    def _thread_id(config: Optional[RunnableConfig]) -> Optional[str]:
+        return ((config or {}).get("configurable") or {}).get("thread_id")
+
+    def _build_input(self, summary: str, messages: list) -> list:
+        if self.context_manager is None:
+            return [self.system_prompt] + messages
+        return self.context_manager.build_prompt(self.system_prompt, summary, messages)
+
+    def _invoke_llm(self, input_question: list):
+        """Call the tool-bound LLM, answering from the response cache when possible."""
+        if self.response_cache is not None:
+            cached = self.response_cache.lookup(input_question)
+            if cached is not None:
+                logger.info("LLM response served from cache (%s match)", cached.response_metadata["cache_hit"])
+                return cached
+        response = self.llm_with_tools.invoke(input_question)
+        if self.response_cache is not None:
+            self.response_cache.store(input_question, response)
+        return response
+
+    async def _ainvoke_llm(self, input_question: list):
+        """Async variant of `_invoke_llm`."""
+        if self.response_cache is not None:
+            cached = self.response_cache.lookup(input_question)
+            if cached is not None:
+                logger.info("LLM response served from cache (%s match)", cached.response_metadata["cache_hit"])
+                return cached
+        response = await self.llm_with_tools.ainvoke(input_question)
+        if self.response_cache is not None:
+            self.response_cache.store(input_question, response)
+        return response
+
+    def agent_function(self, state: MessagesState, config: Optional[RunnableConfig] = None):
         """
         Main agent function (the 'brain').
         - Takes current conversation state (messages).
+        - Fits older turns into the token budget (rolling summary, cached per thread).
         - Prepends system prompt.
         - Sends to the LLM (with tools enabled).
         - Returns the response as new messages in the state.
         """
-        print("\n--- [agentic_workflow.py] Agent Turn ---")
-        print(f"[agentic_workflow.py] LOG: Agent received current state: {state['messages']}")
+        # Full state dumps grow with the conversation; only rendered at DEBUG
+        logger.debug("Agent turn, current state: %s", Truncated(state["messages"]))
 
-        user_question = state["messages"]
-        input_question = [self.system_prompt] + user_question
+        summary, user_question = "", state["messages"]
+        if self.context_manager is not None:
+            summary, user_question = self.context_manager.prepare(state["messages"], self._thread_id(config))
+        input_question = self._build_input(summary, user_question)
 
-        print("[agentic_workflow.py] LOG: Invoking LLM with tools...")
-        response = self.llm_with_tools.invoke(input_question)
-        print(f"[agentic_workflow.py] LOG: LLM produced response object: {response}")
-        print("--- [agentic_workflow.py] End of Agent Turn ---\n")
+        logger.debug("Invoking LLM with tools on %d messages", len(input_question))
+        response = self._invoke_llm(input_question)
+        logger.debug("LLM produced response: %s", Truncated(response))
+
+        return {"messages": [response]}
+
+    async def aagent_function(self, state: MessagesState, config: Optional[RunnableConfig] = None):
+        """
+        Async variant of `agent_function`, used by `ainvoke`/`astream`.
+        Awaits the LLM instead of blocking the event loop.
+        """
+        logger.debug("Agent turn (async), current state: %s", Truncated(state["messages"]))
+
+        summary, messages = "", state["messages"]
+        if self.context_manager is not None:
+            summary, messages = await self.context_manager.aprepare(state["messages"], self._thread_id(config))
+        input_question = self._build_input(summary, messages)
+        response = await self._ainvoke_llm(input_question)
+        logger.debug("LLM produced response: %s", Truncated(response))
 
         return {"messages": [response]}
 
-    def build_graph(self):
+    def build_graph(self, checkpointer=None):
         """
         Build the LangGraph agent workflow:
         - Define nodes: agent + tools
         - Define edges: flow between agent <-> tools
         - Add conditional logic for when to call tools
-        - Compile and return the graph
+        - In "sections" planner mode, fan out to one write_section branch per
+          plan section when the agent calls write_final_plan, then merge_plan
+        - Compile and return the graph (with an optional checkpointer that
+          persists each thread's message history between requests)
         """
-        print("[agentic_workflow.py] LOG: Building state graph...")
-        graph_builder = StateGraph(MessagesState)
+        logger.info("Building state graph...")
+        planner = self.section_planner
+        graph_builder = StateGraph(MessagesState if planner is None else PlannerState)
 
         # Add nodes
-        graph_builder.add_node("agent", self.agent_function)  # Agent reasoning node
+        # Agent reasoning node (sync path for invoke/stream, async path for ainvoke/astream)
+        graph_builder.add_node("agent", RunnableLambda(self.agent_function, afunc=self.aagent_function))
         graph_builder.add_node("tools", ToolNode(tools=self.tools))  # Tools execution node
 
         # Add edges
         graph_builder.add_edge(START, "agent")  # Start → Agent
-        graph_builder.add_conditional_edges("agent", tools_condition)  # Agent → Tool (if needed)
+        if planner is None:
+            graph_builder.add_conditional_edges("agent", tools_condition)  # Agent → Tool (if needed)
+        else:
+            # Section writers (one Send per section) and the merge into the final plan
+            graph_builder.add_node("write_section", RunnableLambda(planner.write_section, afunc=planner.awrite_section))
+            graph_builder.add_node("merge_plan", planner.merge)
+            # Agent → Tool (if needed) or → write_section × N (final plan requested)
+            graph_builder.add_conditional_edges("agent", planner.route, planner.destinations())
+            graph_builder.add_edge("write_section", "merge_plan")  # Runs once all sections are written
+            graph_builder.add_edge("merge_plan", END)
         graph_builder.add_edge("tools", "agent")  # Tools → Agent
         graph_builder.add_edge("agent", END)  # Agent → End
 
         # Compile the graph
-        self.graph = graph_builder.compile()
-        print("[agentic_workflow.py] LOG: Graph compiled successfully.")
+        self.graph = graph_builder.compile(checkpointer=checkpointer)
+        logger.info("Graph compiled successfully.")
         return self.graph
 
     def __call__(self):
@@ -0,0 +1,298 @@
+import hashlib
+import json
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from utils.cache import TTLCache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Tag on rolling-summary LLM calls; they run inside the agent node, so streaming
+# clients use it to keep summary text out of the answer
+SUMMARY_TAG = "context_summary"
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a travel-planning conversation.
+Merge the previous summary with the new messages into one concise summary of at most {max_tokens} tokens.
+Keep: destination, dates/duration, budget, companions, interests, decisions the user confirmed,
+and key facts found by tools (places, hotels, prices, weather). Drop pleasantries and repetition.
+
+Previous summary:
+{previous}
+
+New messages:
+{messages}
+
+Updated summary:"""
+
+
+class TokenCounter:
+    """
+    Counts tokens per message, memoizing by message ID.
+    Uses tiktoken's cl100k_base encoding when it can be loaded, otherwise a
+    ~4 characters/token estimate (good enough for budgeting).
+    """
+
+    def __init__(self, max_cached: int = 10000):
+        self._encoding = None
+        self._encoding_loaded = False
+        self._counts = TTLCache(max_entries=max_cached, default_ttl=24 * 3600)
+
+    def _get_encoding(self):
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # tiktoken missing, or its encoding file cannot be downloaded
+                self._encoding = None
+        return self._encoding
+
+    def warm_up(self) -> None:
+        """Load the encoding now instead of on the first count."""
+        self._get_encoding()
+
+    def count_text(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return len(text) // 4 + 1
+
+    def count(self, message: BaseMessage) -> int:
+        text = message.text if isinstance(message.text, str) else str(message.content)
+        key = f"{message.id}:{len(text)}" if message.id else None
+        if key is not None:
+            cached = self._counts.get(key)
+            if cached is not None:
+                return cached
+
+        # Tool-call arguments are sent to the model too
+        tokens = self.count_text(text) + self.count_text(str(getattr(message, "tool_calls", "") or "")) + 4
+        if key is not None:
+            self._counts.set(key, tokens)
+        return tokens
+
+
+class ContextManager:
+    """
+    Keeps the prompt sent on each agent turn within a token budget.
+
+    When the conversation exceeds `max_tokens`, the last `keep_recent_turns`
+    user turns are kept verbatim and everything before them is folded into a
+    rolling summary. Summaries are cached per thread and extended
+    incrementally, so each older message is summarized once, not every turn.
+    """
+
+    def __init__(self, llm=None, max_tokens: int = 12000, keep_recent_turns: int = 3,
+                 tool_output_max_tokens: int = 400, summary_max_tokens: int = 500,
+                 summary_cache_ttl_seconds: float = 7200):
+        """
+        Initialize the ContextManager.
+
+        Args:
+            llm: Chat model used to write summaries (without tools bound). When
+                 None, older messages are compacted extractively instead.
+            max_tokens (int): Budget for the conversation part of the prompt.
+            keep_recent_turns (int): User turns always kept verbatim.
+            tool_output_max_tokens (int): Cap for each older tool output before summarizing.
+            summary_max_tokens (int): Target length of the rolling summary.
+            summary_cache_ttl_seconds (float): How long an idle thread's summary is kept.
+        """
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_output_max_tokens = tool_output_max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.counter = TokenCounter()
+
+        # thread_id -> (number of summarized messages, content hash of the last one, summary text)
+        self._summaries = TTLCache(max_entries=10000, default_ttl=summary_cache_ttl_seconds)
+
+    @classmethod
+    def from_config(cls, settings: Optional[dict], llm=None) -> Optional["ContextManager"]:
+        """Build from the `context` section of config.yaml; None when disabled."""
+        settings = settings or {}
+        if not settings.get("enabled", True):
+            return None
+        return cls(
+            llm=llm,
+            max_tokens=settings.get("max_tokens", 12000),
+            keep_recent_turns=settings.get("keep_recent_turns", 3),
+            tool_output_max_tokens=settings.get("tool_output_max_tokens", 400),
+            summary_max_tokens=settings.get("summary_max_tokens", 500),
+            summary_cache_ttl_seconds=settings.get("summary_cache_ttl_seconds", 7200),
+        )
+
+    def warm_up(self) -> None:
+        """Load the tokenizer ahead of the first request."""
+        self.counter.warm_up()
+
+    # --------------------------
+    # Splitting and compaction
+    # --------------------------
+    def _split_point(self, messages: List[BaseMessage]) -> int:
+        """Index where the last `keep_recent_turns` user turns begin."""
+        human_indexes = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+        if len(human_indexes) <= self.keep_recent_turns:
+            return 0
+        return human_indexes[-self.keep_recent_turns]
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        if self.counter.count_text(text) <= max_tokens:
+            return text
+        # Keep the head; tool outputs front-load the useful part
+        return text[: max_tokens * 4] + " …[truncated]"
+
+    def _render(self, messages: List[BaseMessage]) -> str:
+        lines = []
+        for message in messages:
+            text = message.text if isinstance(message.text, str) else str(message.content)
+            if isinstance(message, ToolMessage):
+                text = self._truncate(text, self.tool_output_max_tokens)
+                lines.append(f"[tool {message.name}] {text}")
+            elif text:
+                lines.append(f"[{message.type}] {text}")
+        return "\n".join(lines)
+
+    def _compact_recent(self, recent: List[BaseMessage]) -> List[BaseMessage]:
+        """
+        If the verbatim turns alone exceed the budget, truncate tool outputs in
+        all but the latest turn (the model is still reasoning over that one).
+        """
+        if self._within_budget(recent):
+            return recent
+        last_turn = max((i for i, message in enumerate(recent) if isinstance(message, HumanMessage)), default=0)
+        compacted = []
+        for i, message in enumerate(recent):
+            if i < last_turn and isinstance(message, ToolMessage):
+                message = message.model_copy(update={"content": self._truncate(message.text, self.tool_output_max_tokens)})
+            compacted.append(message)
+        return compacted
+
+    def build_prompt(self, system_message: SystemMessage, summary: str,
+                     messages: List[BaseMessage]) -> List[BaseMessage]:
+        """
+        Assemble the model input. The summary is merged into the one system
+        message because some providers (Gemini) reject a second system message.
+        """
+        if not summary:
+            return [system_message] + messages
+        content = f"{system_message.content}\n\n## Summary of the earlier conversation\n{summary}"
+        return [SystemMessage(content=content)] + messages
+
+    def _within_budget(self, messages: List[BaseMessage]) -> bool:
+        return sum(self.counter.count(message) for message in messages) <= self.max_tokens
+
+    @staticmethod
+    def _fingerprint(message: BaseMessage) -> str:
+        """
+        Content hash of a message. Messages rebuilt from a client's history get
+        new IDs every request, so the summary cache cannot key on `message.id`.
+        """
+        payload = json.dumps([
+            message.type,
+            message.content,
+            [(call["name"], call["args"]) for call in getattr(message, "tool_calls", None) or []],
+        ], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _pending(self, thread_id: Optional[str], older: List[BaseMessage]) -> Tuple[str, List[BaseMessage]]:
+        """Return the cached summary and the older messages it does not cover yet."""
+        if thread_id is not None:
+            cached = self._summaries.get(thread_id)
+            if cached is not None:
+                count, fingerprint, summary = cached
+                # Same position as last time; otherwise the history was trimmed, so search it
+                if 0 < count <= len(older) and self._fingerprint(older[count - 1]) == fingerprint:
+                    return summary, older[count:]
+                for i in range(len(older) - 1, -1, -1):
+                    if self._fingerprint(older[i]) == fingerprint:
+                        return summary, older[i + 1:]
+        return "", older
+
+    def _store(self, thread_id: Optional[str], older: List[BaseMessage], summary: str) -> None:
+        if thread_id is not None and older:
+            self._summaries.set(thread_id, (len(older), self._fingerprint(older[-1]), summary))
+
+    def _summary_prompt(self, previous: str, new_messages: List[BaseMessage]) -> str:
+        return SUMMARY_PROMPT.format(
+            max_tokens=self.summary_max_tokens,
+            previous=previous or "(none)",
+            messages=self._render(new_messages),
+        )
+
+    def _extractive_summary(self, previous: str, new_messages: List[BaseMessage]) -> str:
+        text = "\n".join(part for part in (previous, self._render(new_messages)) if part)
+        # Keep the most recent part when over budget
+        limit = self.summary_max_tokens * 4
+        return text if len(text) <= limit else "…" + text[-limit:]
+
+    def _begin(self, messages: List[BaseMessage], thread_id: Optional[str]):
+        """
+        Shared start of `prepare`/`aprepare`.
+
+        Returns:
+            tuple: (cached summary, older messages it does not cover yet, all
+                   older messages, messages to send verbatim). Nothing is
+                   pending when no summary call is needed.
+        """
+        if self._within_budget(messages):
+            return "", [], [], messages
+        split = self._split_point(messages)
+        if split == 0:
+            # Too few turns to summarize; only compact tool outputs
+            return "", [], [], self._compact_recent(messages)
+        older, recent = messages[:split], messages[split:]
+        summary, pending = self._pending(thread_id, older)
+        return summary, pending, older, self._compact_recent(recent)
+
+    def _finish(self, thread_id: Optional[str], older: List[BaseMessage], previous: str,
+                pending: List[BaseMessage], summary: Optional[str]) -> str:
+        """Shared end of `prepare`/`aprepare`: fall back to an extractive summary if the LLM gave none, then cache it."""
+        if summary is None:
+            summary = self._extractive_summary(previous, pending)
+        self._store(thread_id, older, summary)
+        return summary
+
+    # --------------------------
+    # Public API
+    # --------------------------
+    def prepare(self, messages: List[BaseMessage], thread_id: Optional[str] = None) -> Tuple[str, List[BaseMessage]]:
+        """
+        Fit a conversation into the budget.
+
+        Args:
+            messages (List[BaseMessage]): Full conversation state.
+            thread_id (str): Conversation ID used to cache the rolling summary.
+
+        Returns:
+            tuple: (summary of older messages or "", messages to send verbatim).
+        """
+        summary, pending, older, recent = self._begin(messages, thread_id)
+        if not pending:
+            return summary, recent
+        text = None
+        if self.llm is not None:
+            try:
+                text = self.llm.invoke(self._summary_prompt(summary, pending), config={"tags": [SUMMARY_TAG]}).text
+            except Exception as e:
+                logger.error("Summarization failed, compacting instead: %s", e)
+        return self._finish(thread_id, older, summary, pending, text), recent
+
+    async def aprepare(self, messages: List[BaseMessage], thread_id: Optional[str] = None) -> Tuple[str, List[BaseMessage]]:
+        """Async variant of `prepare`."""
+        summary, pending, older, recent = self._begin(messages, thread_id)
+        if not pending:
+            return summary, recent
+        text = None
+        if self.llm is not None:
+            try:
+                text = (await self.llm.ainvoke(
+                    self._summary_prompt(summary, pending), config={"tags": [SUMMARY_TAG]}
+                )).text
+            except Exception as e:
+                logger.error("Summarization failed, compacting instead: %s", e)
+        return self._finish(thread_id, older, summary, pending, text), recent
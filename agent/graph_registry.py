@@ -0,0 +1,127 @@
+import threading
+from typing import Dict, Iterable
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from agent.agentic_workflow import GraphBuilder
+from utils.logger import get_logger
+from utils.model_pool import ModelPool
+from utils.service_registry import services
+
+logger = get_logger(__name__)
+
+
+class GraphRegistry:
+    """
+    Process-wide registry of compiled agent graphs.
+
+    Each provider's graph is built and compiled once (LLM client, tools,
+    `bind_tools` and `StateGraph.compile()`), then shared by every
+    conversation. Conversations are kept apart by the LangGraph `thread_id`
+    passed in the run config, not by separate graph objects; all graphs share
+    one checkpointer that holds each thread's message history server-side.
+    """
+
+    def __init__(self, checkpointer=None):
+        self._graphs: Dict[str, object] = {}
+        self._builders: Dict[str, GraphBuilder] = {}
+        self._lock = threading.Lock()
+        self.checkpointer = checkpointer if checkpointer is not None else InMemorySaver()
+
+    def get_graph(self, model_provider: str = "google"):
+        """
+        Return the compiled graph for a provider, building it on first use.
+
+        Args:
+            model_provider (str): LLM provider ("groq", "openai", "google" or "pool").
+
+        Returns:
+            CompiledStateGraph: The shared compiled graph.
+        """
+        graph = self._graphs.get(model_provider)
+        if graph is not None:
+            return graph
+
+        # Double-checked locking so concurrent first requests compile only once
+        with self._lock:
+            graph = self._graphs.get(model_provider)
+            if graph is None:
+                logger.info("Compiling shared graph for provider '%s'", model_provider)
+                builder = GraphBuilder(model_provider=model_provider)
+                graph = builder.build_graph(checkpointer=self.checkpointer)
+                self._builders[model_provider] = builder
+                self._graphs[model_provider] = graph
+
+        return graph
+
+    def warm_up(self, model_providers: Iterable[str]) -> None:
+        """
+        Build the shared clients and compile the graphs for the given providers
+        ahead of the first request, so no initialization runs on the request path.
+
+        Args:
+            model_providers (Iterable[str]): Providers to pre-build.
+        """
+        model_providers = list(model_providers)
+        services.warm_up(model_providers)
+        for model_provider in model_providers:
+            self.get_graph(model_provider)
+            # Load the tokenizer now rather than during the first long conversation
+            context_manager = self._builders[model_provider].context_manager
+            if context_manager is not None:
+                context_manager.warm_up()
+
+    def reload(self) -> None:
+        """
+        Re-read config.yaml and .env, rebuild the shared clients and recompile
+        every graph built so far. Conversation histories in the checkpointer are kept.
+        """
+        with self._lock:
+            model_providers = list(self._graphs)
+            services.reload()
+            self._graphs.clear()
+            self._builders.clear()
+        self.warm_up(model_providers)
+
+    def model_pool_stats(self) -> dict:
+        """Per-provider routing stats of every built graph that uses a ModelPool."""
+        return {
+            provider: builder.llm.stats()
+            for provider, builder in list(self._builders.items())
+            if isinstance(builder.llm, ModelPool)
+        }
+
+    def response_cache_stats(self) -> dict:
+        """LLM response cache counters per built provider (providers with the cache disabled are omitted)."""
+        return {
+            provider: builder.response_cache.stats()
+            for provider, builder in list(self._builders.items())
+            if builder.response_cache is not None
+        }
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Drop the stored history of one conversation."""
+        self.checkpointer.delete_thread(thread_id)
+
+    def clear(self) -> None:
+        """Drop all compiled graphs so the next lookup rebuilds them."""
+        with self._lock:
+            self._graphs.clear()
+            self._builders.clear()
+
+
+def thread_config(conversation_id: str) -> dict:
+    """
+    Build the LangGraph run config that scopes a run to one conversation.
+
+    Args:
+        conversation_id (str): Conversation identifier, used as the thread ID.
+
+    Returns:
+        dict: Config to pass to `invoke`/`stream`.
+    """
+    return {"configurable": {"thread_id": conversation_id}}
+
+
+# Shared instance used by the API process
+graph_registry = GraphRegistry()
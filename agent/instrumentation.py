@@ -0,0 +1,106 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from utils.metrics import (
+    GRAPH_NODE_DURATION,
+    LLM_CALLS,
+    LLM_DURATION,
+    TOOL_CALLS,
+    TOOL_DURATION,
+    RequestSpans,
+)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Times graph nodes, LLM calls and tool calls of one graph run.
+
+    Passed per request in the run config (`callbacks=[...]`). Each finished
+    span is observed in the process-wide histograms and added to the
+    request's `RequestSpans`, which backs the Server-Timing header.
+    """
+
+    # Called inline on the event loop instead of in a thread pool; the work is tiny
+    run_inline = True
+
+    def __init__(self, spans: RequestSpans):
+        self.spans = spans
+        # run_id -> (kind, label, start time)
+        self._running: Dict[UUID, Tuple[str, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, kind: str, label: str) -> None:
+        with self._lock:
+            self._running[run_id] = (kind, label, time.perf_counter())
+
+    def _finish(self, run_id: UUID, error: bool = False) -> None:
+        with self._lock:
+            started = self._running.pop(run_id, None)
+        if started is None:
+            return
+        kind, label, start = started
+        seconds = time.perf_counter() - start
+        status = "error" if error else "ok"
+
+        if kind == "node":
+            GRAPH_NODE_DURATION.observe(seconds, node=label)
+            if label == "tools":
+                self.spans.tool_loops += 1
+        elif kind == "llm":
+            LLM_DURATION.observe(seconds, provider=label)
+            LLM_CALLS.inc(provider=label, status=status)
+        elif kind == "tool":
+            TOOL_DURATION.observe(seconds, tool=label)
+            TOOL_CALLS.inc(tool=label, status=status)
+        self.spans.add(kind, seconds)
+
+    # --------------------------
+    # Graph nodes
+    # --------------------------
+    def on_chain_start(self, serialized: Optional[Dict[str, Any]], inputs: Any, *, run_id: UUID,
+                       metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Runnables nested inside a node carry the same metadata; only time the node itself
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=True)
+
+    # --------------------------
+    # LLM calls
+    # --------------------------
+    def on_chat_model_start(self, serialized: Optional[Dict[str, Any]], messages: Any, *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        self._start(run_id, "llm", (metadata or {}).get("ls_provider", "unknown"))
+
+    def on_llm_start(self, serialized: Optional[Dict[str, Any]], prompts: Any, *, run_id: UUID,
+                     metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        self._start(run_id, "llm", (metadata or {}).get("ls_provider", "unknown"))
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=True)
+
+    # --------------------------
+    # Tool calls
+    # --------------------------
+    def on_tool_start(self, serialized: Optional[Dict[str, Any]], input_str: str, *, run_id: UUID,
+                      **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._start(run_id, "tool", name)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=True)
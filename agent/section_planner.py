@@ -0,0 +1,319 @@
+import asyncio
+from typing import Annotated, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from langgraph.graph import END, MessagesState
+from langgraph.prebuilt import tools_condition
+from langgraph.types import Send
+from pydantic import BaseModel, Field
+
+from prompt_library.prompt import PLAN_SECTION_INSTRUCTIONS, SECTION_WRITER_PROMPT
+from tools.place_search_tool import PROFILE_HEADINGS
+from utils.cache import normalize_key
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PLAN_TOOL_NAME = "write_final_plan"
+
+# Tag on section-writer LLM calls, so streaming clients can tell them from the agent's answer
+SECTION_TAG = "plan_section"
+
+SECTION_HEADINGS = {
+    "itinerary": "Itinerary",
+    "hotels": "Hotels",
+    "attractions": "Attractions",
+    "restaurants": "Restaurants",
+    "activities": "Activities",
+    "transportation": "Transportation",
+    "costs": "Cost Breakdown and Budget",
+    "weather": "Weather",
+}
+
+# Tool results each section is written from. Results for the destination already
+# in the conversation (including get_destination_profile parts) are reused; the
+# destination tools below are re-run otherwise (cache hits after the Phase 2 research).
+SECTION_SOURCES = {
+    "itinerary": ("search_attractions", "search_activities", "get_weather_forecast"),
+    "hotels": (),
+    "attractions": ("search_attractions",),
+    "restaurants": ("search_restaurants",),
+    "activities": ("search_activities",),
+    "transportation": ("search_transportation",),
+    "costs": ("calculate_trip_budget",),
+    "weather": ("get_weather_forecast",),
+}
+
+# Tools that can be called from the destination alone -> their argument name
+DESTINATION_TOOLS = {
+    "search_attractions": "place",
+    "search_restaurants": "place",
+    "search_activities": "place",
+    "search_transportation": "place",
+    "get_weather_forecast": "city",
+}
+
+# get_destination_profile covers the four searches; its "## <heading>" parts
+# stand in for the corresponding search tool's output
+PROFILE_TOOL_NAME = "get_destination_profile"
+PROFILE_SOURCES = {f"## {heading}": f"search_{category}" for category, heading in PROFILE_HEADINGS.items()}
+
+
+class FinalPlanRequest(BaseModel):
+    """Confirmed traveler profile the final plan is written for."""
+    destination: str = Field(description="Destination city or region.")
+    days: int = Field(description="Trip length in days.")
+    travelers: str = Field(description='Who is traveling, e.g. "couple" or "family of 4 with two kids".')
+    budget: str = Field(description='Budget level and amount, e.g. "mid-range, about 1000 USD".')
+    interests: List[str] = Field(default_factory=list, description="Main interests, e.g. history, food.")
+    notes: str = Field(default="", description="Choices and change requests the user confirmed in the conversation.")
+
+
+def _merge_sections(left: Optional[Dict[str, str]], right: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Reducer for `plan_sections`: parallel branches add their section; None clears them."""
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
+
+class PlannerState(MessagesState):
+    """Graph state in "sections" mode: messages plus the sections written so far."""
+    plan_sections: Annotated[Dict[str, str], _merge_sections]
+
+
+def _text(message: BaseMessage) -> str:
+    return message.text if isinstance(message.text, str) else str(message.content)
+
+
+class SectionPlanner:
+    """
+    Phase 3 as parallel graph branches instead of one long LLM generation.
+
+    The agent calls the `write_final_plan` tool with the confirmed profile;
+    `route` then fans out one `write_section` branch per plan section (via
+    LangGraph `Send`), each an LLM call over the profile, the findings the
+    user confirmed and that section's tool results. `merge` joins the
+    sections, in a fixed order, into one Markdown plan, so wall time follows
+    the longest section rather than the whole plan.
+    """
+
+    def __init__(self, llm, tools: List, sections: Optional[List[str]] = None):
+        """
+        Initialize the SectionPlanner.
+
+        Args:
+            llm: Chat model (without tools) that writes the sections.
+            tools (List): The agent's tools, used as section sources.
+            sections (List[str]): Sections to write, in plan order; all by default.
+        """
+        self.llm = llm
+        self.tools = {tool.name: tool for tool in tools}
+        self.sections = list(sections or PLAN_SECTION_INSTRUCTIONS)
+        self.plan_tool = StructuredTool.from_function(
+            func=lambda **request: "The plan sections are being written.",
+            name=PLAN_TOOL_NAME,
+            description=(
+                "Write the final, detailed travel plan once the user has confirmed the high-level plan. "
+                "Pass the confirmed traveler profile; the plan sections are written from your research."
+            ),
+            args_schema=FinalPlanRequest,
+        )
+
+    # --------------------------
+    # Routing
+    # --------------------------
+    @staticmethod
+    def plan_call(message: BaseMessage) -> Optional[dict]:
+        """The `write_final_plan` tool call of an AI message, if any."""
+        for call in getattr(message, "tool_calls", None) or []:
+            if call["name"] == PLAN_TOOL_NAME:
+                return call
+        return None
+
+    @staticmethod
+    def _findings(messages: List[BaseMessage]) -> str:
+        """Text of the last AI answer before the user's latest turn (the summary they confirmed)."""
+        last_human = max((i for i, message in enumerate(messages) if isinstance(message, HumanMessage)), default=0)
+        for message in reversed(messages[:last_human]):
+            if isinstance(message, AIMessage) and not message.tool_calls and _text(message).strip():
+                return _text(message)
+        return ""
+
+    @staticmethod
+    def _same_place(place: str, destination: str) -> bool:
+        """Whether a tool's place argument refers to the destination ("Da Nang, Vietnam" ~ "da nang")."""
+        place, destination = normalize_key(place), normalize_key(destination)
+        if not place or not destination:
+            return False
+        return place == destination or f" {destination} " in f" {place} " or f" {place} " in f" {destination} "
+
+    @staticmethod
+    def _profile_parts(text: str) -> Dict[str, str]:
+        """Split a destination profile into search tool name -> that category's part."""
+        parts, current = {}, None
+        for line in text.splitlines():
+            name = PROFILE_SOURCES.get(line.strip())
+            if name is not None:
+                current = name
+                parts[current] = ""
+            elif current is not None:
+                parts[current] += line + "\n"
+        return {name: part.strip() for name, part in parts.items() if part.strip()}
+
+    def _tool_outputs(self, messages: List[BaseMessage], destination: str) -> Dict[str, str]:
+        """
+        Latest output of each tool in the conversation for the destination.
+        Outputs of calls for another place (e.g. before the user switched
+        destination) are skipped; destination profiles count as the four searches.
+        """
+        arguments = {
+            call["id"]: call.get("args") or {}
+            for message in messages if isinstance(message, AIMessage)
+            for call in message.tool_calls
+        }
+        outputs = {}
+        for message in messages:
+            if not isinstance(message, ToolMessage) or not message.name:
+                continue
+            args = arguments.get(message.tool_call_id, {})
+            place = args.get("place") or args.get("city")
+            if place is not None and not self._same_place(place, destination):
+                continue
+            if message.name == PROFILE_TOOL_NAME:
+                outputs.update(self._profile_parts(_text(message)))
+            else:
+                outputs[message.name] = _text(message)
+        return outputs
+
+    def route(self, state: PlannerState):
+        """
+        Conditional edge after the agent: one `write_section` branch per section
+        when it asked for the final plan, otherwise the usual tools / end routing.
+        """
+        messages = state["messages"]
+        call = self.plan_call(messages[-1])
+        if call is None:
+            return tools_condition(state)
+
+        findings = self._findings(messages)
+        outputs = self._tool_outputs(messages, call["args"].get("destination", ""))
+        logger.info("Writing %d plan sections in parallel for '%s'", len(self.sections), call["args"].get("destination"))
+        return [
+            Send("write_section", {
+                "section": section,
+                "request": call["args"],
+                "findings": findings,
+                "sources": {name: outputs[name] for name in SECTION_SOURCES[section] if name in outputs},
+            })
+            for section in self.sections
+        ]
+
+    @staticmethod
+    def destinations() -> list:
+        """Possible targets of `route` (for `add_conditional_edges`)."""
+        return ["tools", "write_section", END]
+
+    # --------------------------
+    # Section writers
+    # --------------------------
+    def _missing_sources(self, task: dict) -> Dict[str, dict]:
+        """Destination tools to run for this section: name -> arguments."""
+        destination = task["request"].get("destination", "")
+        return {
+            name: {DESTINATION_TOOLS[name]: destination}
+            for name in SECTION_SOURCES[task["section"]]
+            if name not in task["sources"] and name in DESTINATION_TOOLS and name in self.tools
+        }
+
+    @staticmethod
+    def _section_input(task: dict, sources: Dict[str, str]) -> List[BaseMessage]:
+        section = task["section"]
+        request = FinalPlanRequest(**task["request"])
+        profile = (
+            f"- Destination: {request.destination}\n- Days: {request.days}\n- Travelers: {request.travelers}\n"
+            f"- Budget: {request.budget}\n- Interests: {', '.join(request.interests) or 'not specified'}\n"
+            f"- Notes: {request.notes or 'none'}"
+        )
+        research = "\n\n".join(f"[{name}]\n{output}" for name, output in sources.items()) or "none"
+        system = SECTION_WRITER_PROMPT.format(
+            heading=SECTION_HEADINGS[section], instructions=PLAN_SECTION_INSTRUCTIONS[section]
+        )
+        return [
+            SystemMessage(content=system),
+            HumanMessage(content=(
+                f"Traveler profile:\n{profile}\n\n"
+                f"Confirmed findings:\n{task['findings'] or 'none'}\n\n"
+                f"Research:\n{research}"
+            )),
+        ]
+
+    def write_section(self, task: dict):
+        """Write one section (a `Send` branch). Failures leave the section empty for `merge`."""
+        sources = dict(task["sources"])
+        for name, args in self._missing_sources(task).items():
+            try:
+                sources[name] = self.tools[name].invoke(args)
+            except Exception as e:
+                logger.warning("Source '%s' unavailable for section '%s': %s", name, task["section"], e)
+        try:
+            response = self.llm.invoke(self._section_input(task, sources), config={"tags": [SECTION_TAG]})
+            text = _text(response)
+        except Exception:
+            logger.exception("Writing plan section '%s' failed", task["section"])
+            text = ""
+        return {"plan_sections": {task["section"]: text}}
+
+    async def awrite_section(self, task: dict):
+        """Async variant of `write_section`; its sources are fetched concurrently."""
+        sources = dict(task["sources"])
+        missing = self._missing_sources(task)
+        outcomes = await asyncio.gather(
+            *(self.tools[name].ainvoke(args) for name, args in missing.items()), return_exceptions=True
+        )
+        for name, outcome in zip(missing, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("Source '%s' unavailable for section '%s': %s", name, task["section"], outcome)
+            else:
+                sources[name] = outcome
+        try:
+            response = await self.llm.ainvoke(self._section_input(task, sources), config={"tags": [SECTION_TAG]})
+            text = _text(response)
+        except Exception:
+            logger.exception("Writing plan section '%s' failed", task["section"])
+            text = ""
+        return {"plan_sections": {task["section"]: text}}
+
+    # --------------------------
+    # Merge
+    # --------------------------
+    def merge(self, state: PlannerState):
+        """
+        Join the written sections into one Markdown plan (the final AI message)
+        and answer the agent's pending tool calls.
+        """
+        last = state["messages"][-1]
+        request = (self.plan_call(last) or {}).get("args") or {}
+        written = state.get("plan_sections") or {}
+
+        destination, days = request.get("destination", ""), request.get("days")
+        parts = [f"# {days}-Day Travel Plan: {destination}" if days else f"# Travel Plan: {destination}"]
+        for section in self.sections:
+            heading = f"## {SECTION_HEADINGS[section]}"
+            text = (written.get(section) or "").strip()
+            if not text:
+                text = f"{heading}\n_This section could not be written. Ask me to add it._"
+            elif not text.startswith("#"):
+                text = f"{heading}\n{text}"
+            parts.append(text)
+
+        # Every tool call of the agent's message needs a reply before the next turn
+        tool_messages = [
+            ToolMessage(
+                content="Plan written." if call["name"] == PLAN_TOOL_NAME else "Skipped: the final plan was written instead.",
+                tool_call_id=call["id"],
+                name=call["name"],
+            )
+            for call in getattr(last, "tool_calls", None) or []
+        ]
+        return {"messages": [*tool_messages, AIMessage(content="\n\n".join(parts))], "plan_sections": None}
@@ -2,10 +2,51 @@
 
 import streamlit as st
 import requests
+import json
 import uuid
 
 BASE_URL = "https://travel-planner-backend-4t27.onrender.com"
 
+
+def parse_answer(raw_answer) -> str:
+    """Normalize the backend answer (plain text or a list of content parts) to text."""
+    if isinstance(raw_answer, list) and raw_answer:
+        first_item = raw_answer[0]
+        if isinstance(first_item, dict) and 'text' in first_item:
+            return first_item['text']
+        return str(raw_answer)
+    if isinstance(raw_answer, str):
+        return raw_answer
+    return str(raw_answer) if raw_answer else ""
+
+
+def iter_sse_events(response):
+    """Yield (event, data) pairs from a streaming server-sent-events response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
+def post_query_stream(full_history: bool):
+    """Open a streaming /query request in full-history or delta mode."""
+    payload = {
+        "messages": st.session_state.messages if full_history else st.session_state.messages[-1:],
+        "conversation_id": st.session_state.conversation_id,
+        "mode": "full" if full_history else "delta",
+    }
+    print(f"[app.py] LOG: Sending streaming request to backend ({payload['mode']} mode)...")
+    return requests.post(f"{BASE_URL}/query/stream", json=payload, stream=True, timeout=300)
+
+
 st.set_page_config(
     page_title="Ứng dụng Agentic AI Lập Kế Hoạch Du Lịch Thông Minh",
     page_icon="🌍",
@@ -20,6 +61,9 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "conversation_id" not in st.session_state:
     st.session_state.conversation_id = str(uuid.uuid4())
+if "server_has_history" not in st.session_state:
+    # Once the backend holds our history we only send the newest message
+    st.session_state.server_has_history = False
 
 for msg in st.session_state.messages:
     role_icon = "🧑" if msg["role"] == "user" else "🤖"
@@ -33,49 +77,60 @@ if user_input := st.chat_input("Ví dụ: Lên kế hoạch đi Đà Lạt 3 ng
 
     try:
         print(f"\n--- [app.py] LOG: User input: '{user_input}' ---")
-        with st.spinner("Trợ lý đang suy nghĩ..."):
-            payload = {
-                "messages": st.session_state.messages,
-                "conversation_id": st.session_state.conversation_id
-            }
-            print(f"[app.py] LOG: Sending request to backend with full history...")
-            response = requests.post(f"{BASE_URL}/query", json=payload)
-            print(f"[app.py] LOG: Received response with status code: {response.status_code}")
 
         with st.chat_message("assistant", avatar="🤖"):
-            if response.status_code == 200:
-                response_data = response.json()
-                print(f"[app.py] LOG: Raw JSON response from backend: {response_data}")
-
-                raw_answer = response_data.get("answer", "Xin lỗi, đã có lỗi xảy ra.")
-
-                parsed_text = ""
-                if isinstance(raw_answer, list) and raw_answer:
-                    first_item = raw_answer[0]
-                    if isinstance(first_item, dict) and 'text' in first_item:
-                        parsed_text = first_item['text']
-                    else:
-                        parsed_text = str(raw_answer)
-                elif isinstance(raw_answer, str):
-                    parsed_text = raw_answer
-                else:
-                    parsed_text = str(raw_answer)
+            status_placeholder = st.empty()
+            answer_placeholder = st.empty()
+            status_placeholder.caption("Trợ lý đang suy nghĩ...")
 
-                st.session_state.conversation_id = response_data.get("conversation_id")
+            response = post_query_stream(full_history=not st.session_state.server_has_history)
+            if response.status_code == 409:
+                # The backend no longer has this conversation (expired or restarted)
+                response.close()
+                response = post_query_stream(full_history=True)
 
-                st.markdown(parsed_text)
+            with response:
+                print(f"[app.py] LOG: Received response with status code: {response.status_code}")
 
-                st.session_state.messages.append({"role": "assistant", "content": parsed_text})
-            else:
-                error_message = f"❌ Lỗi: {response.status_code} - {response.text}"
-                st.error(error_message)
-                st.session_state.messages.append({"role": "assistant", "content": error_message})
+                if response.status_code == 200:
+                    streamed_text = ""
+                    parsed_text = ""
+                    for event, data in iter_sse_events(response):
+                        if event == "start":
+                            st.session_state.conversation_id = data.get("conversation_id")
+                        elif event == "token":
+                            streamed_text += data.get("text", "")
+                            answer_placeholder.markdown(streamed_text + "▌")
+                        elif event == "tool_start":
+                            status_placeholder.caption(f"🔧 Đang sử dụng công cụ: {data.get('name')}...")
+                        elif event == "tool_end":
+                            status_placeholder.caption(f"✅ Đã xong: {data.get('name')}")
+                            # Text streamed before a tool call was only the model thinking aloud
+                            streamed_text = ""
+                        elif event == "final":
+                            parsed_text = parse_answer(data.get("answer")) or streamed_text
+                            st.session_state.conversation_id = data.get("conversation_id")
+                        elif event == "error":
+                            raise RuntimeError(data.get("error"))
+
+                    status_placeholder.empty()
+                    answer_placeholder.markdown(parsed_text)
+                    st.session_state.messages.append({"role": "assistant", "content": parsed_text})
+                    st.session_state.server_has_history = True
+                else:
+                    st.session_state.server_has_history = False
+                    status_placeholder.empty()
+                    error_message = f"❌ Lỗi: {response.status_code} - {response.text}"
+                    st.error(error_message)
+                    st.session_state.messages.append({"role": "assistant", "content": error_message})
 
     except requests.exceptions.RequestException as e:
+        st.session_state.server_has_history = False
         error_message = f"⚠️ Lỗi kết nối đến máy chủ: {e}"
         st.error(error_message)
         st.session_state.messages.append({"role": "assistant", "content": error_message})
     except Exception as e:
+        st.session_state.server_has_history = False
         error_message = f"⚠️ Đã xảy ra lỗi không mong muốn: {e}"
         print(f"[app.py] ERROR: Frontend request failed: {e}")
         st.error(error_message)
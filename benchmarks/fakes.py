@@ -0,0 +1,99 @@
+"""
+Scripted stand-ins for the LLM, so the agent can run offline.
+
+`ScriptedChatModel` answers every new user message with one round of tool
+calls (the usual research + budget plan of a trip request) and then with a
+fixed answer once the tool results are in. Without tools bound (e.g. the
+context manager's summarizer or the plan section writers) it always answers
+directly. Latency can be modeled per call and per generated token.
+"""
+import asyncio
+import time
+import uuid
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+DESTINATION = "Da Nang"
+
+# One research + budget round, using the tools the system prompt asks for
+DEFAULT_TOOL_PLAN = [
+    {"name": "get_destination_profile", "args": {"place": DESTINATION}},
+    {"name": "get_weather_forecast", "args": {"city": DESTINATION}},
+    {"name": "calculate_trip_budget", "args": {
+        "items": [
+            {"name": "Hotel", "category": "accommodation", "unit_cost": 45, "nights": 3, "currency": "USD"},
+            {"name": "Meals", "category": "food", "unit_cost": 250000, "quantity": 3, "nights": 3, "travelers": 2},
+            {"name": "Ba Na Hills", "category": "activities", "unit_cost": 900000, "travelers": 2, "day": 2},
+            {"name": "Airport taxi", "category": "transport", "unit_cost": 12, "quantity": 2, "currency": "USD"},
+        ],
+        "days": 3, "travelers": 2, "target_currency": "VND",
+    }},
+    {"name": "convert_currencies", "args": {"items": [
+        {"amount": 135, "from_currency": "USD", "to_currency": "VND"},
+        {"amount": 24, "from_currency": "USD", "to_currency": "VND"},
+    ]}},
+]
+
+DEFAULT_ANSWER = (
+    "## Day 1\nArrive in Da Nang, My Khe Beach, seafood dinner.\n\n"
+    "## Day 2\nBa Na Hills and the Golden Bridge.\n\n"
+    "## Day 3\nMarble Mountains, Hoi An in the evening.\n\n"
+    "## Budget\nAbout 10,500,000 VND for two travelers."
+)
+
+# One section of a Phase 3 plan (~200 tokens); a full plan has eight
+PLAN_SECTION = "## Section\n" + "- **Place** with opening hours, price and a short practical tip.\n" * 12
+
+# The agent's Phase 3 call in "sections" planner mode
+PLAN_REQUEST = {"name": "write_final_plan", "args": {
+    "destination": DESTINATION, "days": 3, "travelers": "couple", "budget": "mid-range, about 500 USD",
+    "interests": ["beaches", "food", "history"], "notes": "Hoi An evening on day 3",
+}}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model that supports `bind_tools`."""
+
+    tool_plan: List[dict] = DEFAULT_TOOL_PLAN
+    answer: str = DEFAULT_ANSWER
+    latency_seconds: float = 0.0   # Simulated model latency per call (time to first token)
+    seconds_per_token: float = 0.0  # Simulated generation time per output token (~4 characters)
+    tools_bound: bool = False
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self.model_copy(update={"tools_bound": True})
+
+    def _next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        if self.tools_bound and self.tool_plan and isinstance(messages[-1], HumanMessage):
+            tool_calls = [{**call, "id": f"call_{uuid.uuid4().hex[:12]}"} for call in self.tool_plan]
+            return AIMessage(content="", tool_calls=tool_calls)
+        return AIMessage(content=self.answer)
+
+    def _latency(self, message: AIMessage) -> float:
+        output_chars = len(message.content) + sum(len(str(call["args"])) for call in message.tool_calls)
+        return self.latency_seconds + self.seconds_per_token * output_chars / 4
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = self._next_message(messages)
+        latency = self._latency(message)
+        if latency:
+            time.sleep(latency)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message = self._next_message(messages)
+        latency = self._latency(message)
+        if latency:
+            await asyncio.sleep(latency)
+        return ChatResult(generations=[ChatGeneration(message=message)])
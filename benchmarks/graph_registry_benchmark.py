@@ -0,0 +1,68 @@
+"""
+Benchmark: per-conversation GraphBuilder vs. the shared GraphRegistry.
+
+Measures time to first request (graph ready for a new conversation) and
+retained memory per conversation for both strategies. No network calls are
+made: building a graph only constructs clients, it never calls them.
+
+Usage:
+    python -m benchmarks.graph_registry_benchmark --conversations 20
+"""
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+
+# Client constructors validate that keys exist, not that they are real
+for key in ("GOOGLE_API_KEY", "TAVILY_API_KEY", "OPENWEATHERMAP_API_KEY", "EXCHANGE_RATE_API_KEY"):
+    os.environ.setdefault(key, "benchmark-dummy-key")
+
+from agent.agentic_workflow import GraphBuilder  # noqa: E402
+from agent.graph_registry import GraphRegistry  # noqa: E402
+
+
+def _measure(get_graph, conversations: int) -> dict:
+    """Run `get_graph` once per conversation, keeping results alive like the API does."""
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+
+    held = {}
+    latencies = []
+    for i in range(conversations):
+        start = time.perf_counter()
+        held[f"conv-{i}"] = get_graph()
+        latencies.append(time.perf_counter() - start)
+
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "first_request_ms": latencies[0] * 1000,
+        "later_request_ms": (sum(latencies[1:]) / max(len(latencies) - 1, 1)) * 1000,
+        "memory_per_conversation_kb": (current - baseline) / conversations / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--provider", default="google")
+    args = parser.parse_args()
+
+    before = _measure(lambda: GraphBuilder(model_provider=args.provider)(), args.conversations)
+
+    registry = GraphRegistry()
+    registry.warm_up([args.provider])  # done at startup, outside the request path
+    after = _measure(lambda: registry.get_graph(args.provider), args.conversations)
+
+    print(f"{'strategy':<22}{'first req (ms)':>16}{'later req (ms)':>16}{'mem/conv (KiB)':>16}")
+    for name, result in (("GraphBuilder per conv", before), ("GraphRegistry", after)):
+        print(f"{name:<22}{result['first_request_ms']:>16.2f}{result['later_request_ms']:>16.2f}"
+              f"{result['memory_per_conversation_kb']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
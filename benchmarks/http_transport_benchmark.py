@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: per-call connections vs. the shared pooled transport.
+
+Starts a local keep-alive HTTP server and times sequential GETs made the
+old way (module-level `requests.get` / a new `httpx.AsyncClient` per call)
+against `utils.http_client`. The server is plain HTTP on localhost, so the
+saving shown is only the TCP handshake; against real upstreams the TLS
+handshake makes the gap considerably larger.
+
+Usage:
+    python -m benchmarks.http_transport_benchmark --calls 200
+"""
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import requests
+
+from utils import http_client
+
+PAYLOAD = json.dumps({"conversion_rates": {"USD": 1.0, "VND": 25000.0}}).encode()
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+def _time_calls(call, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+async def _atime_calls(call, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        await call()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+async def _new_client_get(url: str):
+    async with httpx.AsyncClient() as client:
+        return await client.get(url)
+
+
+async def _run_async(url: str, calls: int) -> tuple:
+    per_call = await _atime_calls(lambda: _new_client_get(url), calls)
+    pooled = await _atime_calls(lambda: http_client.arequest("GET", url), calls)
+    await http_client.aclose_async_client()
+    return per_call, pooled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/latest/USD"
+
+    sync_per_call = _time_calls(lambda: requests.get(url), args.calls)
+    sync_pooled = _time_calls(lambda: http_client.request("GET", url), args.calls)
+    async_per_call, async_pooled = asyncio.run(_run_async(url, args.calls))
+
+    server.shutdown()
+    http_client.close_session()
+
+    print(f"{'client':<10}{'per-call conn (ms)':>20}{'pooled (ms)':>14}{'speedup':>10}")
+    for name, before, after in (("sync", sync_per_call, sync_pooled), ("async", async_per_call, async_pooled)):
+        print(f"{name:<10}{before:>20.3f}{after:>14.3f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Import-time budget check for cold starts.
+
+Imports the API module in a fresh interpreter (`python -X importtime`),
+reports the slowest modules and fails when:
+
+- the import takes longer than `--budget-ms` (best of `--runs`), or
+- a module that must stay lazy was imported (provider SDKs are loaded by
+  ModelLoader only for the selected provider, at startup warm-up).
+
+Usage:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget-ms 2000 --module main
+
+The default budget is the measured baseline (`import main` takes about
+1.3-1.4 s on a developer laptop, up to ~1.6 s on slower machines) plus
+margin for noise, so it fails on real regressions, not out of the box.
+Eagerly imported SDKs are caught by the LAZY_MODULES check regardless.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Must not be imported by `import main`; each costs hundreds of milliseconds
+LAZY_MODULES = ["langchain_groq", "langchain_openai", "langchain_google_genai", "langchain_community", "tiktoken",
+                "langchain_tavily"]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """
+    Import `module` in a fresh interpreter.
+
+    Returns:
+        (cumulative import time of `module` in ms, {module: (self µs, cumulative µs)})
+    """
+    env = dict(os.environ)
+    # Client constructors validate that keys exist, not that they are real
+    for key in ("GOOGLE_API_KEY", "TAVILY_API_KEY"):
+        env.setdefault(key, "benchmark-dummy-key")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # The first (outermost) entry of a module name wins
+        modules.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+    return modules[module][1] / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--budget-ms", type=float, default=2000.0, help="Maximum import time")
+    parser.add_argument("--runs", type=int, default=3, help="Imports to run; the fastest counts")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules (self time) to list")
+    args = parser.parse_args()
+
+    runs: List[Tuple[float, dict]] = [measure(args.module) for _ in range(args.runs)]
+    total_ms, modules = min(runs, key=lambda run: run[0])
+
+    print(f"{'module':<60}{'self ms':>10}{'cumul ms':>10}")
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"{name:<60}{self_us / 1000:>10.1f}{cumulative_us / 1000:>10.1f}")
+
+    failures = [f"{name} imported eagerly" for name in LAZY_MODULES if name in modules]
+    if total_ms > args.budget_ms:
+        failures.append(f"import {args.module} took {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    print(f"\nimport {args.module}: {total_ms:.0f} ms (best of {args.runs}), budget {args.budget_ms:.0f} ms")
+    if failures:
+        print("FAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: per-turn logging overhead, old print() calls vs. leveled logging.
+
+Replays the logging done around one agent turn for conversations of growing
+length. The old code formats and prints the full message state and response
+object on every turn; the new code logs those only at DEBUG, via lazily
+rendered `Truncated` arguments. Output goes to os.devnull, so the numbers
+show the cost of formatting and writing without any terminal overhead.
+
+Usage:
+    python -m benchmarks.logging_benchmark --turns 200
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from utils.logger import Truncated, configure_logging, get_logger
+
+logger = get_logger("benchmarks.logging")
+
+# A typical search tool result is a few KB of text
+TOOL_OUTPUT = "Following are the attractions of Da Nang: " + "Marble Mountains, Dragon Bridge, My Khe Beach. " * 60
+
+
+def build_conversation(turns: int) -> list:
+    """Conversation with one tool round-trip per user turn."""
+    messages = []
+    for i in range(turns):
+        messages += [
+            HumanMessage(content=f"Plan day {i + 1} of my trip to Da Nang", id=f"h{i}"),
+            AIMessage(content="", id=f"a{i}",
+                      tool_calls=[{"name": "search_attractions", "args": {"place": "Da Nang"}, "id": f"c{i}"}]),
+            ToolMessage(content=TOOL_OUTPUT, tool_call_id=f"c{i}", name="search_attractions", id=f"t{i}"),
+            AIMessage(content=f"Here is day {i + 1} of your itinerary...", id=f"b{i}"),
+        ]
+    return messages
+
+
+def old_turn(messages: list, response: AIMessage) -> None:
+    """The print() calls of the original agent_function."""
+    print("\n--- [agentic_workflow.py] Agent Turn ---")
+    print(f"[agentic_workflow.py] LOG: Agent received current state: {messages}")
+    print("[agentic_workflow.py] LOG: Invoking LLM with tools...")
+    print(f"[agentic_workflow.py] LOG: LLM produced response object: {response}")
+    print("--- [agentic_workflow.py] End of Agent Turn ---\n")
+
+
+def new_turn(messages: list, response: AIMessage) -> None:
+    """The logger calls of the current agent_function."""
+    logger.debug("Agent turn, current state: %s", Truncated(messages))
+    logger.debug("Invoking LLM with tools on %d messages", len(messages) + 1)
+    logger.debug("LLM produced response: %s", Truncated(response))
+
+
+def _time_turns(turn, conversation: list, repeats: int) -> float:
+    """Median microseconds per agent turn at the given conversation length."""
+    response = AIMessage(content="Here is your itinerary...")
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        turn(conversation, response)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200, help="Longest conversation, in user turns")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    lengths = sorted({1, 10, 50, args.turns})
+    print(f"{'user turns':>10}{'print (us)':>14}{'INFO (us)':>14}{'DEBUG (us)':>14}{'INFO json (us)':>16}")
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        rows = []
+        for turns in lengths:
+            conversation = build_conversation(turns)
+            row = [turns, _time_turns(old_turn, conversation, args.repeats)]
+            for settings in ({"level": "INFO"}, {"level": "DEBUG"}, {"level": "INFO", "format": "json"}):
+                # Handlers bind sys.stdout at configure time, so reconfigure inside the redirect
+                configure_logging(settings, force=True)
+                row.append(_time_turns(new_turn, conversation, args.repeats))
+            rows.append(row)
+
+    for turns, old, info, debug, info_json in rows:
+        print(f"{turns:>10}{old:>14.1f}{info:>14.1f}{debug:>14.1f}{info_json:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
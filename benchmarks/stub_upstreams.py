@@ -0,0 +1,137 @@
+"""
+Local stub servers for Tavily, OpenWeatherMap and ExchangeRate-API.
+
+One keep-alive HTTP server answers all three APIs with canned payloads
+(optionally after a simulated latency) and counts calls per API, so
+benchmarks can check how many upstream requests the caches saved.
+`point_graph_at` re-targets an already built GraphBuilder at the stub.
+"""
+import json
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+TAVILY_RESPONSE = {
+    "query": "",
+    "answer": "Top picks: Marble Mountains, Dragon Bridge, My Khe Beach, Ba Na Hills and the Son Tra peninsula.",
+    "results": [
+        {"title": "Things to do in Da Nang", "url": "https://example.com/da-nang", "content": "Beaches and mountains.",
+         "score": 0.9},
+    ],
+    "response_time": 0.5,
+}
+
+EXCHANGE_RATES = {"USD": 1.0, "VND": 25400.0, "EUR": 0.92, "JPY": 151.3, "THB": 36.4}
+
+
+def _weather_payload() -> dict:
+    return {
+        "name": "Da Nang",
+        "dt": int(time.time()),
+        "main": {"temp": 29.5, "humidity": 74},
+        "weather": [{"description": "scattered clouds"}],
+    }
+
+
+def _forecast_payload() -> dict:
+    now = int(time.time())
+    slots = []
+    for i in range(10):
+        dt = now + i * 3 * 3600
+        slots.append({
+            "dt": dt,
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(dt)),
+            "main": {"temp": 27 + i % 4},
+            "weather": [{"description": "light rain" if i % 3 == 0 else "broken clouds"}],
+        })
+    return {"city": {"name": "Da Nang"}, "list": slots}
+
+
+class StubUpstreams:
+    """
+    Start with `with StubUpstreams(latency_ms=50) as stub:`; `stub.base_url` is
+    the server root and `stub.calls` counts requests per API.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_seconds = latency_ms / 1000
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _reply(self, api: str, payload: dict):
+                with stub._lock:
+                    stub.calls[api] += 1
+                if stub.latency_seconds:
+                    time.sleep(stub.latency_seconds)
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.startswith("/search"):
+                    return self._reply("tavily", TAVILY_RESPONSE)
+                self.send_error(404)
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if path.endswith("/data/2.5/weather"):
+                    return self._reply("openweathermap", _weather_payload())
+                if path.endswith("/data/2.5/forecast"):
+                    return self._reply("openweathermap", _forecast_payload())
+                if "/latest/" in path:
+                    base = path.rsplit("/", 1)[-1].upper()
+                    rates = {code: rate / EXCHANGE_RATES[base] for code, rate in EXCHANGE_RATES.items()}
+                    return self._reply("exchangerate", {"result": "success", "conversion_rates": rates})
+                self.send_error(404)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubUpstreams":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+
+def point_graph_at(graph_builder, base_url: str) -> None:
+    """Send every upstream call of a GraphBuilder's tools to the stub server."""
+    graph_builder.weather_tools.weather_service.base_url = f"{base_url}/data/2.5"
+    graph_builder.currency_converter_tools.currency_service.base_url = f"{base_url}/v6/benchmark/latest"
+    graph_builder.place_search_tools.tavily_search.tavily_tool.api_wrapper.api_base_url = base_url
+    # Every search should reach the stubs, even where a local destination index exists
+    graph_builder.place_search_tools.destination_index = None
@@ -0,0 +1,328 @@
+"""
+Offline benchmark suite: no API keys or network access needed.
+
+The LLM is replaced by `benchmarks.fakes.ScriptedChatModel` and Tavily,
+OpenWeatherMap and ExchangeRate-API by local stubs
+(`benchmarks.stub_upstreams`). Covered:
+
+- graph_build:  GraphBuilder construction + StateGraph compile
+- agent_turn:   graph overhead per turn (no tools), by conversation length
+- tools:        each tool wrapper, cold (empty caches) vs. warm, and upstream calls
+- query:        POST /query end to end, cold vs. warm
+- phase3:       final plan generation, one long answer ("single" planner mode)
+                vs. parallel sections + merge ("sections"), with modeled LLM
+                time to first token and per-token generation time
+- caches:       TTLCache / TieredCache (SQLite tier) operation cost
+
+Results are printed and can be written as JSON (`--output`); pass an older
+JSON file with `--compare` to print the change per metric between commits.
+
+Usage:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --compare bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict
+from unittest.mock import patch
+
+# Client constructors validate that keys exist, not that they are real
+for key in ("GOOGLE_API_KEY", "TAVILY_API_KEY", "OPENWEATHERMAP_API_KEY", "EXCHANGE_RATE_API_KEY"):
+    os.environ.setdefault(key, "benchmark-dummy-key")
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+from agent.agentic_workflow import GraphBuilder  # noqa: E402
+from benchmarks.fakes import DEFAULT_TOOL_PLAN, PLAN_REQUEST, PLAN_SECTION, ScriptedChatModel  # noqa: E402
+from benchmarks.stub_upstreams import StubUpstreams, point_graph_at  # noqa: E402
+from prompt_library.prompt import PLAN_SECTION_INSTRUCTIONS  # noqa: E402
+from utils.cache import SQLiteCache, TieredCache, TTLCache  # noqa: E402
+from utils.logger import configure_logging  # noqa: E402
+from utils.service_registry import services  # noqa: E402
+
+
+def _median_ms(func: Callable[[], object], repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def make_builder(model: ScriptedChatModel, base_url: str = None, model_provider: str = "google",
+                 planner_mode: str = None) -> GraphBuilder:
+    """Build a GraphBuilder around the scripted model, optionally pointed at the stubs."""
+    # Shared clients are cached process-wide; drop them so this builder gets the scripted model
+    services.clear()
+    with patch("utils.model_loader.ModelLoader.load_llm", return_value=model):
+        builder = GraphBuilder(model_provider=model_provider, planner_mode=planner_mode)
+    if base_url:
+        point_graph_at(builder, base_url)
+    return builder
+
+
+def reset_caches(builder: GraphBuilder) -> None:
+    """Empty every result cache the builder's tools use."""
+    builder.place_search_tools.tavily_search.cache = TieredCache(TTLCache(512, 3600))
+    builder.weather_tools.weather_service.current_cache.clear()
+    builder.weather_tools.weather_service.forecast_cache.clear()
+    builder.currency_converter_tools.currency_service.rate_tables.clear()
+
+
+# --------------------------
+# Benchmarks
+# --------------------------
+def bench_graph_build(repeats: int) -> dict:
+    model = ScriptedChatModel()
+    return {
+        "builder_ms": _median_ms(lambda: make_builder(model), repeats),
+        "build_and_compile_ms": _median_ms(lambda: make_builder(model).build_graph(), repeats),
+    }
+
+
+def bench_agent_turn(lengths, repeats: int) -> dict:
+    graph = make_builder(ScriptedChatModel(tool_plan=[])).build_graph()
+    results = {}
+    for turns in lengths:
+        history = []
+        for i in range(turns):
+            history += [HumanMessage(content=f"Question {i} about my trip"), AIMessage(content="Answer " * 80)]
+        state = {"messages": history + [HumanMessage(content="And the budget?")]}
+        results[f"sync_ms@{turns}"] = _median_ms(lambda: graph.invoke(state), repeats)
+        results[f"async_ms@{turns}"] = _median_ms(lambda: asyncio.run(graph.ainvoke(state)), repeats)
+    return results
+
+
+def bench_tools(stub: StubUpstreams, repeats: int) -> dict:
+    builder = make_builder(ScriptedChatModel(), stub.base_url)
+    tools = {tool.name: tool for tool in builder.tools}
+    results = {}
+    for call in DEFAULT_TOOL_PLAN:
+        tool = tools[call["name"]]
+
+        def cold():
+            reset_caches(builder)
+            tool.invoke(call["args"])
+
+        stub.reset_counts()
+        results[f"{tool.name}.cold_ms"] = _median_ms(cold, repeats)
+        results[f"{tool.name}.cold_upstream_calls"] = sum(stub.calls.values()) / repeats
+
+        stub.reset_counts()
+        results[f"{tool.name}.warm_ms"] = _median_ms(lambda: tool.invoke(call["args"]), repeats)
+        results[f"{tool.name}.warm_upstream_calls"] = sum(stub.calls.values()) / repeats
+    return results
+
+
+def bench_query(stub: StubUpstreams, repeats: int) -> dict:
+    from fastapi.testclient import TestClient
+
+    builders = []
+
+    def factory(model_provider: str = "google"):
+        builder = make_builder(ScriptedChatModel(), stub.base_url, model_provider)
+        builders.append(builder)
+        return builder
+
+    # main.py builds its graph through the registry at startup; its connection
+    # pre-warm is pointed at the stubs instead of the real APIs
+    from utils import http_client
+    prewarm = http_client.aprewarm_connections
+
+    async def prewarm_stubs():
+        return await prewarm([stub.base_url])
+
+    with patch("agent.graph_registry.GraphBuilder", side_effect=factory), \
+            patch("utils.http_client.aprewarm_connections", new=prewarm_stubs):
+        import main
+        main.graph_registry.clear()
+        with TestClient(main.app) as client:
+            body = {"messages": [{"role": "user", "content": "Plan 3 days in Da Nang for 2 people"}]}
+
+            def post():
+                response = client.post("/query", json=body)
+                response.raise_for_status()
+
+            def cold():
+                reset_caches(builders[0])
+                post()
+
+            stub.reset_counts()
+            cold_ms = _median_ms(cold, repeats)
+            cold_calls = sum(stub.calls.values()) / repeats
+            stub.reset_counts()
+            warm_ms = _median_ms(post, repeats)
+            warm_calls = sum(stub.calls.values()) / repeats
+        main.graph_registry.clear()
+
+    return {"cold_ms": cold_ms, "cold_upstream_calls": cold_calls,
+            "warm_ms": warm_ms, "warm_upstream_calls": warm_calls}
+
+
+def bench_phase3(stub: StubUpstreams, repeats: int, first_token_ms: float, ms_per_token: float) -> dict:
+    """
+    End-to-end latency of the final plan, from the user's confirmation to the
+    merged Markdown. Both modes use the same modeled LLM speed; the research
+    results are already cached (as after Phase 2).
+    """
+    state = {"messages": [
+        HumanMessage(content="Plan 3 days in Da Nang for a couple, mid-range, beaches, food and history."),
+        AIMessage(content="Here is what I found: My Khe Beach, Ba Na Hills, Marble Mountains, Hoi An. Shall I go ahead?"),
+        HumanMessage(content="Yes, go ahead with the full plan."),
+    ]}
+    sections = len(PLAN_SECTION_INSTRUCTIONS)
+    speed = {"latency_seconds": first_token_ms / 1000, "seconds_per_token": ms_per_token / 1000}
+    models = {
+        "single": ScriptedChatModel(tool_plan=[], answer="\n\n".join([PLAN_SECTION] * sections), **speed),
+        "sections": ScriptedChatModel(tool_plan=[PLAN_REQUEST], answer=PLAN_SECTION, **speed),
+    }
+
+    results = {}
+    for mode, model in models.items():
+        builder = make_builder(model, stub.base_url, planner_mode=mode)
+        builder.response_cache = None  # Every run must generate the plan
+        graph = builder.build_graph()
+        asyncio.run(graph.ainvoke(state))  # Fill the tool caches, like the Phase 2 research does
+        # The agent calls the tool-bound copy of the model, section writers the model itself
+        model.calls = builder.llm_with_tools.calls = 0
+        results[f"{mode}.end_to_end_ms"] = _median_ms(lambda: asyncio.run(graph.ainvoke(state)), repeats)
+        results[f"{mode}.llm_calls"] = (model.calls + builder.llm_with_tools.calls) / repeats
+    results["speedup"] = results["single.end_to_end_ms"] / results["sections.end_to_end_ms"]
+    return results
+
+
+def bench_caches(operations: int) -> dict:
+    memory = TTLCache(max_entries=operations, default_ttl=3600)
+    keys = [f"attractions:city-{i}" for i in range(operations)]
+    value = {"answer": "x" * 500}
+
+    start = time.perf_counter()
+    for key in keys:
+        memory.set(key, value)
+    set_us = (time.perf_counter() - start) / operations * 1e6
+    start = time.perf_counter()
+    for key in keys:
+        memory.get(key)
+    get_us = (time.perf_counter() - start) / operations * 1e6
+
+    with tempfile.TemporaryDirectory() as directory:
+        disk = SQLiteCache(os.path.join(directory, "bench.sqlite3"))
+        tiered = TieredCache(TTLCache(max_entries=operations, default_ttl=3600), disk)
+        start = time.perf_counter()
+        for key in keys:
+            tiered.set(key, value)
+        tiered_set_us = (time.perf_counter() - start) / operations * 1e6
+
+        # Cold memory tier: every read falls through to SQLite and is promoted
+        tiered.memory.clear()
+        start = time.perf_counter()
+        for key in keys:
+            tiered.get(key)
+        disk_get_us = (time.perf_counter() - start) / operations * 1e6
+
+    return {"ttl_set_us": set_us, "ttl_get_us": get_us,
+            "tiered_set_us": tiered_set_us, "tiered_disk_get_us": disk_get_us}
+
+
+# --------------------------
+# Output
+# --------------------------
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _flatten(results: Dict[str, dict]) -> Dict[str, float]:
+    return {f"{section}.{metric}": value for section, metrics in results.items() for metric, value in metrics.items()}
+
+
+def print_results(results: Dict[str, dict], baseline: dict = None) -> None:
+    current = _flatten(results)
+    previous = _flatten(baseline["results"]) if baseline else {}
+    header = f"{'metric':<58}{'value':>12}"
+    if baseline:
+        header += f"{'baseline':>12}{'change':>10}"
+    print(header)
+    for name, value in current.items():
+        line = f"{name:<58}{value:>12.3f}"
+        if name in previous:
+            old = previous[name]
+            change = f"{(value - old) / old * 100:+.1f}%" if old else "n/a"
+            line += f"{old:>12.3f}{change:>10}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--upstream-latency-ms", type=float, default=20.0,
+                        help="Simulated latency of each stub API response")
+    parser.add_argument("--llm-first-token-ms", type=float, default=200.0,
+                        help="Modeled LLM time to first token (phase3)")
+    parser.add_argument("--llm-ms-per-token", type=float, default=0.5,
+                        help="Modeled LLM generation time per output token (phase3)")
+    parser.add_argument("--only", nargs="*",
+                        choices=["graph_build", "agent_turn", "tools", "query", "phase3", "caches"],
+                        help="Run only these benchmarks")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    # Keep benchmark output readable; per-call INFO logs would also skew timings
+    configure_logging({"level": "WARNING"}, force=True)
+    selected = set(args.only or ["graph_build", "agent_turn", "tools", "query", "phase3", "caches"])
+
+    results = {}
+    if "graph_build" in selected:
+        results["graph_build"] = bench_graph_build(args.repeats)
+    if "agent_turn" in selected:
+        results["agent_turn"] = bench_agent_turn([1, 10, 50], args.repeats)
+    if "caches" in selected:
+        results["caches"] = bench_caches(5000)
+    if selected & {"tools", "query", "phase3"}:
+        with StubUpstreams(latency_ms=args.upstream_latency_ms) as stub:
+            if "tools" in selected:
+                results["tools"] = bench_tools(stub, args.repeats)
+            if "query" in selected:
+                results["query"] = bench_query(stub, args.repeats)
+            if "phase3" in selected:
+                results["phase3"] = bench_phase3(stub, args.repeats, args.llm_first_token_ms, args.llm_ms_per_token)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "repeats": args.repeats,
+            "upstream_latency_ms": args.upstream_latency_ms,
+            "llm_first_token_ms": args.llm_first_token_ms,
+            "llm_ms_per_token": args.llm_ms_per_token,
+        },
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
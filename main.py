@@ -1,19 +1,60 @@
 # main.py
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
+from langchain_core.messages import RemoveMessage
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from pydantic import BaseModel, Field
-from starlette.responses import JSONResponse
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import datetime
-from agent.agentic_workflow import GraphBuilder
+import json
+import time
+from contextlib import asynccontextmanager
+from agent.context_manager import SUMMARY_TAG
+from agent.graph_registry import graph_registry, thread_config
+from agent.instrumentation import MetricsCallbackHandler
+from agent.section_planner import SECTION_TAG
+from utils import http_client
+from utils.config_loader import load_config
+from utils.conversation_store import ConversationStore, estimate_size
+from utils.document_export import FORMATS, DocumentExporter, ExportJob, ExportQueueFull
+from utils.logger import Truncated, get_logger
+from utils.metrics import ACTIVE_CONVERSATIONS, HTTP_DURATION, HTTP_REQUESTS, RequestSpans, registry, track_request
+from utils.place_search import get_place_search_cache
+from utils.service_registry import services
 import uvicorn
 import uuid
-from typing import Dict, List
+from typing import List, Literal
+
+# "pool" routes across every configured provider (see model_pool in config.yaml)
+MODEL_PROVIDER = "pool" if (load_config().get("model_pool") or {}).get("enabled") else "google"
+
+logger = get_logger("main")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the shared clients (LLM, upstream APIs, HTTP pool) and compile the
+    # agent graph once, before the first request is accepted
+    graph_registry.warm_up([MODEL_PROVIDER])
+    # Pre-open upstream connections in this loop's client so the first request skips the handshakes
+    if http_client.get_http_settings()["prewarm_connections"]:
+        await http_client.aprewarm_connections()
+    yield
+    # Release pooled upstream connections
+    await http_client.aclose_async_client()
+    http_client.close_session()
+    # Let queued exports finish writing
+    if exporter is not None:
+        exporter.close()
+
 
 app = FastAPI(
     title="Smart Travel Planner API",
     description="API for the Agentic AI Travel Planner",
-    version="1.1.0"
+    version="1.1.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -24,7 +65,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-conversations: Dict[str, any] = {}
+# Conversation ID -> metadata, bounded by count, bytes and idle TTL.
+# The compiled graph itself is shared (see graph_registry); the message history
+# lives in its checkpointer and is dropped together with the conversation.
+conversations = ConversationStore.from_config(
+    load_config().get("conversation_store"),
+    on_evict=lambda conversation_id, _: graph_registry.delete_thread(conversation_id),
+)
+ACTIVE_CONVERSATIONS.set_function(lambda: conversations.stats()["entries"])
+
+# Writes Markdown / HTML / JSON exports of answers on background threads (None when disabled)
+exporter = DocumentExporter.from_config(load_config().get("document_export"))
+
+# LLM calls whose output is not streamed to clients as part of the answer
+HIDDEN_LLM_TAGS = {"hedge", SECTION_TAG, SUMMARY_TAG}
+
+# Adds a Server-Timing header (LLM / tool / upstream / node time) to /query responses
+SERVER_TIMING = (load_config().get("metrics") or {}).get("server_timing", True)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and time them per route (streaming routes: time to headers)."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUESTS.inc(path=path, status=status)
+        HTTP_DURATION.observe(time.perf_counter() - start, path=path)
 
 
 class Message(BaseModel):
@@ -33,11 +106,31 @@ class Message(BaseModel):
     content: str
 
 
+ExportFormatName = Literal["markdown", "html", "json"]
+
+
 class QueryRequest(BaseModel):
-    """Request body now accepts a list of messages."""
+    """
+    Request body.
+    - mode "full": `messages` is the whole history; it replaces the server copy.
+    - mode "delta": `messages` holds only the new turn; the server appends it to
+      the history it keeps for `conversation_id` (409 if that history is gone,
+      in which case the client should resend in full mode).
+    - export_formats: also export the answer in these formats, in the
+      background; the response lists the queued exports (see /exports).
+    """
     # Thay vì 'query: str', chúng ta nhận toàn bộ lịch sử
-    messages: List[Message] = Field(...)
+    messages: List[Message] = Field(..., min_length=1)
+    conversation_id: str = Field(None)
+    mode: Literal["full", "delta"] = Field("full")
+    export_formats: List[ExportFormatName] = Field(default_factory=list)
+
+
+class ExportRequest(BaseModel):
+    """Export `text`, or else the latest answer of `conversation_id`, in one format."""
     conversation_id: str = Field(None)
+    text: str = Field(None)
+    format: ExportFormatName = Field("markdown")
 
 
 @app.get("/")
@@ -45,49 +138,303 @@ async def read_root():
     return {"message": "Chào mừng bạn đến với ứng dụng lên kế hoạch Smart Travel Planner"}
 
 
+@app.get("/conversations/stats")
+async def conversation_stats():
+    """Report conversation store size and hit/miss/eviction counters."""
+    return conversations.stats()
+
+
+def _prepare_run(request: QueryRequest):
+    """
+    Resolve (or start) the conversation and build the graph input.
+
+    Returns:
+        tuple: (conversation_id, conversation metadata, compiled graph, graph input).
+
+    Raises:
+        HTTPException: 409 if a delta request targets an unknown conversation.
+    """
+    log_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    logger.info("Received query (%d messages, %s mode)", len(request.messages), request.mode)
+    logger.debug("Latest message: %s", Truncated(request.messages[-1].content))
+
+    conversation_id = request.conversation_id
+    conversation = conversations.get(conversation_id) if conversation_id else None
+    if conversation is None and request.mode == "delta":
+        raise HTTPException(
+            status_code=409,
+            detail="Unknown or expired conversation_id; resend the full history with mode='full'.",
+        )
+    if conversation is None:
+        conversation_id = str(uuid.uuid4())
+        logger.info("New conversation started. ID: %s", conversation_id)
+        conversation = {"model_provider": MODEL_PROVIDER, "created_at": log_time}
+        conversations.put(conversation_id, conversation)
+    else:
+        logger.info("Continuing conversation. ID: %s", conversation_id)
+
+    react_app = graph_registry.get_graph(conversation["model_provider"])
+
+    langchain_messages = []
+    if request.mode == "full":
+        # Replace whatever the checkpointer holds with the client's history
+        langchain_messages.append(RemoveMessage(id=REMOVE_ALL_MESSAGES))
+    for msg in request.messages:
+        role = "ai" if msg.role == "assistant" else "user"
+        langchain_messages.append((role, msg.content))
+
+    return conversation_id, conversation, react_app, {"messages": langchain_messages}
+
+
+async def _record_turn(conversation_id: str, conversation: dict, react_app) -> None:
+    """Re-account the conversation's size now that its stored history has grown."""
+    state = await react_app.aget_state(thread_config(conversation_id))
+    conversations.put(conversation_id, conversation, nbytes=estimate_size(state.values.get("messages", [])))
+
+
+def _content_to_text(content) -> str:
+    """Flatten message content (a string or a list of content parts) to plain text."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part if isinstance(part, str) else part.get("text", "")
+            for part in content
+            if isinstance(part, (str, dict))
+        )
+    return str(content)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one server-sent event. Values JSON cannot encode (e.g. datetimes in tool output) are sent as strings."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _run_config(conversation_id: str, spans: RequestSpans) -> dict:
+    """Thread config plus the callback that times nodes, LLM calls and tools for this request."""
+    return {**thread_config(conversation_id), "callbacks": [MetricsCallbackHandler(spans)]}
+
+
+def _export_view(job: ExportJob) -> dict:
+    return {**job.to_dict(), "status_url": f"/exports/{job.id}", "download_url": f"/exports/{job.id}/download"}
+
+
+def _queue_exports(text: str, formats: List[str]) -> List[dict]:
+    """Queue background exports of an answer. Only enqueues; never waits on disk I/O."""
+    if exporter is None or not text:
+        return []
+    exports = []
+    for export_format in formats:
+        try:
+            exports.append(_export_view(exporter.submit(text, export_format)))
+        except ExportQueueFull as e:
+            logger.warning("Export of the answer as %s refused: %s", export_format, e)
+            exports.append({"format": export_format, "status": "rejected", "error": str(e)})
+    return exports
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/models/stats")
+async def model_stats():
+    """Report per-provider calls, errors, latency/error EWMAs and hedging counters of the model pool."""
+    return graph_registry.model_pool_stats()
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Report hit/miss counters for the upstream result caches and destination index freshness."""
+    destination_index = services.destination_index()
+    return {
+        "place_search": get_place_search_cache().stats(),
+        "llm_response": graph_registry.response_cache_stats(),
+        # Reads every index row from SQLite; kept off the event loop
+        "destination_index": await asyncio.to_thread(destination_index.stats) if destination_index is not None else None,
+    }
+
+
 @app.post("/query")
-async def query_travel_agent(request: QueryRequest):
+async def query_travel_agent(request: QueryRequest, response: Response):
     try:
-        log_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print(f"\n--- [main.py] {log_time} ---")
-        print(f"[main.py] LOG: Received query: '{request.messages[-1].content}'")
-
-        conversation_id = request.conversation_id
-        if not conversation_id or conversation_id not in conversations:
-            conversation_id = str(uuid.uuid4())
-            print(f"[main.py] LOG: New conversation started. ID: {conversation_id}")
-            graph_builder = GraphBuilder(model_provider="google")
-            react_app = graph_builder()
-            conversations[conversation_id] = react_app
-        else:
-            print(f"[main.py] LOG: Continuing conversation. ID: {conversation_id}")
-            react_app = conversations[conversation_id]
-
-        langchain_messages = []
-        for msg in request.messages:
-            role = "ai" if msg.role == "assistant" else "user"
-            langchain_messages.append((role, msg.content))
-
-        input_data = {"messages": langchain_messages}
-        print(f"[main.py] LOG: Invoking agent graph with full conversation history...")
+        conversation_id, conversation, react_app, input_data = _prepare_run(request)
 
         final_output = ""
-        for chunk in react_app.stream(input_data):
-            for key, value in chunk.items():
-                if key == "agent" and value.get("messages"):
-                    final_output = value["messages"][-1].content
+        with track_request() as spans:
+            # astream keeps the event loop free while the LLM and tools wait on I/O
+            # durability="exit" checkpoints once per request instead of after every step
+            async for chunk in react_app.astream(
+                input_data, config=_run_config(conversation_id, spans), durability="exit"
+            ):
+                for key, value in chunk.items():
+                    # merge_plan produces the answer in "sections" planner mode
+                    if key in ("agent", "merge_plan") and value.get("messages"):
+                        final_output = value["messages"][-1].content
+            await _record_turn(conversation_id, conversation, react_app)
+
+        if SERVER_TIMING:
+            response.headers["Server-Timing"] = spans.server_timing()
 
-        print(f"[main.py] LOG: Final answer extracted: {final_output[:150]}...")
-        print(f"--- [main.py] End of Request ---")
+        logger.debug("Final answer extracted: %s", Truncated(final_output, 150))
 
-        return {"answer": final_output, "conversation_id": conversation_id}
+        result = {"answer": final_output, "conversation_id": conversation_id}
+        if request.export_formats:
+            result["exports"] = _queue_exports(_content_to_text(final_output), request.export_formats)
+        return result
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"[main.py] ERROR: An unexpected error occurred: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("An unexpected error occurred: %s", e)
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@app.post("/query/stream")
+async def stream_travel_agent(request: QueryRequest):
+    """
+    Same as /query, but streams progress as server-sent events:
+    - `start`: conversation ID, sent immediately
+    - `token`: a chunk of LLM output text
+    - `tool_start` / `tool_end`: a tool call began / finished
+    - `final`: the complete answer (with a `server_timing` breakdown, since
+      headers are already sent when the run finishes)
+    - `error`: the run failed
+    """
+    conversation_id, conversation, react_app, input_data = _prepare_run(request)
+
+    async def event_stream():
+        yield format_sse("start", {"conversation_id": conversation_id})
+        final_output = ""
+        try:
+            with track_request() as spans:
+                async for event in react_app.astream_events(
+                    input_data, config=_run_config(conversation_id, spans), version="v2", durability="exit"
+                ):
+                    kind = event["event"]
+                    if kind == "on_chat_model_stream":
+                        # A hedged duplicate call may stream too; only the primary's tokens are shown.
+                        # Plan sections are written in parallel; they are sent once merged, in order.
+                        # Rolling summaries of older turns are internal
+                        if HIDDEN_LLM_TAGS & set(event.get("tags") or []):
+                            continue
+                        text = _content_to_text(event["data"]["chunk"].content)
+                        if text:
+                            yield format_sse("token", {"text": text})
+                    elif kind == "on_chat_model_end":
+                        # The last LLM turn without tool calls is the answer
+                        if HIDDEN_LLM_TAGS & set(event.get("tags") or []):
+                            continue
+                        output = event["data"].get("output")
+                        if output is not None and not getattr(output, "tool_calls", None):
+                            final_output = _content_to_text(output.content)
+                    elif kind == "on_chain_end" and event["name"] == "merge_plan":
+                        # "sections" planner mode: the merged plan is the answer
+                        output = event["data"].get("output")
+                        messages = output.get("messages") if isinstance(output, dict) else None
+                        if messages:
+                            final_output = _content_to_text(messages[-1].content)
+                            yield format_sse("token", {"text": final_output})
+                    elif kind == "on_chain_end" and event["name"] == "agent":
+                        # Cached answers skip the model, so no token/model events precede them
+                        output = event["data"].get("output")
+                        messages = output.get("messages") if isinstance(output, dict) else None
+                        message = messages[-1] if messages else None
+                        if message is not None and (message.response_metadata or {}).get("cache_hit"):
+                            final_output = _content_to_text(message.content)
+                            yield format_sse("token", {"text": final_output})
+                    elif kind == "on_tool_start":
+                        yield format_sse("tool_start", {
+                            "run_id": event["run_id"],
+                            "name": event["name"],
+                            "input": event["data"].get("input"),
+                        })
+                    elif kind == "on_tool_end":
+                        output = event["data"].get("output")
+                        yield format_sse("tool_end", {
+                            "run_id": event["run_id"],
+                            "name": event["name"],
+                            "output": _content_to_text(getattr(output, "content", output))[:500],
+                        })
+
+                await _record_turn(conversation_id, conversation, react_app)
+            final = {"answer": final_output, "conversation_id": conversation_id}
+            if request.export_formats:
+                final["exports"] = _queue_exports(final_output, request.export_formats)
+            if SERVER_TIMING:
+                final["server_timing"] = spans.server_timing()
+            yield format_sse("final", final)
+
+        except Exception as e:
+            logger.exception("Streaming run failed: %s", e)
+            yield format_sse("error", {"error": str(e), "conversation_id": conversation_id})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/exports", status_code=202)
+async def create_export(request: ExportRequest):
+    """
+    Queue an export and return its status at once (202). Poll `status_url`
+    until it is "done", then fetch `download_url`. Identical plans in the
+    same format share one export.
+    """
+    if exporter is None:
+        raise HTTPException(status_code=404, detail="Document export is disabled.")
+
+    text = request.text
+    if text is None:
+        conversation = conversations.get(request.conversation_id) if request.conversation_id else None
+        if conversation is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired conversation_id.")
+        react_app = graph_registry.get_graph(conversation["model_provider"])
+        state = await react_app.aget_state(thread_config(request.conversation_id))
+        # The latest answer is the last AI message that is not a tool call
+        answers = [message for message in state.values.get("messages", [])
+                   if message.type == "ai" and not getattr(message, "tool_calls", None)]
+        text = _content_to_text(answers[-1].content) if answers else ""
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Nothing to export yet.")
+
+    try:
+        job = exporter.submit(text, request.format)
+    except ExportQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return _export_view(job)
+
+
+@app.get("/exports/stats")
+async def export_stats():
+    """Report export queue depth and written / deduplicated / failed counters."""
+    return exporter.stats() if exporter is not None else None
+
+
+# Plain `def`: the status fallback and downloads touch the disk, so these run in the threadpool
+@app.get("/exports/{export_id}")
+def export_status(export_id: str):
+    """Status of an export (queued, running, done or failed)."""
+    job = exporter.get(export_id) if exporter is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown export.")
+    return _export_view(job)
+
+
+@app.get("/exports/{export_id}/download")
+def download_export(export_id: str):
+    """The exported file, once its export is done (409 before that)."""
+    job = exporter.get(export_id) if exporter is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown export.")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Export is {job.status}.")
+    return FileResponse(exporter.path(job), media_type=FORMATS[job.format].media_type, filename=job.filename)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,89 @@
+"""
+/query/stream must not send rolling-summary LLM output to the client: the
+summary call runs inside the agent node, so its tokens show up in the
+run's event stream next to the answer's.
+"""
+import json
+import os
+from typing import Any, AsyncIterator, List, Optional
+from unittest.mock import patch
+
+for key in ("GOOGLE_API_KEY", "TAVILY_API_KEY", "OPENWEATHERMAP_API_KEY", "EXCHANGE_RATE_API_KEY"):
+    os.environ.setdefault(key, "test-dummy-key")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult  # noqa: E402
+
+import main  # noqa: E402
+from agent.graph_registry import GraphRegistry  # noqa: E402
+from utils.service_registry import services  # noqa: E402
+
+SUMMARY = "SUMMARY TEXT LEAK"
+ANSWER = "Here is your updated plan."
+
+
+class StreamingFakeModel(BaseChatModel):
+    """Streams a fixed summary for summarization prompts and a fixed answer otherwise."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "StreamingFakeModel":
+        return self
+
+    @staticmethod
+    def _reply(messages: List[BaseMessage]) -> str:
+        prompt = " ".join(str(message.content) for message in messages)
+        return SUMMARY if "running summary" in prompt else ANSWER
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        for word in self._reply(messages).split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def _sse_events(body: str) -> List[tuple]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_summary_tokens_are_not_streamed():
+    services.clear()
+    registry = GraphRegistry()
+    with patch("utils.model_loader.ModelLoader.load_llm", return_value=StreamingFakeModel()):
+        registry.get_graph("google")
+    # A small budget so the history below is summarized
+    registry._builders["google"].context_manager.max_tokens = 200
+
+    history = []
+    for i in range(6):
+        history += [
+            {"role": "user", "content": f"Question {i} about my trip " + "detail " * 60},
+            {"role": "assistant", "content": f"Answer {i} " + "suggestion " * 60},
+        ]
+    history.append({"role": "user", "content": "And the budget?"})
+
+    with patch.object(main, "graph_registry", registry), patch.object(main, "MODEL_PROVIDER", "google"):
+        response = TestClient(main.app).post("/query/stream", json={"messages": history})
+    services.clear()
+
+    events = _sse_events(response.text)
+    streamed = "".join(data["text"] for event, data in events if event == "token")
+    final = [data for event, data in events if event == "final"]
+
+    assert "SUMMARY" not in streamed
+    assert streamed.strip() == ANSWER
+    assert final and final[0]["answer"].strip() == ANSWER
@@ -1,9 +1,8 @@
 import os
-from dotenv import load_dotenv
+from utils.config_loader import load_environment
 from langchain.tools import tool
-from langchain_community.utilities.alpha_vantage import AlphaVantageAPIWrapper
 
-load_dotenv()
+load_environment()
 
 
 @tool
@@ -57,6 +56,9 @@ def currency_converter(from_curr: str, to_curr: str, value: float) -> float:
     # Set environment variable so AlphaVantageAPIWrapper can pick it up
     os.environ["ALPHAVANTAGE_API_KEY"] = api_key
 
+    # Imported on use: langchain_community is heavy and the agent graph never calls this tool
+    from langchain_community.utilities.alpha_vantage import AlphaVantageAPIWrapper
+
     alpha_vantage = AlphaVantageAPIWrapper()
     response = alpha_vantage._get_exchange_rate(from_curr, to_curr)
 
@@ -1,8 +1,16 @@
 import os
 from utils.currency_converter import CurrencyConverter
-from typing import List
-from langchain.tools import tool
-from dotenv import load_dotenv
+from typing import List, Optional
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+from utils.config_loader import load_environment
+
+
+class ConversionItem(BaseModel):
+    """One line item to convert in a batch."""
+    amount: float = Field(description="The amount of money to convert.")
+    from_currency: str = Field(description='The currency code to convert from (e.g., "USD").')
+    to_currency: str = Field(description='The currency code to convert to (e.g., "VND").')
 
 
 class CurrencyConverterTool:
@@ -11,23 +19,25 @@ class CurrencyConverterTool:
     from one currency to another using an external currency service.
     
     Attributes:
-        api_key (str): The API key for the currency conversion service, 
-                       loaded from environment variables.
-        currency_service (CurrencyConverter): Instance of the converter service.
+        currency_service (CurrencyConverter): Instance of the converter service
+                                              (shared when passed in by the service registry).
         currency_converter_tool_list (list): A list of registered currency converter tools.
     """
 
-    def __init__(self):
+    def __init__(self, currency_service: Optional[CurrencyConverter] = None):
         """
         Initialize the CurrencyConverterTool.
-        - Load environment variables
-        - Fetch API key for currency conversion
-        - Initialize currency service
+        - Use the given currency service, or create one with the API key
+          from environment variables
         - Register tool functions
+
+        Args:
+            currency_service (CurrencyConverter): Shared service to reuse (optional).
         """
-        load_dotenv()
-        self.api_key = os.environ.get("EXCHANGE_RATE_API_KEY")  # API key from .env
-        self.currency_service = CurrencyConverter(self.api_key)  # Service instance
+        if currency_service is None:
+            load_environment()
+            currency_service = CurrencyConverter(os.environ.get("EXCHANGE_RATE_API_KEY"))  # API key from .env
+        self.currency_service = currency_service  # Service instance
         self.currency_converter_tool_list = self._setup_tools()  # Register tool
 
     def _setup_tools(self) -> List:
@@ -35,10 +45,10 @@ class CurrencyConverterTool:
         Setup all tools for the currency converter tool.
 
         Returns:
-            list: List of tool functions (in this case, only one: convert_currency).
+            list: List of tool functions (convert_currency and convert_currencies),
+                  each with both a sync and an async implementation.
         """
 
-        @tool
         def convert_currency(amount: float, from_currency: str, to_currency: str):
             """
             Convert an amount from one currency to another.
@@ -53,4 +63,39 @@ class CurrencyConverterTool:
             """
             return self.currency_service.convert(amount, from_currency, to_currency)
 
-        return [convert_currency]
+        async def aconvert_currency(amount: float, from_currency: str, to_currency: str):
+            return await self.currency_service.aconvert(amount, from_currency, to_currency)
+
+        def summarize_batch(results: List[dict]) -> dict:
+            totals = {}
+            for result in results:
+                if "converted" in result:
+                    totals[result["to_currency"]] = round(totals.get(result["to_currency"], 0) + result["converted"], 2)
+            return {"conversions": results, "totals": totals}
+
+        def convert_currencies(items: List[ConversionItem]) -> dict:
+            """
+            Convert many amounts at once, e.g. every line of a cost breakdown.
+            Prefer this over calling convert_currency once per item.
+
+            Args:
+                items (List[ConversionItem]): Amounts with their source and target currency codes.
+
+            Returns:
+                dict: Per-item conversions (or an error per unknown currency) and totals per target currency.
+            """
+            results = self.currency_service.convert_many(
+                (item.amount, item.from_currency, item.to_currency) for item in items
+            )
+            return summarize_batch(results)
+
+        async def aconvert_currencies(items: List[ConversionItem]) -> dict:
+            results = await self.currency_service.aconvert_many(
+                (item.amount, item.from_currency, item.to_currency) for item in items
+            )
+            return summarize_batch(results)
+
+        return [
+            StructuredTool.from_function(func=convert_currency, coroutine=aconvert_currency),
+            StructuredTool.from_function(func=convert_currencies, coroutine=aconvert_currencies),
+        ]
@@ -1,18 +1,41 @@
 from utils.expense_calculator import Calculator
-from typing import List
+from utils.budget_engine import BudgetEngine
+from utils.currency_converter import CurrencyConverter
+from typing import List, Optional
 from langchain.tools import tool
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+
+
+class BudgetItem(BaseModel):
+    """One line of an itemized trip plan."""
+    name: str = Field(description='Label, e.g. "Hotel in Hue" or "Dinner cruise".')
+    category: str = Field(description='Grouping such as "accommodation", "food", "transport", "activities", "other".')
+    unit_cost: float = Field(description="Cost of one unit.")
+    quantity: float = Field(default=1, description="Units, e.g. rooms, tickets or meals.")
+    nights: float = Field(default=1, description="Nights or days the unit cost repeats for.")
+    travelers: float = Field(default=1, description="People the unit cost applies to.")
+    currency: Optional[str] = Field(default=None, description="Currency of unit_cost; defaults to the target currency.")
+    day: Optional[int] = Field(default=None, description="1-based trip day of the cost; spread over all days if omitted.")
 
 
 class CalculatorTool:
     """
     CalculatorTool provides LangChain-compatible tools for handling common
     travel and expense-related calculations (hotel cost, total trip expense,
-    and daily budget).
+    daily budget, and a full itemized trip budget).
     """
 
-    def __init__(self):
-        """Initialize the CalculatorTool with an instance of Calculator."""
+    def __init__(self, currency_service: Optional[CurrencyConverter] = None):
+        """
+        Initialize the CalculatorTool with an instance of Calculator.
+
+        Args:
+            currency_service (CurrencyConverter): Lets the budget tool accept items
+                priced in several currencies.
+        """
         self.calculator = Calculator()
+        self.budget_engine = BudgetEngine(currency_service)
         self.calculator_tool_list = self._setup_tools()
 
     def _setup_tools(self) -> List:
@@ -66,7 +89,32 @@ class CalculatorTool:
             """
             return self.calculator.calculate_daily_budget(total_cost, days)
 
+        def calculate_trip_budget(items: List[BudgetItem], days: int, travelers: int = 1,
+                                  target_currency: str = "VND") -> dict:
+            """
+            Calculate a complete itemized trip budget in one call: totals per item,
+            per category, per day and per traveler, converted to one currency.
+            Prefer this over chaining the other calculator tools for a cost breakdown.
+
+            Args:
+                items (List[BudgetItem]): Every cost of the plan.
+                days (int): Trip length in days.
+                travelers (int): Number of people on the trip.
+                target_currency (str): Currency to report totals in (e.g., "VND").
+
+            Returns:
+                dict: total, per_traveler, daily_average, by_category, by_day and items.
+            """
+            return self.budget_engine.calculate([item.model_dump() for item in items], days, travelers, target_currency)
+
+        async def acalculate_trip_budget(items: List[BudgetItem], days: int, travelers: int = 1,
+                                         target_currency: str = "VND") -> dict:
+            return await self.budget_engine.acalculate(
+                [item.model_dump() for item in items], days, travelers, target_currency
+            )
+
         return [
+            StructuredTool.from_function(func=calculate_trip_budget, coroutine=acalculate_trip_budget),
             estimate_total_hotel_cost,
             calculate_total_expense,
             calculate_daily_expense_budget
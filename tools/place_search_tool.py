@@ -1,50 +1,173 @@
+import asyncio
+
+from utils.destination_index import DestinationIndex
 from utils.place_search import TavilyPlaceSearchTool
-from typing import List
-from langchain.tools import tool
-from dotenv import load_dotenv
+from utils.tool_output import render_search_result
+from typing import Dict, List, Literal, Optional
+from langchain_core.tools import StructuredTool
+from utils.config_loader import load_environment
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PlaceCategory = Literal["attractions", "restaurants", "activities", "transportation"]
+
+# Headings used when merging a destination profile into one tool message
+PROFILE_HEADINGS = {
+    "attractions": "Attractions",
+    "restaurants": "Restaurants",
+    "activities": "Activities",
+    "transportation": "Transportation",
+}
 
 
 class PlaceSearchTool:
-    def __init__(self):
-        # Load environment variables from .env file
-        load_dotenv()
+    def __init__(self, tavily_search: Optional[TavilyPlaceSearchTool] = None,
+                 destination_index: Optional[DestinationIndex] = None):
+        # Reuse the shared Tavily client when given; otherwise build one from .env
+        if tavily_search is None:
+            load_environment()
+            tavily_search = TavilyPlaceSearchTool()
+        self.tavily_search = tavily_search
+
+        # Fresh answers for popular destinations are served from the local index;
+        # anything else (unknown place, missing or outdated entry) goes to Tavily
+        self.destination_index = destination_index
 
-        # Initialize Google and Tavily search helpers
-        self.tavily_search = TavilyPlaceSearchTool()
+        # Live search per category: (sync, async)
+        self.live_search = {
+            "attractions": (tavily_search.tavily_search_attractions, tavily_search.atavily_search_attractions),
+            "restaurants": (tavily_search.tavily_search_restaurants, tavily_search.atavily_search_restaurants),
+            "activities": (tavily_search.tavily_search_activity, tavily_search.atavily_search_activity),
+            "transportation": (tavily_search.tavily_search_transportation,
+                               tavily_search.atavily_search_transportation),
+        }
 
         # Setup LangChain-compatible tools
         self.place_search_tool_list = self._setup_tools()
 
+    def _indexed(self, place: str, categories: List[str]) -> Dict[str, object]:
+        if self.destination_index is None:
+            return {}
+        try:
+            return {category: entry.content
+                    for category, entry in self.destination_index.lookup_many(place, categories).items()}
+        except Exception as e:
+            # A broken index must not take search down with it
+            logger.error("Destination index lookup failed for '%s': %s", place, e)
+            return {}
+
+    async def _aindexed(self, place: str, categories: List[str]) -> Dict[str, object]:
+        """Async variant of `_indexed`; the SQLite lookup runs in a worker thread, off the event loop."""
+        if self.destination_index is None:
+            return {}
+        return await asyncio.to_thread(self._indexed, place, categories)
+
+    def search(self, category: str, place: str):
+        """Answer one category for a place from the index, else from Tavily."""
+        indexed = self._indexed(place, [category])
+        if category in indexed:
+            return indexed[category]
+        return self.live_search[category][0](place)
+
+    async def asearch(self, category: str, place: str):
+        """Async variant of `search`."""
+        indexed = await self._aindexed(place, [category])
+        if category in indexed:
+            return indexed[category]
+        return await self.live_search[category][1](place)
+
+    def search_profile(self, place: str, categories: Optional[List[str]] = None) -> Dict[str, object]:
+        """Destination profile; categories not in the index are searched live, concurrently."""
+        categories = self.tavily_search.resolve_categories(categories)
+        profile = self._indexed(place, categories)
+        missing = [category for category in categories if category not in profile]
+        if missing:
+            profile.update(self.tavily_search.search_destination_profile(place, missing))
+        return {category: profile[category] for category in categories}
+
+    async def asearch_profile(self, place: str, categories: Optional[List[str]] = None) -> Dict[str, object]:
+        """Async variant of `search_profile`."""
+        categories = self.tavily_search.resolve_categories(categories)
+        profile = await self._aindexed(place, categories)
+        missing = [category for category in categories if category not in profile]
+        if missing:
+            profile.update(await self.tavily_search.asearch_destination_profile(place, missing))
+        return {category: profile[category] for category in categories}
+
     def _setup_tools(self) -> List:
-        """Setup all tools for the place search tool"""
+        """
+        Setup all tools for the place search tool.
+        Each tool has a sync implementation (for `invoke`/`stream`) and an
+        async one (for `ainvoke`/`astream`) so the event loop never blocks.
+        """
 
-        @tool
         def search_attractions(place: str) -> str:
             """Search attractions of a place"""
-            print(f"\n--- [place_search_tool.py] LOG: Tool 'search_attractions' called with place='{place}' ---\n")
-            tavily_result = self.tavily_search.tavily_search_attractions(place)
+            logger.info("Tool 'search_attractions' called with place='%s'", place)
+            tavily_result = render_search_result(self.search("attractions", place))
+            return f"Following are the attractions of {place}: {tavily_result}"
+
+        async def asearch_attractions(place: str) -> str:
+            tavily_result = render_search_result(await self.asearch("attractions", place))
             return f"Following are the attractions of {place}: {tavily_result}"
 
-        @tool
         def search_restaurants(place: str) -> str:
             """Search restaurants of a place"""
-            print(f"\n--- [place_search_tool.py] LOG: Tool 'search_restaurants' called with place='{place}' ---\n")
-            tavily_result = self.tavily_search.tavily_search_restaurants(place)
+            logger.info("Tool 'search_restaurants' called with place='%s'", place)
+            tavily_result = render_search_result(self.search("restaurants", place))
+            return f"Following are the restaurants of {place}: {tavily_result}"
+
+        async def asearch_restaurants(place: str) -> str:
+            tavily_result = render_search_result(await self.asearch("restaurants", place))
             return f"Following are the restaurants of {place}: {tavily_result}"
 
-        @tool
         def search_activities(place: str) -> str:
             """Search activities of a place"""
-            print(f"\n--- [place_search_tool.py] LOG: Tool 'search_activities' called with place='{place}' ---\n")
-            tavily_result = self.tavily_search.tavily_search_activity(place)
+            logger.info("Tool 'search_activities' called with place='%s'", place)
+            tavily_result = render_search_result(self.search("activities", place))
+            return f"Following are the activities of {place}: {tavily_result}"
+
+        async def asearch_activities(place: str) -> str:
+            tavily_result = render_search_result(await self.asearch("activities", place))
             return f"Following are the activities of {place}: {tavily_result}"
 
-        @tool
         def search_transportation(place: str) -> str:
             """Search transportation of a place"""
-            print(f"\n--- [place_search_tool.py] LOG: Tool 'search_transportation' called with place='{place}' ---\n")
-            tavily_result = self.tavily_search.tavily_search_transportation(place)
+            logger.info("Tool 'search_transportation' called with place='%s'", place)
+            tavily_result = render_search_result(self.search("transportation", place))
             return f"Following are the modes of transportation available in {place}: {tavily_result}"
 
+        async def asearch_transportation(place: str) -> str:
+            tavily_result = render_search_result(await self.asearch("transportation", place))
+            return f"Following are the modes of transportation available in {place}: {tavily_result}"
+
+        def format_profile(place: str, profile: dict) -> str:
+            sections = [f"## {PROFILE_HEADINGS[category]}\n{render_search_result(result)}"
+                        for category, result in profile.items()]
+            return f"Destination profile of {place}:\n\n" + "\n\n".join(sections)
+
+        def get_destination_profile(place: str, categories: Optional[List[PlaceCategory]] = None) -> str:
+            """
+            Research a destination in one call: runs the attraction, restaurant, activity
+            and transportation searches concurrently and returns one merged result.
+            Prefer this over calling the individual search tools one by one.
+
+            Args:
+                place (str): Destination name.
+                categories (List[str]): Categories to include; all four when omitted.
+            """
+            logger.info("Tool 'get_destination_profile' called with place='%s', categories=%s", place, categories)
+            return format_profile(place, self.search_profile(place, categories))
+
+        async def aget_destination_profile(place: str, categories: Optional[List[PlaceCategory]] = None) -> str:
+            return format_profile(place, await self.asearch_profile(place, categories))
+
         # Return list of all defined tools
-        return [search_attractions, search_restaurants, search_activities, search_transportation]
+        return [
+            StructuredTool.from_function(func=get_destination_profile, coroutine=aget_destination_profile),
+            StructuredTool.from_function(func=search_attractions, coroutine=asearch_attractions),
+            StructuredTool.from_function(func=search_restaurants, coroutine=asearch_restaurants),
+            StructuredTool.from_function(func=search_activities, coroutine=asearch_activities),
+            StructuredTool.from_function(func=search_transportation, coroutine=asearch_transportation),
+        ]
@@ -1,6 +1,7 @@
 import os
-from langchain.tools import tool
-from dotenv import load_dotenv
+from typing import Optional
+from langchain_core.tools import StructuredTool
+from utils.config_loader import load_environment
 from utils.weather_info import WeatherForecastTool
 
 
@@ -9,8 +10,9 @@ class WeatherInfoTool:
     WeatherInfoTool provides methods to fetch real-time weather data and weather forecasts for a given city.
     
     Attributes:
-        api_key (str): The API key for accessing the weather service, loaded from environment variables.
-        weather_service (WeatherForecastTool): An instance of the weather service client.
+        api_key (str): The API key for accessing the weather service.
+        weather_service (WeatherForecastTool): The weather service client (shared when
+                                               passed in by the service registry).
         weather_tool_list (list): A list of weather-related tools (functions) set up for use.
     
     Methods:
@@ -20,22 +22,28 @@ class WeatherInfoTool:
                 - get_weather_forecast(city: str) -> str: Fetches and returns the weather forecast.
     """
 
-    def __init__(self):
+    def __init__(self, weather_service: Optional[WeatherForecastTool] = None):
         """
         Initialize the WeatherInfoTool.
-        - Load API key from environment variables.
-        - Initialize the weather service client.
+        - Use the given weather service client, or create one with the API key
+          from environment variables.
         - Register weather tools (current weather and forecast).
+
+        Args:
+            weather_service (WeatherForecastTool): Shared client to reuse (optional).
         """
-        load_dotenv()
-        self.api_key = os.environ.get("OPENWEATHERMAP_API_KEY")
-        self.weather_service = WeatherForecastTool(self.api_key)
+        if weather_service is None:
+            load_environment()
+            weather_service = WeatherForecastTool(os.environ.get("OPENWEATHERMAP_API_KEY"))
+        self.weather_service = weather_service
+        self.api_key = weather_service.api_key
 
         self.weather_tool_list = self._setup_tool()
 
     def _setup_tool(self) -> list:
         """
         Initializes and returns a list of weather-related tool functions.
+        Each tool has a sync implementation and an async one used by `astream`.
         Defines and registers:
             1. get_current_weather(city: str) -> str
             2. get_weather_forecast(city: str) -> str
@@ -43,7 +51,37 @@ class WeatherInfoTool:
             list: A list of tool functions.
         """
 
-        @tool
+        def format_current_weather(city: str, weather_data: dict) -> str:
+            if weather_data:
+                temp = weather_data.get('main', {}).get('temp', 'N/A')
+                desc = weather_data.get('weather', [{}])[0].get('description', 'N/A')
+                return f"Current weather in {city}: {temp}°C, {desc}"
+
+            return f"Could not fetch weather for {city}"
+
+        def format_forecast(city: str, forecast_data: dict) -> str:
+            # Check if forecast data is valid
+            if forecast_data and 'list' in forecast_data:
+                # Forecast list is in 3-hour steps; summarize it per day
+                # (temperature range and distinct conditions) to keep the tool message short
+                days = {}
+                for item in forecast_data['list']:
+                    date = item['dt_txt'].split(' ')[0]
+                    temps, descriptions = days.setdefault(date, ([], []))
+                    temps.append(item['main']['temp'])
+                    desc = item['weather'][0]['description']
+                    if desc not in descriptions:
+                        descriptions.append(desc)
+
+                forecast_summary = [
+                    f"{date}: {min(temps)}–{max(temps)}°C, {', '.join(descriptions)}"
+                    if min(temps) != max(temps) else f"{date}: {temps[0]}°C, {', '.join(descriptions)}"
+                    for date, (temps, descriptions) in days.items()
+                ]
+                return f"Weather forecast for {city}:\n" + "\n".join(forecast_summary)
+
+            return f"Could not fetch forecast for {city}"
+
         def get_current_weather(city: str) -> str:
             """
             Fetches real-time weather data for a given city.
@@ -53,16 +91,11 @@ class WeatherInfoTool:
                 str: Current temperature and description, or error message.
             """
             # Fetch weather from service
-            weather_data = self.weather_service.get_current_weather(city)
+            return format_current_weather(city, self.weather_service.get_current_weather(city))
 
-            if weather_data:
-                temp = weather_data.get('main', {}).get('temp', 'N/A')
-                desc = weather_data.get('weather', [{}])[0].get('description', 'N/A')
-                return f"Current weather in {city}: {temp}°C, {desc}"
+        async def aget_current_weather(city: str) -> str:
+            return format_current_weather(city, await self.weather_service.aget_current_weather(city))
 
-            return f"Could not fetch weather for {city}"
-
-        @tool
         def get_weather_forecast(city: str) -> str:
             """
             Retrieves the weather forecast for a city.
@@ -71,25 +104,13 @@ class WeatherInfoTool:
             Returns:
                 str: Forecast summary or error message.
             """
-            forecast_data = self.weather_service.get_forecast_weather(city)
-
-            # Check if forecast data is valid
-            if forecast_data and 'list' in forecast_data:
-                forecast_summary = []
-
-                # Loop through forecast list (3-hour intervals usually)
-                for i in range(len(forecast_data['list'])):
-                    item = forecast_data['list'][i]
-                    date = item['dt_txt'].split(' ')[0]
-                    temp = item['main']['temp']
-                    desc = item['weather'][0]['description']
+            return format_forecast(city, self.weather_service.get_forecast_weather(city))
 
-                    # Append formatted forecast string
-                    forecast_summary.append(f"{date}: {temp}°C, {desc}")
-
-                return f"Weather forecast for {city}:\n" + "\n".join(forecast_summary)
-
-            return f"Could not fetch forecast for {city}"
+        async def aget_weather_forecast(city: str) -> str:
+            return format_forecast(city, await self.weather_service.aget_forecast_weather(city))
 
         # Return both tools as a list
-        return [get_current_weather, get_weather_forecast]
+        return [
+            StructuredTool.from_function(func=get_current_weather, coroutine=aget_current_weather),
+            StructuredTool.from_function(func=get_weather_forecast, coroutine=aget_weather_forecast),
+        ]
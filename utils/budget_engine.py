@@ -0,0 +1,125 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.currency_converter import CurrencyConverter
+from utils.expense_calculator import Calculator
+
+
+class BudgetEngine:
+    """
+    Computes a full itemized trip budget in one NumPy pass.
+
+    Each item is a dict with:
+        - name (str): Label, e.g. "Hotel Saigon Morin".
+        - category (str): Grouping, e.g. "accommodation", "food", "transport".
+        - unit_cost (float): Cost of one unit in `currency`.
+        - quantity (float): Units (rooms, tickets, meals). Default 1.
+        - nights (float): Nights/days the unit cost repeats for. Default 1.
+        - travelers (float): People the unit cost applies to. Default 1.
+        - currency (str): Currency of `unit_cost`. Defaults to the target currency.
+        - day (int): 1-based trip day the cost falls on; spread evenly over all days if omitted.
+    """
+
+    def __init__(self, currency_service: Optional[CurrencyConverter] = None):
+        """
+        Initialize the BudgetEngine.
+
+        Args:
+            currency_service (CurrencyConverter): Used when items are priced in
+                other currencies than the target; optional otherwise.
+        """
+        self.calculator = Calculator()
+        self.currency_service = currency_service
+
+    @staticmethod
+    def _currencies(items: List[dict], target_currency: str) -> List[str]:
+        return [(item.get("currency") or target_currency).upper() for item in items]
+
+    def _require_converter(self, currencies: Iterable[str], target_currency: str) -> bool:
+        needs_rates = any(code != target_currency for code in currencies)
+        if needs_rates and self.currency_service is None:
+            raise ValueError("Items use several currencies but no currency service is configured.")
+        return needs_rates
+
+    def get_rates(self, items: List[dict], target_currency: str) -> Dict[str, float]:
+        """Rate to the target currency for every currency used by the items."""
+        target_currency = target_currency.upper()
+        currencies = set(self._currencies(items, target_currency))
+        if not self._require_converter(currencies, target_currency):
+            return {target_currency: 1.0}
+        return {code: self.currency_service.get_rate(code, target_currency) for code in currencies}
+
+    async def aget_rates(self, items: List[dict], target_currency: str) -> Dict[str, float]:
+        """Async variant of `get_rates`."""
+        target_currency = target_currency.upper()
+        currencies = set(self._currencies(items, target_currency))
+        if not self._require_converter(currencies, target_currency):
+            return {target_currency: 1.0}
+        return {code: await self.currency_service.aget_rate(code, target_currency) for code in currencies}
+
+    def compute(self, items: List[dict], days: int, travelers: int,
+                target_currency: str, rates: Dict[str, float]) -> dict:
+        """
+        Compute totals per item, category, day and traveler.
+
+        Args:
+            items (List[dict]): Itemized plan (see class docstring).
+            days (int): Trip length in days.
+            travelers (int): Number of people sharing the trip.
+            target_currency (str): Currency all totals are reported in.
+            rates (Dict[str, float]): Rate to `target_currency` per item currency.
+
+        Returns:
+            dict: Grand total, per-category, per-day and per-traveler totals, and line items.
+        """
+        target_currency = target_currency.upper()
+        if days <= 0:
+            raise ValueError("days must be a positive integer.")
+        if not items:
+            return {"currency": target_currency, "total": 0.0, "per_traveler": 0.0, "daily_average": 0.0,
+                    "by_category": {}, "by_day": [0.0] * days, "items": []}
+
+        currencies = self._currencies(items, target_currency)
+        unit_costs = np.array([float(item["unit_cost"]) for item in items])
+        quantities = np.array([float(item.get("quantity", 1)) for item in items])
+        nights = np.array([float(item.get("nights", 1)) for item in items])
+        item_travelers = np.array([float(item.get("travelers", 1)) for item in items])
+        item_rates = np.array([rates[code] for code in currencies])
+
+        line_totals = self.calculator.calculate_line_totals(unit_costs, quantities, nights, item_travelers) * item_rates
+
+        # Per category: integer-encode the labels and sum with one bincount
+        categories, category_index = np.unique([item.get("category", "other") for item in items], return_inverse=True)
+        by_category = np.bincount(category_index, weights=line_totals, minlength=len(categories))
+
+        # Per day: dated items land on their day, undated ones are spread evenly
+        item_days = np.array([int(item.get("day") or 0) for item in items])
+        if np.any(item_days > days) or np.any(item_days < 0):
+            raise ValueError(f"Item day must be between 1 and {days}.")
+        dated = item_days > 0
+        by_day = np.full(days, line_totals[~dated].sum() / days)
+        np.add.at(by_day, item_days[dated] - 1, line_totals[dated])
+
+        total = float(line_totals.sum())
+        return {
+            "currency": target_currency,
+            "total": round(total, 2),
+            "per_traveler": round(total / travelers, 2) if travelers > 0 else total,
+            "daily_average": round(self.calculator.calculate_daily_budget(total, days), 2),
+            "by_category": {str(name): round(float(value), 2) for name, value in zip(categories, by_category)},
+            "by_day": [round(float(value), 2) for value in by_day],
+            "items": [
+                {"name": item.get("name", f"item {i + 1}"), "category": item.get("category", "other"),
+                 "total": round(float(value), 2)}
+                for i, (item, value) in enumerate(zip(items, line_totals))
+            ],
+        }
+
+    def calculate(self, items: List[dict], days: int, travelers: int, target_currency: str) -> dict:
+        """Fetch the needed rates (at most one table download) and compute the budget."""
+        return self.compute(items, days, travelers, target_currency, self.get_rates(items, target_currency))
+
+    async def acalculate(self, items: List[dict], days: int, travelers: int, target_currency: str) -> dict:
+        """Async variant of `calculate`."""
+        return self.compute(items, days, travelers, target_currency, await self.aget_rates(items, target_currency))
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def normalize_key(text: str) -> str:
+    """
+    Normalize free text (place or city names) into a stable cache key.
+
+    Strips Vietnamese diacritics, case-folds and collapses whitespace and
+    punctuation, so "Đà Lạt", "da lat" and "Da  Lat." share one key.
+
+    Args:
+        text (str): Raw text.
+
+    Returns:
+        str: Normalized key.
+    """
+    text = text.replace("Đ", "D").replace("đ", "d")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w]+", " ", text.casefold())
+    return " ".join(text.split())
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache with per-entry expiry and hit/miss counters.
+    """
+
+    def __init__(self, max_entries: int = 512, default_ttl: float = 3600):
+        """
+        Initialize the TTLCache.
+
+        Args:
+            max_entries (int): Maximum number of entries before LRU eviction.
+            default_ttl (float): Lifetime in seconds for entries set without a TTL.
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a live cached value (refreshing its recency), or `default`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        """Return a live cached value without counting a hit/miss or refreshing recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            return default
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key (str): Cache key.
+            value (Any): Value to store.
+            ttl (float): Lifetime in seconds (defaults to `default_ttl`).
+            expires_at (float): Absolute expiry (epoch seconds); overrides `ttl`.
+        """
+        if expires_at is None:
+            expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report entry count and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteCache:
+    """
+    Persistent cache tier backed by a single SQLite file.
+    Values are stored as JSON, so only JSON-serializable values are cached.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the SQLiteCache.
+
+        Args:
+            path (str): Path of the SQLite database file (created if missing).
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return `(value, expires_at)` for a live entry, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return  # Not persistable; the memory tier still holds it
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", (key, payload, expires_at)
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class TieredCache:
+    """
+    In-memory TTLCache in front of an optional SQLiteCache.
+
+    Writes go to both tiers; memory misses fall through to disk and are
+    promoted back into memory with their original expiry. The async
+    variants serve memory hits inline and run disk I/O in a worker thread.
+    """
+
+    def __init__(self, memory: TTLCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    @classmethod
+    def from_config(cls, settings: Optional[dict]) -> "TieredCache":
+        """
+        Build a cache from a config section with `max_entries`, `default_ttl_seconds`
+        and an optional `disk_path`.
+        """
+        settings = settings or {}
+        memory = TTLCache(
+            max_entries=settings.get("max_entries", 512),
+            default_ttl=settings.get("default_ttl_seconds", 3600),
+        )
+        disk_path = settings.get("disk_path")
+        return cls(memory, SQLiteCache(disk_path) if disk_path else None)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key, default=_MISSING)
+        if value is not _MISSING:
+            return value
+        return self._get_from_disk(key, default)
+
+    def _get_from_disk(self, key: str, default: Any) -> Any:
+        """Disk lookup after a memory miss; a hit is promoted into memory."""
+        if self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                self.memory.set(key, value, expires_at=expires_at)
+                return value
+        return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.memory.default_ttl if ttl is None else ttl)
+        self.memory.set(key, value, expires_at=expires_at)
+        if self.disk is not None:
+            self.disk.set(key, value, expires_at)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """Async variant of `get`; only a memory miss goes to a thread for the disk tier."""
+        value = self.memory.get(key, default=_MISSING)
+        if value is not _MISSING or self.disk is None:
+            return default if value is _MISSING else value
+        return await asyncio.to_thread(self._get_from_disk, key, default)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Async variant of `set`; the disk write runs in a worker thread."""
+        if self.disk is None:
+            self.set(key, value, ttl=ttl)
+            return
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"memory": self.memory.stats()}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+# Sentinel distinguishing "not cached" from a cached falsy value
+_MISSING = object()
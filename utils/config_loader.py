@@ -1,20 +1,67 @@
 import yaml
 import os
+import threading
+
+from dotenv import load_dotenv
+
+# Parsed config per absolute path; the file is read once per process (see `reload_config`)
+_configs = {}
+_config_lock = threading.Lock()
+_environment_loaded = False
 
 
 def load_config(config_path: str = "config/config.yaml") -> dict:
     """
     Load configuration settings from a YAML file.
 
+    The file is parsed once and the same dict is returned to every caller,
+    so treat it as read-only. Call `reload_config` to pick up edits.
+
     Args:
-        config_path (str): Path to the config.yaml file. 
+        config_path (str): Path to the config.yaml file.
                            Defaults to "config/config.yaml".
 
     Returns:
         dict: Parsed configuration as a Python dictionary.
     """
-    with open(config_path, "r") as file:
-        # Load YAML content into a Python dictionary
-        config = yaml.safe_load(file)
+    path = os.path.abspath(config_path)
+    config = _configs.get(path)
+    if config is not None:
+        return config
+
+    with _config_lock:
+        if path not in _configs:
+            with open(config_path, "r") as file:
+                # Load YAML content into a Python dictionary
+                _configs[path] = yaml.safe_load(file)
+        return _configs[path]
+
+
+def reload_config(config_path: str = "config/config.yaml") -> dict:
+    """
+    Re-read a config file, replacing the cached copy.
+
+    Args:
+        config_path (str): Path to the config.yaml file.
 
-    return config
+    Returns:
+        dict: The freshly parsed configuration.
+    """
+    with _config_lock:
+        _configs.pop(os.path.abspath(config_path), None)
+    return load_config(config_path)
+
+
+def load_environment(reload: bool = False) -> None:
+    """
+    Load environment variables from .env once per process.
+
+    Args:
+        reload (bool): Read .env again, overriding values loaded before.
+    """
+    global _environment_loaded
+    with _config_lock:
+        if _environment_loaded and not reload:
+            return
+        load_dotenv(override=reload)
+        _environment_loaded = True
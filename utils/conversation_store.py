@@ -0,0 +1,261 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class _Entry:
+    """A stored conversation value plus its bookkeeping."""
+    value: Any
+    nbytes: int
+    last_access: float
+
+
+def estimate_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """
+    Roughly estimate the memory footprint of an object in bytes.
+
+    Walks dicts, lists, tuples, sets and object `__dict__`s recursively and
+    sums `sys.getsizeof` of everything reachable, counting shared objects once.
+
+    Args:
+        obj (Any): Object to measure.
+
+    Returns:
+        int: Estimated size in bytes.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += estimate_size(vars(obj), _seen)
+    return size
+
+
+class ConversationStore:
+    """
+    Bounded, thread-safe in-process store for per-conversation state.
+
+    Entries are evicted least-recently-used first whenever the entry count or
+    the byte budget is exceeded, and expire after `ttl_seconds` without access.
+    Hit/miss/eviction/expiration counters are kept for monitoring.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600,
+        on_evict: Optional[Callable[[str, Any], None]] = None,
+    ):
+        """
+        Initialize the ConversationStore.
+
+        Args:
+            max_entries (int): Maximum number of conversations kept.
+            max_bytes (int): Approximate memory budget for all stored values.
+            ttl_seconds (float): Idle time after which a conversation expires (<= 0 disables).
+            on_evict (Callable): Optional callback `(key, value)` run when an entry is dropped
+                (evicted, expired or popped).
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_config(cls, settings: Optional[dict], **kwargs) -> "ConversationStore":
+        """
+        Build a store from the `conversation_store` section of config.yaml.
+
+        Args:
+            settings (dict): Section with `max_entries`, `max_bytes` and `ttl_seconds`.
+
+        Returns:
+            ConversationStore: Configured store.
+        """
+        settings = settings or {}
+        return cls(
+            max_entries=settings.get("max_entries", 1000),
+            max_bytes=settings.get("max_bytes", 64 * 1024 * 1024),
+            ttl_seconds=settings.get("ttl_seconds", 3600),
+            **kwargs,
+        )
+
+    def _is_expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.last_access > self.ttl_seconds
+
+    def _drop(self, key: str) -> _Entry:
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.nbytes
+        return entry
+
+    def _notify(self, dropped: list) -> None:
+        # Callbacks run outside the lock so they may touch other stores safely
+        if self.on_evict:
+            for key, value in dropped:
+                self.on_evict(key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Return a conversation's value and mark it as recently used.
+
+        Args:
+            key (str): Conversation ID.
+            default (Any): Value returned on a miss.
+
+        Returns:
+            Any: The stored value, or `default` if missing or expired.
+        """
+        dropped = []
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and self._is_expired(entry, now):
+                dropped.append((key, self._drop(key).value))
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                result = default
+            else:
+                self.hits += 1
+                entry.last_access = now
+                self._entries.move_to_end(key)
+                result = entry.value
+
+        self._notify(dropped)
+        return result
+
+    def __contains__(self, key: str) -> bool:
+        # Membership checks must not count as hits or refresh recency
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry, time.monotonic())
+
+    def put(self, key: str, value: Any, nbytes: Optional[int] = None) -> None:
+        """
+        Insert or replace a conversation's value, evicting others if over budget.
+
+        Args:
+            key (str): Conversation ID.
+            value (Any): Value to store.
+            nbytes (int): Size to account for; estimated from `value` if omitted.
+        """
+        if nbytes is None:
+            nbytes = estimate_size(value)
+
+        dropped = []
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(value=value, nbytes=nbytes, last_access=time.monotonic())
+            self._total_bytes += nbytes
+            dropped.extend(self._purge_expired_locked())
+            dropped.extend(self._evict_locked(protect=key))
+
+        self._notify(dropped)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """
+        Remove a conversation explicitly (not counted as an eviction). The
+        `on_evict` cleanup runs as for evicted entries, so resources tied to
+        the conversation (e.g. its checkpointer thread) are released too.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._drop(key).value
+        self._notify([(key, value)])
+        return value
+
+    def _purge_expired_locked(self) -> list:
+        now = time.monotonic()
+        dropped = []
+        # Oldest entries sit at the front, so stop at the first live one
+        for key in list(self._entries):
+            if not self._is_expired(self._entries[key], now):
+                break
+            dropped.append((key, self._drop(key).value))
+            self.expirations += 1
+        return dropped
+
+    def _evict_locked(self, protect: Optional[str] = None) -> list:
+        dropped = []
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == protect and len(self._entries) == 1:
+                # A single oversized conversation is kept rather than evicting itself
+                break
+            if oldest == protect:
+                self._entries.move_to_end(oldest)
+                continue
+            dropped.append((oldest, self._drop(oldest).value))
+            self.evictions += 1
+        return dropped
+
+    def purge_expired(self) -> int:
+        """
+        Drop every idle-expired conversation.
+
+        Returns:
+            int: Number of conversations removed.
+        """
+        with self._lock:
+            dropped = self._purge_expired_locked()
+        self._notify(dropped)
+        return len(dropped)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report size and counters.
+
+        Returns:
+            dict: Entry count, bytes used, limits and hit/miss/eviction counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -1,48 +1,185 @@
-import requests
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import http_client
+from utils.cache import TTLCache
+from utils.config_loader import load_config
+from utils.single_flight import SingleFlight
 
 
 class CurrencyConverter:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_currency: Optional[str] = None, rate_ttl_seconds: Optional[float] = None):
         """
         Initialize the CurrencyConverter with API key.
         Args:
             api_key (str): Your ExchangeRate API key.
+            base_currency (str): Currency whose rate table is used to derive cross rates.
+            rate_ttl_seconds (float): How long a downloaded rate table is reused.
         """
         # Base URL for ExchangeRate API (latest exchange rates by base currency)
         self.base_url = f"https://v6.exchangerate-api.com/v6/{api_key}/latest"
 
+        settings = load_config().get("currency") or {}
+        self.base_currency = (base_currency or settings.get("base_currency", "USD")).upper()
+        rate_ttl_seconds = rate_ttl_seconds if rate_ttl_seconds is not None else settings.get("rate_ttl_seconds", 3600)
+
+        # Rate tables keyed by their base currency, e.g. "USD" -> {"VND": 25000.0, ...}
+        self.rate_tables = TTLCache(max_entries=4, default_ttl=rate_ttl_seconds)
+        # Concurrent misses (e.g. a batch of conversions, or many requests) share one download
+        self.flights = SingleFlight("currency")
+
+    @staticmethod
+    def _parse_table(response) -> Dict[str, float]:
+        """
+        Validate an API response and return its conversion rates.
+        Works with both sync (`requests`) and async (`httpx`) responses.
+        """
+        if response.status_code != 200:
+            # Safer to return JSON only if it's valid, else str
+            try:
+                error_message = response.json()
+            except Exception:
+                error_message = response.text
+            raise Exception(f"API call failed: {error_message}")
+
+        return response.json().get("conversion_rates", {})
+
+    def _fetch_table(self, base: str) -> Dict[str, float]:
+        table = self.rate_tables.get(base)
+        if table is not None:
+            return table
+
+        def fetch():
+            # A flight that finished after the lookup above has already filled the cache
+            cached = self.rate_tables.peek(base)
+            if cached is not None:
+                return cached
+            table = self._parse_table(http_client.request("GET", f"{self.base_url}/{base}"))
+            self.rate_tables.set(base, table)
+            return table
+
+        return self.flights.do(base, fetch)
+
+    async def _afetch_table(self, base: str) -> Dict[str, float]:
+        table = self.rate_tables.get(base)
+        if table is not None:
+            return table
+
+        async def fetch():
+            # A flight that finished after the lookup above has already filled the cache
+            cached = self.rate_tables.peek(base)
+            if cached is not None:
+                return cached
+            table = self._parse_table(await http_client.arequest("GET", f"{self.base_url}/{base}"))
+            self.rate_tables.set(base, table)
+            return table
+
+        return await self.flights.ado(base, fetch)
+
+    def _rate_from_table(self, table: Dict[str, float], from_currency: str, to_currency: str) -> float:
+        """
+        Rate from -> to derived from the base-currency table. For a table based
+        on B the cross rate is table[to] / table[from] (table[B] is 1).
+        """
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
+
+        for code in (from_currency, to_currency):
+            if code != self.base_currency and code not in table:
+                raise ValueError(f"{code} not found in exchange rates.")
+
+        from_rate = 1.0 if from_currency == self.base_currency else table[from_currency]
+        to_rate = 1.0 if to_currency == self.base_currency else table[to_currency]
+        return to_rate / from_rate
+
+    def get_rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Exchange rate from one currency to another.
+
+        Every pair is derived from the cached base-currency table, so a single
+        download per TTL window serves all conversions.
+
+        Args:
+            from_currency (str): Source currency code (e.g., "USD").
+            to_currency (str): Target currency code (e.g., "VND").
+
+        Returns:
+            float: Units of `to_currency` per unit of `from_currency`.
+        """
+        if from_currency.upper() == to_currency.upper():
+            return 1.0
+        return self._rate_from_table(self._fetch_table(self.base_currency), from_currency, to_currency)
+
+    async def aget_rate(self, from_currency: str, to_currency: str) -> float:
+        """Async variant of `get_rate`."""
+        if from_currency.upper() == to_currency.upper():
+            return 1.0
+        return self._rate_from_table(await self._afetch_table(self.base_currency), from_currency, to_currency)
+
     def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
         """
         Convert the amount from one currency to another.
-        
+
         Args:
             amount (float): Amount to convert.
             from_currency (str): Source currency code (e.g., "USD").
             to_currency (str): Target currency code (e.g., "PKR").
-        
+
         Returns:
             float: Converted amount in target currency.
-        
+
         Raises:
             Exception: If API call fails.
-            ValueError: If the target currency is not found.
+            ValueError: If either currency is not found.
         """
-        # API endpoint for base currency
-        url = f"{self.base_url}/{from_currency.upper()}"
-        response = requests.get(url)
+        return round(amount * self.get_rate(from_currency, to_currency), 2)  # Rounded for user-friendliness
 
-        if response.status_code != 200:
-            # Safer to return JSON only if it's valid, else str
+    async def aconvert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        """
+        Async variant of `convert` that does not block the event loop.
+
+        Args:
+            amount (float): Amount to convert.
+            from_currency (str): Source currency code (e.g., "USD").
+            to_currency (str): Target currency code (e.g., "PKR").
+
+        Returns:
+            float: Converted amount in target currency.
+        """
+        return round(amount * await self.aget_rate(from_currency, to_currency), 2)
+
+    def _convert_items(self, items: List[Tuple[float, str, str]], table: Dict[str, float]) -> List[dict]:
+        results = []
+        for amount, from_currency, to_currency in items:
+            result = {"amount": amount, "from_currency": from_currency.upper(), "to_currency": to_currency.upper()}
             try:
-                error_message = response.json()
-            except Exception:
-                error_message = response.text
-            raise Exception(f"API call failed: {error_message}")
+                result["converted"] = round(amount * self._rate_from_table(table, from_currency, to_currency), 2)
+            except ValueError as e:
+                result["error"] = str(e)
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _needs_rates(items: List[Tuple[float, str, str]]) -> bool:
+        return any(from_c.upper() != to_c.upper() for _, from_c, to_c in items)
 
-        data = response.json()
-        rates = data.get("conversion_rates", {})
+    def convert_many(self, items: Iterable[Tuple[float, str, str]]) -> List[dict]:
+        """
+        Convert a batch of amounts with at most one rate-table download.
 
-        if to_currency.upper() not in rates:
-            raise ValueError(f"{to_currency.upper()} not found in exchange rates.")
+        Args:
+            items (Iterable[tuple]): (amount, from_currency, to_currency) triples.
+
+        Returns:
+            List[dict]: One result per item with `converted`, or `error` for an
+                        unknown currency (other items are still converted).
+        """
+        items = list(items)
+        table = self._fetch_table(self.base_currency) if self._needs_rates(items) else {}
+        return self._convert_items(items, table)
 
-        return round(amount * rates[to_currency.upper()], 2)  # Rounded for user-friendliness
+    async def aconvert_many(self, items: Iterable[Tuple[float, str, str]]) -> List[dict]:
+        """Async variant of `convert_many`."""
+        items = list(items)
+        table = await self._afetch_table(self.base_currency) if self._needs_rates(items) else {}
+        return self._convert_items(items, table)
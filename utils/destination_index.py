@@ -0,0 +1,301 @@
+"""
+Local index of place search answers for popular destinations.
+
+Answers (attractions, restaurants, activities, transportation) for the
+destinations listed in config.yaml are fetched from Tavily offline and
+stored in SQLite; PlaceSearchTool serves them while they are fresh and falls
+back to live Tavily otherwise. Destination names and aliases are matched
+through an FTS5 table, diacritic-insensitively.
+
+Usage:
+    python -m utils.destination_index refresh            # fetch missing / outdated entries
+    python -m utils.destination_index refresh --force    # re-fetch everything
+    python -m utils.destination_index status             # age of every entry
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.cache import normalize_key
+from utils.config_loader import load_config
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CATEGORIES = ("attractions", "restaurants", "activities", "transportation")
+
+
+@dataclass
+class IndexEntry:
+    """One stored answer for a destination and category."""
+    destination: str
+    category: str
+    content: Any
+    fetched_at: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class DestinationIndex:
+    """
+    SQLite-backed store of search answers, one row per destination x category,
+    plus an FTS5 table of destination names for matching free-text places.
+    """
+
+    def __init__(self, path: str, max_age_seconds: float = 30 * 24 * 3600):
+        """
+        Initialize the DestinationIndex.
+
+        Args:
+            path (str): Path of the SQLite database file (created if missing).
+            max_age_seconds (float): Entries older than this are not served.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                destination TEXT NOT NULL,
+                category TEXT NOT NULL,
+                content TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (destination, category)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS destination_names
+                USING fts5(destination UNINDEXED, name, tokenize = 'unicode61 remove_diacritics 2');
+            """
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, settings: Optional[dict]) -> Optional["DestinationIndex"]:
+        """
+        Open the index described by the `destination_index` section of
+        config.yaml; None when disabled or not built yet.
+        """
+        settings = settings or {}
+        path = cls.configured_path(settings)
+        if path is None:
+            return None
+        if not os.path.exists(path):
+            logger.info("No destination index at %s; run `python -m utils.destination_index refresh`", path)
+            return None
+        return cls(path, max_age_seconds=settings.get("max_age_seconds", 30 * 24 * 3600))
+
+    @staticmethod
+    def configured_path(settings: Optional[dict]) -> Optional[str]:
+        """Path of the index file in the `destination_index` section; None when disabled."""
+        settings = settings or {}
+        if not settings.get("enabled", False):
+            return None
+        return settings.get("path", "cache/destination_index.sqlite3")
+
+    # --------------------------
+    # Destination names
+    # --------------------------
+    def set_names(self, destination: str, names: Iterable[str]) -> None:
+        """Replace the names (canonical name and aliases) a destination is matched by."""
+        rows = [(destination, normalize_key(name)) for name in {destination, *names}]
+        with self._lock:
+            self._conn.execute("DELETE FROM destination_names WHERE destination = ?", (destination,))
+            self._conn.executemany("INSERT INTO destination_names (destination, name) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def resolve(self, place: str) -> Optional[str]:
+        """
+        Return the indexed destination a free-text place refers to, or None.
+
+        A destination matches when one of its names occurs as a whole-word
+        phrase in the place ("Da Lat, Lam Dong" -> "Da Lat"); the longest
+        matching name wins.
+        """
+        words = normalize_key(place).split()
+        if not words:
+            return None
+        query = " OR ".join(f'"{word}"' for word in set(words))
+        with self._lock:
+            candidates = self._conn.execute(
+                "SELECT destination, name FROM destination_names WHERE destination_names MATCH ?", (query,)
+            ).fetchall()
+
+        padded = f" {' '.join(words)} "
+        best, best_length = None, 0
+        for destination, name in candidates:
+            if f" {name} " in padded and len(name) > best_length:
+                best, best_length = destination, len(name)
+        return best
+
+    # --------------------------
+    # Entries
+    # --------------------------
+    def upsert(self, destination: str, category: str, content: Any, fetched_at: Optional[float] = None) -> None:
+        payload = json.dumps(content, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (destination, category, content, fetched_at) VALUES (?, ?, ?, ?)",
+                (destination, category, payload, time.time() if fetched_at is None else fetched_at),
+            )
+            self._conn.commit()
+
+    def entries(self, destination: Optional[str] = None) -> List[IndexEntry]:
+        """All stored entries (of one destination, if given), fresh or not."""
+        sql = "SELECT destination, category, content, fetched_at FROM entries"
+        params = ()
+        if destination is not None:
+            sql, params = sql + " WHERE destination = ?", (destination,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY destination, category", params).fetchall()
+        return [IndexEntry(row[0], row[1], json.loads(row[2]), row[3]) for row in rows]
+
+    def lookup_many(self, place: str, categories: Iterable[str]) -> Dict[str, IndexEntry]:
+        """
+        Fresh entries for a place, by category. Categories without a fresh
+        entry (or an unknown place) are simply absent from the result.
+        """
+        categories = list(categories)
+        destination = self.resolve(place)
+        found = {}
+        if destination is not None:
+            found = {
+                entry.category: entry for entry in self.entries(destination)
+                if entry.category in categories and entry.age_seconds <= self.max_age_seconds
+            }
+        self.hits += len(found)
+        self.misses += len(categories) - len(found)
+        if found:
+            logger.debug("Destination index hit for '%s' -> '%s': %s", place, destination, sorted(found))
+        return found
+
+    def lookup(self, category: str, place: str) -> Optional[IndexEntry]:
+        """Fresh entry for one category of a place, or None."""
+        return self.lookup_many(place, [category]).get(category)
+
+    def freshness(self) -> List[dict]:
+        """Age of every stored entry, for status reports."""
+        return [
+            {
+                "destination": entry.destination,
+                "category": entry.category,
+                "fetched_at": entry.fetched_at,
+                "age_seconds": round(entry.age_seconds),
+                "fresh": entry.age_seconds <= self.max_age_seconds,
+            }
+            for entry in self.entries()
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        freshness = self.freshness()
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "destinations": len({item["destination"] for item in freshness}),
+            "entries": len(freshness),
+            "fresh_entries": sum(item["fresh"] for item in freshness),
+            "oldest_age_seconds": max((item["age_seconds"] for item in freshness), default=None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# --------------------------
+# Offline ingestion
+# --------------------------
+def refresh(index: DestinationIndex, destinations: List[dict], search: Callable[[str, str], Any],
+            refresh_after_seconds: float, force: bool = False, max_workers: int = 4) -> Dict[str, int]:
+    """
+    Fetch answers for entries that are missing or older than `refresh_after_seconds`.
+
+    Args:
+        index (DestinationIndex): Index to update.
+        destinations (List[dict]): Items with `name` and optional `aliases`.
+        search (Callable): `search(category, place)` returning a live answer.
+        refresh_after_seconds (float): Age after which an entry is re-fetched.
+        force (bool): Re-fetch every entry regardless of age.
+        max_workers (int): Concurrent searches (upstream rate limits still apply).
+
+    Returns:
+        dict: Counts of "fetched", "skipped" (still fresh) and "failed" entries.
+    """
+    due = []
+    for item in destinations:
+        name = item["name"]
+        index.set_names(name, item.get("aliases") or [])
+        ages = {entry.category: entry.age_seconds for entry in index.entries(name)}
+        due += [(name, category) for category in CATEGORIES
+                if force or ages.get(category, float("inf")) > refresh_after_seconds]
+
+    counts = {"fetched": 0, "skipped": len(destinations) * len(CATEGORIES) - len(due), "failed": 0}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="index-refresh") as executor:
+        futures = {executor.submit(search, category, name): (name, category) for name, category in due}
+        for future, (name, category) in futures.items():
+            try:
+                result = future.result()
+                if not result or (isinstance(result, dict) and result.get("error")):
+                    raise ValueError(result)
+            except Exception as e:
+                # The previous entry (if any) is kept and served until it ages out
+                logger.warning("Could not refresh %s / %s: %s", name, category, e)
+                counts["failed"] += 1
+                continue
+            index.upsert(name, category, result)
+            counts["fetched"] += 1
+            logger.info("Indexed %s / %s", name, category)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    refresh_parser = commands.add_parser("refresh", help="Fetch missing or outdated entries from Tavily")
+    refresh_parser.add_argument("--force", action="store_true", help="Re-fetch every entry")
+    refresh_parser.add_argument("--only", nargs="*", help="Refresh only these destinations")
+    commands.add_parser("status", help="Show the age of every entry")
+    args = parser.parse_args()
+
+    settings = load_config().get("destination_index") or {}
+    index = DestinationIndex(settings.get("path", "cache/destination_index.sqlite3"),
+                             max_age_seconds=settings.get("max_age_seconds", 30 * 24 * 3600))
+
+    if args.command == "refresh":
+        from utils.service_registry import services
+
+        destinations = settings.get("destinations") or []
+        if args.only:
+            wanted = {normalize_key(name) for name in args.only}
+            destinations = [item for item in destinations if normalize_key(item["name"]) in wanted]
+        counts = refresh(index, destinations, services.place_search().fetch_live,
+                         refresh_after_seconds=settings.get("refresh_after_seconds", 7 * 24 * 3600),
+                         force=args.force)
+        print(f"fetched {counts['fetched']}, still fresh {counts['skipped']}, failed {counts['failed']}")
+    else:
+        print(f"{'destination':<24}{'category':<16}{'age (days)':>12}  fresh")
+        for item in index.freshness():
+            print(f"{item['destination']:<24}{item['category']:<16}{item['age_seconds'] / 86400:>12.1f}  "
+                  f"{'yes' if item['fresh'] else 'NO'}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+Background export of travel plans to Markdown, HTML and JSON files.
+
+Exports are queued and written by worker threads, so requests that ask for
+one only pay for putting a job on the queue. Files are content-addressed:
+the name is derived from a hash of the plan text, so exporting the same plan
+twice (in the same format) reuses the existing file, and names never collide.
+"""
+import datetime
+import hashlib
+import html
+import json
+import os
+import queue
+import re
+import textwrap
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from utils.logger import get_logger
+from utils.metrics import DOCUMENT_EXPORTS
+
+logger = get_logger(__name__)
+
+DISCLAIMER = (
+    "This travel plan was generated by AI. Please verify all information, especially prices, "
+    "operating hours, and travel requirements before your trip."
+)
+
+
+class ExportQueueFull(Exception):
+    """Raised when the export queue is at capacity; the caller should retry later."""
+
+
+# --------------------------
+# Renderers
+# --------------------------
+def _generated_label(generated_at: datetime.datetime) -> str:
+    return generated_at.strftime("%Y-%m-%d at %H:%M")
+
+
+def render_markdown(plan: str, generated_at: datetime.datetime) -> str:
+    """The plan with a metadata header and the AI disclaimer."""
+    return textwrap.dedent(f"""\
+    # 🌍 AI Travel Plan
+
+    # **Generated:** {_generated_label(generated_at)}
+    # **Created by:** Travel Agent
+
+    ---
+
+    {{plan}}
+
+    ---
+
+    *{DISCLAIMER}*
+    """).replace("{plan}", plan)
+
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET = re.compile(r"^\s*[-*+]\s+(.*)$")
+_NUMBERED = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$")
+
+
+def _inline(text: str) -> str:
+    """Escape text and convert bold, italic and code spans."""
+    text = html.escape(text, quote=False)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", text)
+    text = re.sub(r"(?<![*\w])\*(?!\s)(.+?)(?<!\s)\*(?![*\w])", r"<em>\1</em>", text)
+    return re.sub(r"`([^`]+)`", r"<code>\1</code>", text)
+
+
+def _table_cells(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def markdown_to_html(markdown: str) -> str:
+    """
+    Convert the Markdown subset the planner produces (headings, bullet and
+    numbered lists, tables, rules, bold / italic / code spans, paragraphs)
+    to HTML. Everything else is escaped and kept as text.
+    """
+    lines = markdown.splitlines()
+    out, paragraph, list_tag = [], [], None
+    i = 0
+
+    def close_paragraph():
+        if paragraph:
+            out.append(f"<p>{'<br>'.join(_inline(line) for line in paragraph)}</p>")
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            out.append(f"</{list_tag}>")
+            list_tag = None
+
+    while i < len(lines):
+        line = lines[i].rstrip()
+        stripped = line.strip()
+        heading, bullet, numbered = _HEADING.match(stripped), _BULLET.match(line), _NUMBERED.match(line)
+
+        if not stripped:
+            close_paragraph()
+            close_list()
+        elif stripped in ("---", "***", "___"):
+            close_paragraph()
+            close_list()
+            out.append("<hr>")
+        elif heading:
+            close_paragraph()
+            close_list()
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+        elif stripped.startswith("|") and i + 1 < len(lines) and _TABLE_SEPARATOR.match(lines[i + 1].strip()):
+            close_paragraph()
+            close_list()
+            header = "".join(f"<th>{_inline(cell)}</th>" for cell in _table_cells(stripped))
+            rows = []
+            i += 2
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append("<tr>" + "".join(f"<td>{_inline(cell)}</td>" for cell in _table_cells(lines[i])) + "</tr>")
+                i += 1
+            out.append(f"<table><thead><tr>{header}</tr></thead><tbody>{''.join(rows)}</tbody></table>")
+            continue
+        elif bullet or numbered:
+            close_paragraph()
+            tag = "ul" if bullet else "ol"
+            if list_tag != tag:
+                close_list()
+                out.append(f"<{tag}>")
+                list_tag = tag
+            out.append(f"<li>{_inline((bullet or numbered).group(1))}</li>")
+        else:
+            close_list()
+            paragraph.append(stripped)
+        i += 1
+
+    close_paragraph()
+    close_list()
+    return "\n".join(out)
+
+
+def render_html(plan: str, generated_at: datetime.datetime) -> str:
+    """A standalone HTML page with the plan."""
+    return textwrap.dedent(f"""\
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+    <meta charset="utf-8">
+    <title>AI Travel Plan</title>
+    <style>
+    body {{ font-family: sans-serif; max-width: 50rem; margin: 2rem auto; padding: 0 1rem; line-height: 1.5; }}
+    table {{ border-collapse: collapse; }} th, td {{ border: 1px solid #ccc; padding: 0.3rem 0.6rem; }}
+    .meta, .disclaimer {{ color: #666; }}
+    </style>
+    </head>
+    <body>
+    <h1>🌍 AI Travel Plan</h1>
+    <p class="meta">Generated {_generated_label(generated_at)} by Travel Agent</p>
+    <hr>
+    {{body}}
+    <hr>
+    <p class="disclaimer"><em>{DISCLAIMER}</em></p>
+    </body>
+    </html>
+    """).replace("{body}", markdown_to_html(plan))
+
+
+def render_json(plan: str, generated_at: datetime.datetime) -> str:
+    """The plan as Markdown plus its "#"/"##" sections, for programmatic use."""
+    sections, current = [], None
+    for line in plan.splitlines():
+        heading = _HEADING.match(line.strip())
+        if heading and len(heading.group(1)) <= 2:
+            current = {"heading": heading.group(2).strip(), "content": ""}
+            sections.append(current)
+        elif current is not None:
+            current["content"] += line + "\n"
+    for section in sections:
+        section["content"] = section["content"].strip()
+
+    document = {
+        "title": "AI Travel Plan",
+        "generated_at": generated_at.isoformat(timespec="seconds"),
+        "markdown": plan,
+        "sections": sections,
+        "disclaimer": DISCLAIMER,
+    }
+    return json.dumps(document, ensure_ascii=False, indent=2)
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    """One output format: file extension, HTTP media type and renderer."""
+    extension: str
+    media_type: str
+    render: Callable[[str, datetime.datetime], str]
+
+
+FORMATS: Dict[str, ExportFormat] = {
+    "markdown": ExportFormat(".md", "text/markdown; charset=utf-8", render_markdown),
+    "html": ExportFormat(".html", "text/html; charset=utf-8", render_html),
+    "json": ExportFormat(".json", "application/json", render_json),
+}
+
+
+def content_address(plan: str) -> str:
+    """Stable identifier of a plan's text (the same plan always gets the same files)."""
+    return hashlib.sha256(plan.encode("utf-8")).hexdigest()[:24]
+
+
+# --------------------------
+# Export queue
+# --------------------------
+@dataclass
+class ExportJob:
+    """Status of one export (`id` is "<content address>.<format>")."""
+    id: str
+    format: str
+    filename: str
+    status: str = "queued"        # queued | running | done | failed
+    deduplicated: bool = False    # The file already existed, nothing was written
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class DocumentExporter:
+    """
+    Writes plan exports on background worker threads.
+
+    `submit` only records the job and puts it on a bounded queue, so it never
+    waits on disk I/O; callers poll `get` for its status. Identical exports
+    (same plan text and format) share one job and one file, and files are
+    written to a temporary name and renamed, so readers never see a partial
+    file.
+    """
+
+    def __init__(self, directory: str = "./output", workers: int = 2, max_queue: int = 100,
+                 max_jobs: int = 1000):
+        """
+        Initialize the DocumentExporter.
+
+        Args:
+            directory (str): Where exported files are written.
+            workers (int): Worker threads writing files.
+            max_queue (int): Queued exports allowed before `submit` refuses more.
+            max_jobs (int): Job statuses kept in memory (oldest dropped; files stay on disk).
+        """
+        self.directory = directory
+        self.max_jobs = max_jobs
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_queue)
+        self._jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"document-export-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        self.written = 0
+        self.deduplicated = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(cls, settings: Optional[dict]) -> Optional["DocumentExporter"]:
+        """Build from the `document_export` section of config.yaml; None when disabled."""
+        settings = settings or {}
+        if not settings.get("enabled", True):
+            return None
+        return cls(
+            directory=settings.get("directory", "./output"),
+            workers=settings.get("workers", 2),
+            max_queue=settings.get("max_queue", 100),
+            max_jobs=settings.get("max_jobs", 1000),
+        )
+
+    def path(self, job: ExportJob) -> str:
+        return os.path.join(self.directory, job.filename)
+
+    def submit(self, plan: str, export_format: str = "markdown") -> ExportJob:
+        """
+        Queue an export of a plan; returns at once.
+
+        Args:
+            plan (str): The plan text (Markdown).
+            export_format (str): One of FORMATS.
+
+        Returns:
+            ExportJob: The new job, or the existing one for the same plan and format.
+
+        Raises:
+            ValueError: Unknown format.
+            ExportQueueFull: Too many exports are waiting.
+        """
+        if export_format not in FORMATS:
+            raise ValueError(f"Unknown export format {export_format!r}; expected one of {sorted(FORMATS)}")
+        address = content_address(plan)
+        job_id = f"{address}.{export_format}"
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status != "failed":
+                self._jobs.move_to_end(job_id)
+                return job
+            job = ExportJob(
+                id=job_id,
+                format=export_format,
+                filename=f"travel_plan_{address}{FORMATS[export_format].extension}",
+                created_at=time.time(),
+            )
+            try:
+                self._queue.put_nowait((job, plan))
+            except queue.Full:
+                DOCUMENT_EXPORTS.inc(format=export_format, outcome="rejected")
+                raise ExportQueueFull(f"{self._queue.maxsize} exports are already waiting") from None
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        logger.info("Export %s queued", job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """
+        Status of an export. Jobs no longer in memory (older ones, or from
+        before a restart) are reported as done if their file exists.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+
+        address, _, export_format = job_id.partition(".")
+        if export_format not in FORMATS or not re.fullmatch(r"[0-9a-f]{24}", address):
+            return None
+        job = ExportJob(id=job_id, format=export_format,
+                        filename=f"travel_plan_{address}{FORMATS[export_format].extension}", status="done")
+        try:
+            stat = os.stat(self.path(job))
+        except OSError:
+            return None
+        job.size_bytes, job.created_at, job.finished_at = stat.st_size, stat.st_mtime, stat.st_mtime
+        return job
+
+    # --------------------------
+    # Workers
+    # --------------------------
+    def _write(self, job: ExportJob, plan: str) -> None:
+        path = self.path(job)
+        if os.path.exists(path):
+            job.deduplicated = True
+            job.size_bytes = os.path.getsize(path)
+            return
+        content = FORMATS[job.format].render(plan, datetime.datetime.now()).encode("utf-8")
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(content)
+        os.replace(temporary, path)
+        job.size_bytes = len(content)
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            job, plan = item
+            job.status = "running"
+            try:
+                self._write(job, plan)
+            except Exception as e:
+                logger.exception("Export %s failed", job.id)
+                job.status, job.error = "failed", str(e)
+                self.failed += 1
+                DOCUMENT_EXPORTS.inc(format=job.format, outcome="failed")
+            else:
+                job.status = "done"
+                if job.deduplicated:
+                    self.deduplicated += 1
+                else:
+                    self.written += 1
+                DOCUMENT_EXPORTS.inc(format=job.format, outcome="deduplicated" if job.deduplicated else "written")
+                logger.info("Export %s %s (%d bytes)", job.id,
+                            "already on disk" if job.deduplicated else "written", job.size_bytes)
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+    def join(self) -> None:
+        """Wait until every queued export has been processed."""
+        self._queue.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Finish queued exports and stop the workers."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "directory": self.directory,
+            "queued": self._queue.qsize(),
+            "tracked_jobs": len(statuses),
+            "running": statuses.count("running"),
+            "written": self.written,
+            "deduplicated": self.deduplicated,
+            "failed": self.failed,
+        }
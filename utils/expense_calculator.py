@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class Calculator:
     @staticmethod
     def multiply(a: int, b: int) -> int:
@@ -42,3 +45,21 @@ class Calculator:
         """
         # To avoid ZeroDivisionError, return 0 if days is 0
         return total / days if days > 0 else 0
+
+    @staticmethod
+    def calculate_line_totals(unit_costs: np.ndarray, quantities: np.ndarray,
+                              nights: np.ndarray, travelers: np.ndarray) -> np.ndarray:
+        """
+        Calculate the totals of many line items at once.
+
+        Args:
+            unit_costs (np.ndarray): Cost of one unit per item.
+            quantities (np.ndarray): Units per item (rooms, tickets, meals...).
+            nights (np.ndarray): Nights/days the unit cost repeats for.
+            travelers (np.ndarray): People the unit cost applies to.
+
+        Returns:
+            np.ndarray: Element-wise product, one total per item.
+        """
+        # One vectorized multiply instead of a Python loop per item
+        return unit_costs * quantities * nights * travelers
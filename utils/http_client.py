@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import nullcontext
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.config_loader import load_config
+from utils.logger import get_logger
+from utils.metrics import record_upstream
+from utils.rate_limiter import get_limiter, reset_limiters
+
+logger = get_logger(__name__)
+
+
+# ------------------------------
+# Shared HTTP transport for every upstream client in utils/
+# ------------------------------
+# Sync callers share one requests.Session (keep-alive pool per host).
+# Async callers share one httpx.AsyncClient per event loop, since httpx
+# connections cannot be reused across loops.
+
+_session: Optional[requests.Session] = None
+_settings: Optional[dict] = None
+_lock = threading.Lock()
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+# Metric labels for the known upstream APIs; other hosts are reported by hostname
+UPSTREAM_NAMES = {
+    "api.tavily.com": "tavily",
+    "api.openweathermap.org": "openweathermap",
+    "v6.exchangerate-api.com": "exchangerate",
+}
+
+_host_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def get_http_settings() -> dict:
+    """Return the `http` section of config.yaml with defaults filled in."""
+    global _settings
+    if _settings is None:
+        settings = load_config().get("http") or {}
+        _settings = {
+            "connect_timeout_seconds": settings.get("connect_timeout_seconds", 5),
+            "read_timeout_seconds": settings.get("read_timeout_seconds", 30),
+            "pool_connections": settings.get("pool_connections", 10),
+            "max_connections_per_host": settings.get("max_connections_per_host", 20),
+            "max_connections": settings.get("max_connections", 100),
+            "keepalive_expiry_seconds": settings.get("keepalive_expiry_seconds", 30),
+            "prewarm_connections": settings.get("prewarm_connections", True),
+            "prewarm_timeout_seconds": settings.get("prewarm_timeout_seconds", 3),
+        }
+    return _settings
+
+
+def get_session() -> requests.Session:
+    """
+    Return the shared requests.Session.
+    Connections are kept alive and pooled; each host holds at most
+    `max_connections_per_host` connections (callers beyond that wait).
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                settings = get_http_settings()
+                adapter = HTTPAdapter(
+                    pool_connections=settings["pool_connections"],
+                    pool_maxsize=settings["max_connections_per_host"],
+                    pool_block=True,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared httpx.AsyncClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        settings = get_http_settings()
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings["read_timeout_seconds"], connect=settings["connect_timeout_seconds"]),
+            limits=httpx.Limits(
+                max_connections=settings["max_connections"],
+                max_keepalive_connections=settings["max_connections"],
+                keepalive_expiry=settings["keepalive_expiry_seconds"],
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aprewarm_connections(urls: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Open a kept-alive connection (DNS, TCP, TLS) to each upstream in the
+    shared async client of the running loop, so the first request does not
+    pay the handshakes. Failures are logged and otherwise ignored; these
+    probes are not counted in the upstream metrics.
+
+    Args:
+        urls (Iterable[str]): URLs to probe; defaults to the root of every
+                              host in UPSTREAM_NAMES.
+
+    Returns:
+        Dict[str, str]: Outcome per URL ("ok" or the error type).
+    """
+    urls = list(urls) if urls is not None else [f"https://{host}/" for host in UPSTREAM_NAMES]
+    client = get_async_client()
+    timeout = get_http_settings()["prewarm_timeout_seconds"]
+
+    async def probe(url: str) -> str:
+        try:
+            # Any HTTP response (even 404/405) leaves the connection in the pool
+            await client.head(url, timeout=timeout)
+            return "ok"
+        except Exception as e:
+            logger.warning("Could not pre-open connection to %s: %s", url, e)
+            return type(e).__name__
+
+    outcomes = await asyncio.gather(*(probe(url) for url in urls))
+    return dict(zip(urls, outcomes))
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    # httpx only limits the whole pool, so the per-host cap is enforced here
+    loop = asyncio.get_running_loop()
+    semaphores = _host_semaphores.setdefault(loop, {})
+    host = urlsplit(url).netloc
+    semaphore = semaphores.get(host)
+    if semaphore is None:
+        semaphore = semaphores[host] = asyncio.Semaphore(get_http_settings()["max_connections_per_host"])
+    return semaphore
+
+
+def _upstream_name(url: str) -> str:
+    host = urlsplit(url).hostname or "unknown"
+    return UPSTREAM_NAMES.get(host, host)
+
+
+def _status_label(status_code: int) -> str:
+    return "ok" if status_code < 400 else f"http_{status_code}"
+
+
+def _retry_after(response) -> float:
+    # Only the delta-seconds form is used by our upstreams
+    try:
+        return max(float(response.headers.get("Retry-After", 1)), 0.0)
+    except ValueError:
+        return 1.0
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session with the configured timeouts.
+    Calls to a rate-limited upstream (`rate_limits` in config.yaml) first
+    queue for a slot; UpstreamQueueTimeout is raised if none frees up in time.
+
+    Args:
+        method (str): HTTP method.
+        url (str): Absolute URL.
+        **kwargs: Passed to `requests.Session.request` (params, json, headers, ...).
+
+    Returns:
+        requests.Response: The response.
+    """
+    settings = get_http_settings()
+    kwargs.setdefault("timeout", (settings["connect_timeout_seconds"], settings["read_timeout_seconds"]))
+    upstream = _upstream_name(url)
+    limiter = get_limiter(upstream)
+    with limiter.acquire() if limiter is not None else nullcontext():
+        start, status = time.perf_counter(), "error"
+        try:
+            response = get_session().request(method, url, **kwargs)
+            status = _status_label(response.status_code)
+            if response.status_code == 429 and limiter is not None:
+                limiter.backoff(_retry_after(response))
+            return response
+        finally:
+            record_upstream(upstream, time.perf_counter() - start, status)
+
+
+async def arequest(method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Async variant of `request` using the shared httpx.AsyncClient; queueing
+    for a rate-limit slot awaits without blocking the event loop.
+
+    Args:
+        method (str): HTTP method.
+        url (str): Absolute URL.
+        **kwargs: Passed to `httpx.AsyncClient.request`.
+
+    Returns:
+        httpx.Response: The response.
+    """
+    upstream = _upstream_name(url)
+    limiter = get_limiter(upstream)
+    async with limiter.aacquire() if limiter is not None else nullcontext(), _host_semaphore(url):
+        # Timed after acquiring the host slot, so the metric is upstream latency, not queueing
+        start, status = time.perf_counter(), "error"
+        try:
+            response = await get_async_client().request(method, url, **kwargs)
+            status = _status_label(response.status_code)
+            if response.status_code == 429 and limiter is not None:
+                limiter.backoff(_retry_after(response))
+            return response
+        finally:
+            record_upstream(upstream, time.perf_counter() - start, status)
+
+
+async def aclose_async_client() -> None:
+    """Close the async client bound to the running event loop (call on shutdown)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.pop(loop, None)
+    _host_semaphores.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def reset() -> None:
+    """
+    Forget the `http` settings and rate limiters and close the shared sync
+    session; all are recreated from the current config on next use (used on config reload).
+    Async clients keep their pool limits until their event loop closes them.
+    """
+    global _settings
+    close_session()
+    reset_limiters()
+    _settings = None
+
+
+def close_session() -> None:
+    """Close the shared sync session (call on shutdown)."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
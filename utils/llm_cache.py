@@ -0,0 +1,250 @@
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from utils.cache import TTLCache, normalize_key
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize message text for exact-match keys: Unicode NFC, case-folded,
+    whitespace collapsed and trailing punctuation dropped. Diacritics are kept
+    (in Vietnamese they distinguish words).
+    """
+    text = unicodedata.normalize("NFC", text).casefold()
+    return " ".join(text.split()).rstrip(" .!?…")
+
+
+def tools_fingerprint(tools: Iterable) -> str:
+    """Stable hash of the tool schemas bound to the model."""
+    schemas = sorted(json.dumps(convert_to_openai_tool(tool), sort_keys=True, default=str) for tool in tools)
+    return hashlib.sha256("\n".join(schemas).encode()).hexdigest()
+
+
+def _message_text(message: BaseMessage) -> str:
+    return message.text if isinstance(message.text, str) else str(message.content)
+
+
+def _serialize(message: BaseMessage) -> str:
+    parts = [message.type, normalize_text(_message_text(message))]
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        parts.append(json.dumps([[call["name"], call["args"]] for call in tool_calls], sort_keys=True, default=str))
+    return "\x1f".join(parts)
+
+
+class NearDuplicateMatcher(ABC):
+    """
+    Interface for near-duplicate lookup of the latest user message.
+
+    Implementations remember (prefix, text) pairs and, for a new message with
+    the same conversation prefix, return the key of a sufficiently similar
+    earlier one.
+    """
+
+    @abstractmethod
+    def add(self, prefix: str, text: str, key: str) -> None:
+        """Remember `text` (after `prefix`) as stored under cache `key`."""
+
+    @abstractmethod
+    def find(self, prefix: str, text: str) -> Optional[str]:
+        """Key of a stored message similar enough to `text` with the same prefix, or None."""
+
+    def discard(self, key: str) -> None:
+        """Forget a key (called when its cache entry is gone)."""
+
+
+class TokenJaccardMatcher(NearDuplicateMatcher):
+    """
+    Word-set Jaccard similarity on diacritic-insensitive text.
+
+    Numbers must match exactly, so "3 ngày 2 đêm" never matches "5 ngày 4 đêm".
+    Meant for small per-prefix candidate sets (first turns of a conversation).
+    Prefixes are kept in LRU order, at most `max_prefixes` of them.
+    """
+
+    def __init__(self, threshold: float = 0.9, max_candidates_per_prefix: int = 200, max_prefixes: int = 1000):
+        self.threshold = threshold
+        self.max_candidates_per_prefix = max_candidates_per_prefix
+        self.max_prefixes = max_prefixes
+        # prefix -> [(word set, numbers, cache key)], least recently used first
+        self._candidates: "OrderedDict[str, List[Tuple[frozenset, Tuple[str, ...], str]]]" = OrderedDict()
+        self._prefix_of: Dict[str, str] = {}  # cache key -> its prefix
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _features(text: str) -> Tuple[frozenset, Tuple[str, ...]]:
+        normalized = normalize_key(text)
+        return frozenset(normalized.split()), tuple(re.findall(r"\d+", normalized))
+
+    def _forget(self, candidates: List[Tuple[frozenset, Tuple[str, ...], str]]) -> None:
+        for _, _, key in candidates:
+            self._prefix_of.pop(key, None)
+
+    def add(self, prefix: str, text: str, key: str) -> None:
+        words, numbers = self._features(text)
+        with self._lock:
+            candidates = self._candidates.get(prefix)
+            if candidates is None:
+                candidates = self._candidates[prefix] = []
+            else:
+                self._candidates.move_to_end(prefix)
+                candidates[:] = [candidate for candidate in candidates if candidate[2] != key]
+            candidates.append((words, numbers, key))
+            self._prefix_of[key] = prefix
+            if len(candidates) > self.max_candidates_per_prefix:
+                self._forget([candidates.pop(0)])
+            while len(self._candidates) > self.max_prefixes:
+                _, evicted = self._candidates.popitem(last=False)
+                self._forget(evicted)
+
+    def find(self, prefix: str, text: str) -> Optional[str]:
+        words, numbers = self._features(text)
+        if not words:
+            return None
+        best_key, best_score = None, self.threshold
+        with self._lock:
+            candidates = self._candidates.get(prefix)
+            if candidates is None:
+                return None
+            self._candidates.move_to_end(prefix)
+            candidates = list(candidates)
+        for candidate_words, candidate_numbers, key in candidates:
+            if candidate_numbers != numbers:
+                continue
+            score = len(words & candidate_words) / len(words | candidate_words)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            prefix = self._prefix_of.pop(key, None)
+            candidates = self._candidates.get(prefix) if prefix is not None else None
+            if candidates is None:
+                return
+            candidates[:] = [candidate for candidate in candidates if candidate[2] != key]
+            if not candidates:
+                del self._candidates[prefix]
+
+
+class LLMResponseCache:
+    """
+    Cache of final (tool-free) LLM answers keyed on the whole prompt.
+
+    The exact-match key hashes the model identity, system prompt, bound tool
+    schemas and normalized messages. Only responses without tool calls are
+    stored, and only for short conversations (`max_prompt_messages`), which is
+    where near-identical prompts such as first-turn trip requests occur.
+    An optional NearDuplicateMatcher also serves a cached answer when only
+    the wording of the latest user message differs.
+    """
+
+    def __init__(self, model_id: str, tools_hash: str, max_entries: int = 1000, ttl_seconds: float = 3600,
+                 max_prompt_messages: int = 3, matcher: Optional[NearDuplicateMatcher] = None):
+        """
+        Initialize the LLMResponseCache.
+
+        Args:
+            model_id (str): Provider and model name; part of every key.
+            tools_hash (str): `tools_fingerprint` of the bound tools.
+            max_entries (int): LRU size.
+            ttl_seconds (float): Lifetime of a cached answer.
+            max_prompt_messages (int): Longest conversation (excluding the system
+                                       message) that is looked up or stored.
+            matcher (NearDuplicateMatcher): Optional near-duplicate lookup.
+        """
+        self.model_id = model_id
+        self.tools_hash = tools_hash
+        self.max_prompt_messages = max_prompt_messages
+        self.matcher = matcher
+        self.entries = TTLCache(max_entries=max_entries, default_ttl=ttl_seconds)
+        self.near_hits = 0
+
+    @classmethod
+    def from_config(cls, settings: Optional[dict], model_id: str, tools: Iterable) -> Optional["LLMResponseCache"]:
+        """Build from the `llm_cache` section of config.yaml; None when disabled."""
+        settings = settings or {}
+        if not settings.get("enabled", False):
+            return None
+        matcher = None
+        near_duplicate = settings.get("near_duplicate") or {}
+        if near_duplicate.get("enabled", False):
+            # Every stored answer has one prefix, so more prefixes than entries are never live
+            matcher = TokenJaccardMatcher(threshold=near_duplicate.get("threshold", 0.9),
+                                          max_prefixes=settings.get("max_entries", 1000))
+        return cls(
+            model_id=model_id,
+            tools_hash=tools_fingerprint(tools),
+            max_entries=settings.get("max_entries", 1000),
+            ttl_seconds=settings.get("ttl_seconds", 3600),
+            max_prompt_messages=settings.get("max_prompt_messages", 3),
+            matcher=matcher,
+        )
+
+    def _keys(self, prompt: List[BaseMessage]) -> Optional[Tuple[str, str, str]]:
+        """(exact key, prefix key, latest user text), or None if the prompt is not eligible."""
+        system, messages = prompt[0], prompt[1:]
+        if not messages or len(messages) > self.max_prompt_messages or not isinstance(messages[-1], HumanMessage):
+            return None
+        prefix = hashlib.sha256("\x1e".join(
+            [self.model_id, self.tools_hash, _serialize(system)] + [_serialize(message) for message in messages[:-1]]
+        ).encode()).hexdigest()
+        exact = hashlib.sha256(f"{prefix}\x1e{_serialize(messages[-1])}".encode()).hexdigest()
+        return exact, prefix, _message_text(messages[-1])
+
+    def lookup(self, prompt: List[BaseMessage]) -> Optional[AIMessage]:
+        """
+        Return a cached answer for the prompt (system message first), or None.
+
+        Args:
+            prompt (List[BaseMessage]): The exact input about to be sent to the LLM.
+
+        Returns:
+            AIMessage: A fresh copy of the cached answer, marked with
+                       `response_metadata["cache_hit"]`.
+        """
+        keys = self._keys(prompt)
+        if keys is None:
+            return None
+        exact, prefix, text = keys
+
+        entry = self.entries.get(exact)
+        match = "exact"
+        if entry is None and self.matcher is not None:
+            near_key = self.matcher.find(prefix, text)
+            if near_key is not None:
+                entry = self.entries.get(near_key)
+                if entry is None:
+                    self.matcher.discard(near_key)
+                else:
+                    match = "near_duplicate"
+                    self.near_hits += 1
+        if entry is None:
+            return None
+
+        content, metadata = entry
+        return AIMessage(content=content, response_metadata={**metadata, "cache_hit": match})
+
+    def store(self, prompt: List[BaseMessage], response: AIMessage) -> None:
+        """Cache the response if it is a final answer to an eligible prompt."""
+        if getattr(response, "tool_calls", None) or not response.content:
+            return
+        keys = self._keys(prompt)
+        if keys is None:
+            return
+        exact, prefix, text = keys
+        self.entries.set(exact, (response.content, dict(response.response_metadata or {})))
+        if self.matcher is not None:
+            self.matcher.add(prefix, text, exact)
+
+    def stats(self) -> dict:
+        return {**self.entries.stats(), "near_duplicate_hits": self.near_hits}
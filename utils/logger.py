@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import random
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+# All application loggers live under this namespace so they share one configuration
+ROOT_LOGGER_NAME = "smart_planner"
+
+_configured = False
+_configure_lock = threading.Lock()
+_max_payload_chars = 500
+
+
+class Truncated:
+    """
+    Lazily rendered, length-capped log argument.
+
+    `str()` only runs when a record is actually emitted, so passing large
+    objects (message lists, API payloads) costs nothing at disabled levels:
+
+        logger.debug("State: %s", Truncated(state["messages"]))
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        limit = self.limit if self.limit is not None else _max_payload_chars
+        if isinstance(self.value, (list, tuple)):
+            return self._render_tail(self.value, limit)
+        text = str(self.value)
+        if len(text) <= limit:
+            return text
+        return f"{text[:limit]}…[+{len(text) - limit} chars]"
+
+    @staticmethod
+    def _render_tail(items, limit: int) -> str:
+        # Latest items are the interesting ones (e.g. the newest messages);
+        # stop rendering once the cap is reached instead of str()-ing the whole list
+        parts, used = [], 0
+        for item in reversed(items):
+            text = str(item)
+            if used + len(text) > limit:
+                if not parts:
+                    parts.append(f"{text[:limit]}…")
+                break
+            parts.append(text)
+            used += len(text)
+        skipped = len(items) - len(parts)
+        prefix = f"[…{skipped} earlier items] " if skipped else ""
+        return prefix + "[" + ", ".join(reversed(parts)) + "]"
+
+    __repr__ = __str__
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of records below WARNING for noisy loggers.
+    Warnings and errors are never dropped.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first, so "smart_planner.tools.x" wins over "smart_planner.tools"
+        self.sample_rates = sorted(sample_rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.sample_rates:
+            return True
+        for prefix, rate in self.sample_rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return random.random() < rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "message": record.getMessage(),
+        }
+        # Structured fields passed as logger.info(..., extra={"fields": {...}})
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+# Same shape as the original print() logs, e.g. "[main.py] INFO: Received query"
+TEXT_FORMAT = "%(asctime)s [%(filename)s] %(levelname)s: %(message)s"
+
+
+def configure_logging(settings: Optional[dict] = None, force: bool = False) -> None:
+    """
+    Configure the application loggers from the `logging` section of config.yaml.
+
+    Args:
+        settings (dict): level, format ("text" or "json"), max_payload_chars and
+                         sample_rates (logger name -> fraction of records kept).
+                         Read from config.yaml when None.
+        force (bool): Reconfigure even if logging was already set up.
+
+    The LOG_LEVEL environment variable overrides the configured level.
+    """
+    global _configured, _max_payload_chars
+
+    with _configure_lock:
+        if _configured and not force:
+            return
+
+        if settings is None:
+            try:
+                from utils.config_loader import load_config
+                settings = load_config().get("logging")
+            except Exception:
+                settings = None
+        settings = settings or {}
+
+        level = os.getenv("LOG_LEVEL") or settings.get("level", "INFO")
+        _max_payload_chars = settings.get("max_payload_chars", 500)
+
+        handler = logging.StreamHandler(sys.stdout)
+        if settings.get("format", "text") == "json":
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(TEXT_FORMAT, "%H:%M:%S"))
+        sample_rates = settings.get("sample_rates") or {}
+        if sample_rates:
+            handler.addFilter(SamplingFilter(sample_rates))
+
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        for old_handler in list(root.handlers):
+            root.removeHandler(old_handler)
+        root.addHandler(handler)
+        root.setLevel(str(level).upper())
+        root.propagate = False
+
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return an application logger, configuring logging on first use.
+
+    Args:
+        name (str): Module path, e.g. "agent.agentic_workflow".
+
+    Returns:
+        logging.Logger: Logger under the `smart_planner` namespace.
+    """
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
@@ -0,0 +1,283 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# ------------------------------
+# Metric primitives (Prometheus text exposition format)
+# ------------------------------
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines of this metric in the text exposition format."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests or errors."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down; can be computed at scrape time with `set_function`."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies, loop counts) in cumulative buckets."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds all metrics of the process and renders them for `/metrics`."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "smart_planner_http_requests_total", "API requests by route and status code.", ("path", "status"))
+HTTP_DURATION = registry.histogram(
+    "smart_planner_http_request_duration_seconds", "API request latency (time to response headers).", ("path",))
+GRAPH_NODE_DURATION = registry.histogram(
+    "smart_planner_graph_node_duration_seconds", "Time spent in each graph node.", ("node",))
+LLM_DURATION = registry.histogram(
+    "smart_planner_llm_duration_seconds", "LLM call latency by provider.", ("provider",))
+LLM_CALLS = registry.counter(
+    "smart_planner_llm_calls_total", "LLM calls by provider and outcome.", ("provider", "status"))
+TOOL_DURATION = registry.histogram(
+    "smart_planner_tool_duration_seconds", "Tool call latency by tool.", ("tool",))
+TOOL_CALLS = registry.counter(
+    "smart_planner_tool_calls_total", "Tool calls by tool and outcome.", ("tool", "status"))
+TOOL_OUTPUT_BYTES_SAVED = registry.counter(
+    "smart_planner_tool_output_bytes_saved_total", "Bytes removed from tool outputs by compaction.", ("tool",))
+TOOL_OUTPUT_TOKENS_SAVED = registry.counter(
+    "smart_planner_tool_output_tokens_saved_total", "Tokens removed from tool outputs by compaction.", ("tool",))
+UPSTREAM_DURATION = registry.histogram(
+    "smart_planner_upstream_duration_seconds", "Upstream HTTP API latency by provider.", ("upstream",))
+UPSTREAM_REQUESTS = registry.counter(
+    "smart_planner_upstream_requests_total", "Upstream HTTP API calls by provider and outcome.", ("upstream", "status"))
+UPSTREAM_QUEUE_WAIT = registry.histogram(
+    "smart_planner_upstream_queue_seconds", "Time spent waiting for an upstream rate-limit slot.", ("upstream",))
+UPSTREAM_QUEUE_TIMEOUTS = registry.counter(
+    "smart_planner_upstream_queue_timeouts_total", "Upstream calls abandoned after queueing past their deadline.",
+    ("upstream", "reason"))
+SINGLE_FLIGHT_CALLS = registry.counter(
+    "smart_planner_single_flight_calls_total",
+    "Upstream lookups by client; 'coalesced' calls waited on an identical call already in flight.",
+    ("name", "outcome"))
+DOCUMENT_EXPORTS = registry.counter(
+    "smart_planner_document_exports_total",
+    "Plan exports by format and outcome (written, deduplicated, failed, rejected).", ("format", "outcome"))
+AGENT_TOOL_LOOPS = registry.histogram(
+    "smart_planner_agent_tool_loops", "Agent -> tools round trips per request.", (),
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20))
+ACTIVE_CONVERSATIONS = registry.gauge(
+    "smart_planner_active_conversations", "Conversations currently held by the server.")
+
+
+# ------------------------------
+# Per-request spans (for the Server-Timing header)
+# ------------------------------
+class RequestSpans:
+    """
+    Accumulates time per category ("node", "llm", "tool", "upstream",
+    "upstream_queue") for one request, and counts agent <-> tools loops.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.tool_loops = 0
+        self._lock = threading.Lock()
+
+    def add(self, category: str, seconds: float) -> None:
+        with self._lock:
+            self.totals[category] = self.totals.get(category, 0.0) + seconds
+            self.counts[category] = self.counts.get(category, 0) + 1
+
+    def server_timing(self) -> str:
+        """
+        Render as a Server-Timing header value, e.g.
+        `llm;dur=812.4;desc="2 calls", tool;dur=301.0;desc="3 calls", total;dur=1130.2`.
+        Categories overlap (a tool span contains its upstream calls).
+        """
+        with self._lock:
+            items = list(self.totals.items())
+        parts = [
+            f'{category};dur={seconds * 1000:.1f};desc="{self.counts[category]} calls"'
+            for category, seconds in items
+        ]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# Spans of the request being served; propagated into tasks and executor threads
+current_spans: ContextVar[Optional[RequestSpans]] = ContextVar("current_spans", default=None)
+
+
+@contextmanager
+def track_request():
+    """
+    Bind a fresh RequestSpans to the current context for the duration of a run.
+
+    Yields:
+        RequestSpans: The spans collected for this request.
+    """
+    spans = RequestSpans()
+    token = current_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        try:
+            current_spans.reset(token)
+        except ValueError:
+            # A streaming generator closed from another context (client disconnect)
+            current_spans.set(None)
+        AGENT_TOOL_LOOPS.observe(spans.tool_loops)
+
+
+def record_upstream(upstream: str, seconds: float, status: str) -> None:
+    """Record one upstream HTTP call in the histograms and the current request's spans."""
+    UPSTREAM_DURATION.observe(seconds, upstream=upstream)
+    UPSTREAM_REQUESTS.inc(upstream=upstream, status=status)
+    spans = current_spans.get()
+    if spans is not None:
+        spans.add("upstream", seconds)
@@ -1,13 +1,15 @@
-from dotenv import load_dotenv
 from typing import Literal, Optional, Any
 from pydantic import BaseModel, Field
-from utils.config_loader import load_config  # custom function to load YAML config
-from langchain_groq import ChatGroq  # LangChain wrapper for Groq LLMs
-from langchain_openai import ChatOpenAI  # LangChain wrapper for OpenAI LLMs
-from langchain_google_genai import ChatGoogleGenerativeAI  # Import Google AI
+from utils.config_loader import load_config, load_environment  # config.yaml and .env, each read once
+# Provider SDKs are imported in `load_llm` only for the selected provider;
+# together they add more than a second to cold start
 import os
 
-load_dotenv()  # Load environment variables from .env file
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+load_environment()  # Load environment variables from .env file (once per process)
 
 
 # ------------------------------
@@ -21,7 +23,7 @@ class ConfigLoader:
     """
 
     def __init__(self):
-        print("Loaded config.....")
+        logger.debug("Loaded config.....")
         self.config = load_config()  # Load the YAML configuration
 
     def __getitem__(self, key):
@@ -55,41 +57,49 @@ class ModelLoader(BaseModel):
     # --------------------------
     # Load the selected LLM
     # --------------------------
-    def load_llm(self):
+    def load_llm(self, timeout: Optional[float] = None):
         """
         Load and return the LLM model (Groq, OpenAI, or Google).
         API keys are taken from environment variables.
         Model names are read from config.yaml.
+        Only the selected provider's SDK is imported.
+
+        Args:
+            timeout (float): Request timeout in seconds for the provider client; the SDK default if None.
         """
-        print("LLM loading...")
-        print(f"Loading model from provider: {self.model_provider}")
+        # Only passed when set, so each SDK keeps its own default otherwise
+        client_options = {"timeout": timeout} if timeout else {}
+        logger.info("Loading model from provider: %s", self.model_provider)
 
         # --------------------------
         # If Groq provider selected
         # --------------------------
         if self.model_provider == "groq":
-            print("Loading LLM from Groq..............")
+            from langchain_groq import ChatGroq  # LangChain wrapper for Groq LLMs
+
             groq_api_key = os.getenv("GROQ_API_KEY")  # load from .env
             model_name = self.config["llm"]["groq"]["model"]  # from config.yaml
-            llm = ChatGroq(model=model_name, api_key=groq_api_key)
+            llm = ChatGroq(model=model_name, api_key=groq_api_key, **client_options)
 
         # --------------------------
         # If OpenAI provider selected
         # --------------------------
         elif self.model_provider == "openai":
-            print("Loading LLM from OpenAI..............")
+            from langchain_openai import ChatOpenAI  # LangChain wrapper for OpenAI LLMs
+
             openai_api_key = os.getenv("OPENAI_API_KEY")  # load from .env
             model_name = self.config["llm"]["openai"]["model"]  # from config.yaml
-            llm = ChatOpenAI(model=model_name, api_key=openai_api_key)
+            llm = ChatOpenAI(model=model_name, api_key=openai_api_key, **client_options)
 
         # --------------------------
         # If Google provider selected
         # --------------------------
         elif self.model_provider == "google":
-            print("Loading LLM from Google..............")
+            from langchain_google_genai import ChatGoogleGenerativeAI  # Import Google AI
+
             google_api_key = os.getenv("GOOGLE_API_KEY")
             model_name = self.config["llm"]["google"]["model"]
-            llm = ChatGoogleGenerativeAI(model=model_name, google_api_key=google_api_key)
+            llm = ChatGoogleGenerativeAI(model=model_name, google_api_key=google_api_key, **client_options)
 
         # Return the loaded LLM object
         return llm
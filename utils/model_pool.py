@@ -0,0 +1,425 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from utils.logger import get_logger
+from utils.model_loader import ModelLoader
+
+logger = get_logger(__name__)
+
+# Environment variable holding each provider's key; providers without one are left out of the pool
+API_KEY_ENV = {"groq": "GROQ_API_KEY", "openai": "OPENAI_API_KEY", "google": "GOOGLE_API_KEY"}
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Runs sync calls that need a timeout or a hedge. A timed-out call keeps its
+# worker until the provider client's own request timeout ends it, so each
+# provider is also capped at `max_in_flight` calls (3 providers x 5 < 16 workers).
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="model-pool")
+
+
+class ProviderBusy(Exception):
+    """A provider already has `max_in_flight` calls running; the call fails over."""
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """
+    Classify a provider error as "timeout", "rate_limited" or "unavailable"
+    (all worth failing over), or None for errors another provider would
+    repeat (bad request, invalid tool schema, ...).
+    """
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    if isinstance(error, ProviderBusy):
+        return "unavailable"
+
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code  # google.api_core exceptions
+    if status == 429:
+        return "rate_limited"
+    if status in RETRYABLE_STATUS:
+        return "timeout" if status == 408 else "unavailable"
+
+    name = type(error).__name__
+    if "RateLimit" in name or "ResourceExhausted" in name:
+        return "rate_limited"
+    if "Timeout" in name:
+        return "timeout"
+    if any(marker in name for marker in ("APIConnectionError", "ServiceUnavailable", "InternalServerError")):
+        return "unavailable"
+    return None
+
+
+class ProviderStats:
+    """Latency/error EWMA and counters for one provider."""
+
+    def __init__(self, provider: str, model: str, ewma_alpha: float, max_in_flight: int = 5):
+        self.provider = provider
+        self.model = model
+        self.ewma_alpha = ewma_alpha
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.cooldown_until = 0.0
+        self.counters = {"calls": 0, "errors": 0, "timeouts": 0, "rate_limited": 0,
+                         "hedges_launched": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+
+    def _update_error(self, value: float) -> None:
+        self.error_ewma += self.ewma_alpha * (value - self.error_ewma)
+
+    def _update_latency(self, seconds: float) -> None:
+        self.latency_ewma = seconds if self.latency_ewma is None else (
+            self.latency_ewma + self.ewma_alpha * (seconds - self.latency_ewma))
+
+    def record_success(self, seconds: float) -> None:
+        with self._lock:
+            self.counters["calls"] += 1
+            self._update_latency(seconds)
+            self._update_error(0.0)
+
+    def record_abandoned(self, seconds: float) -> None:
+        """A call cancelled after losing a hedge: its elapsed time is a lower bound on latency."""
+        with self._lock:
+            self.counters["calls"] += 1
+            self._update_latency(seconds)
+
+    def record_failure(self, kind: Optional[str], cooldown_seconds: float) -> None:
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters["errors"] += 1
+            if kind == "timeout":
+                self.counters["timeouts"] += 1
+            elif kind == "rate_limited":
+                self.counters["rate_limited"] += 1
+            if kind in ("timeout", "rate_limited"):
+                # Stop routing here for a while instead of hitting the limit again
+                self.cooldown_until = time.time() + cooldown_seconds
+            self._update_error(1.0)
+
+    def try_acquire(self) -> bool:
+        """Take one in-flight slot without waiting; False when all are in use."""
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def record_hedge_launched(self) -> None:
+        with self._lock:
+            self.counters["hedges_launched"] += 1
+
+    def record_hedge_win(self) -> None:
+        with self._lock:
+            self.counters["hedge_wins"] += 1
+
+    def score(self, prior_latency: float, error_penalty: float) -> float:
+        """Expected cost of routing here: latency inflated by the recent error rate (lower is better)."""
+        latency = self.latency_ewma if self.latency_ewma is not None else prior_latency
+        return latency * (1 + error_penalty * self.error_ewma)
+
+    def cooling_down(self) -> bool:
+        return time.time() < self.cooldown_until
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "model": self.model,
+                **self.counters,
+                "in_flight": self.in_flight,
+                "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+                "error_rate_ewma": round(self.error_ewma, 3),
+                "cooling_down": self.cooling_down(),
+            }
+
+
+class ModelPool:
+    """
+    Several chat models (one per provider) behind the `invoke`/`ainvoke`/
+    `bind_tools` interface the agent uses.
+
+    Each call is routed to the provider with the lowest latency EWMA
+    (inflated by its error rate). On a timeout, a 429 or a 5xx the call fails
+    over to the next provider, and rate-limited or timed-out providers sit out
+    a cooldown. With `hedge_after_seconds` set, a call still running after
+    that deadline is also sent to the next-best provider and the first answer
+    wins. Hedged calls are tagged "hedge" so streaming consumers can skip
+    their tokens.
+    """
+
+    def __init__(self, models: Dict[str, Any], stats: Optional[Dict[str, ProviderStats]] = None,
+                 timeout_seconds: Optional[float] = 60, hedge_after_seconds: Optional[float] = None,
+                 cooldown_seconds: float = 30, error_penalty: float = 4.0,
+                 prior_latency_seconds: float = 2.0, ewma_alpha: float = 0.3, max_in_flight: int = 5):
+        """
+        Initialize the ModelPool.
+
+        Args:
+            models (Dict[str, Any]): Provider name -> chat model, in preference order.
+            stats (Dict[str, ProviderStats]): Shared stats (used by `bind_tools` copies).
+            timeout_seconds (float): Per-call timeout; None to wait indefinitely.
+            hedge_after_seconds (float): Deadline after which a slow call is hedged; None disables hedging.
+            cooldown_seconds (float): How long a rate-limited/timed-out provider is skipped.
+            error_penalty (float): Weight of the error-rate EWMA in the routing score.
+            prior_latency_seconds (float): Assumed latency of a provider with no samples yet.
+            ewma_alpha (float): Smoothing factor of the latency and error EWMAs.
+            max_in_flight (int): Calls allowed to run at once per provider; more fail over.
+        """
+        if not models:
+            raise ValueError("ModelPool needs at least one model.")
+        self.models = models
+        self.timeout_seconds = timeout_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.error_penalty = error_penalty
+        self.prior_latency_seconds = prior_latency_seconds
+        self._settings = dict(timeout_seconds=timeout_seconds, hedge_after_seconds=hedge_after_seconds,
+                              cooldown_seconds=cooldown_seconds, error_penalty=error_penalty,
+                              prior_latency_seconds=prior_latency_seconds, ewma_alpha=ewma_alpha,
+                              max_in_flight=max_in_flight)
+        self._stats = stats if stats is not None else {
+            provider: ProviderStats(provider, self._model_name(model), ewma_alpha, max_in_flight)
+            for provider, model in models.items()
+        }
+
+    @classmethod
+    def from_config(cls, settings: Optional[dict]) -> "ModelPool":
+        """
+        Build from the `model_pool` section of config.yaml, loading each
+        provider through ModelLoader. Providers without an API key are skipped.
+        Each client gets `timeout_seconds` as its own request timeout, so a call
+        the pool gave up on also ends in its worker thread.
+        """
+        settings = settings or {}
+        timeout_seconds = settings.get("timeout_seconds", 60)
+        models = {}
+        for provider in settings.get("providers", ["google", "groq", "openai"]):
+            if not os.getenv(API_KEY_ENV.get(provider, "")):
+                logger.info("Model pool: skipping '%s' (no %s set)", provider, API_KEY_ENV.get(provider))
+                continue
+            try:
+                models[provider] = ModelLoader(model_provider=provider).load_llm(timeout=timeout_seconds)
+            except Exception as e:
+                logger.warning("Model pool: could not load '%s': %s", provider, e)
+        logger.info("Model pool providers: %s", list(models))
+        return cls(
+            models,
+            timeout_seconds=timeout_seconds,
+            hedge_after_seconds=settings.get("hedge_after_seconds"),
+            cooldown_seconds=settings.get("cooldown_seconds", 30),
+            error_penalty=settings.get("error_penalty", 4.0),
+            prior_latency_seconds=settings.get("prior_latency_seconds", 2.0),
+            ewma_alpha=settings.get("ewma_alpha", 0.3),
+            max_in_flight=settings.get("max_in_flight", 5),
+        )
+
+    @staticmethod
+    def _model_name(model) -> str:
+        return getattr(model, "model", None) or getattr(model, "model_name", None) or type(model).__name__
+
+    @property
+    def model(self) -> str:
+        """Identity of the pool (used in cache keys)."""
+        return ",".join(f"{provider}/{self._model_name(model)}" for provider, model in self.models.items())
+
+    def bind_tools(self, tools, **kwargs) -> "ModelPool":
+        """Bind the tools on every provider; the returned pool shares this pool's stats."""
+        bound = {provider: model.bind_tools(tools, **kwargs) for provider, model in self.models.items()}
+        return ModelPool(bound, stats=self._stats, **self._settings)
+
+    def ranked(self) -> List[str]:
+        """Providers in routing order: available ones by score, cooling-down ones last."""
+        order = list(self.models)  # configured order breaks ties
+        return sorted(order, key=lambda provider: (
+            self._stats[provider].cooling_down(),
+            self._stats[provider].score(self.prior_latency_seconds, self.error_penalty),
+            order.index(provider),
+        ))
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-provider counters, latency and error EWMAs, in current routing order."""
+        return {provider: self._stats[provider].snapshot() for provider in self.ranked()}
+
+    @staticmethod
+    def _hedge_config(config: Optional[dict]) -> dict:
+        config = dict(config or {})
+        config["tags"] = [*(config.get("tags") or []), "hedge"]
+        return config
+
+    def _claim(self, provider: str) -> None:
+        if not self._stats[provider].try_acquire():
+            logger.warning("Model pool: '%s' has %d calls in flight; failing over", provider,
+                           self._stats[provider].max_in_flight)
+            raise ProviderBusy(f"Model pool: '{provider}' is at max in-flight")
+
+    def _record_failure(self, provider: str, error: BaseException) -> Optional[str]:
+        kind = classify_error(error)
+        self._stats[provider].record_failure(kind, self.cooldown_seconds)
+        logger.warning("Model pool: '%s' failed (%s): %s: %s", provider, kind or "error", type(error).__name__, error)
+        return kind
+
+    # --------------------------
+    # Async path
+    # --------------------------
+    async def _acall(self, provider: str, input: Any, config: Optional[dict], kwargs: dict):
+        self._claim(provider)
+        start = time.perf_counter()
+        try:
+            call = self.models[provider].ainvoke(input, config, **kwargs)
+            result = await (asyncio.wait_for(call, self.timeout_seconds) if self.timeout_seconds else call)
+        except asyncio.CancelledError:
+            # The losing side of a hedge: not an error, but it was at least this slow
+            self._stats[provider].record_abandoned(time.perf_counter() - start)
+            raise
+        except Exception as e:
+            self._record_failure(provider, e)
+            raise
+        finally:
+            self._stats[provider].release()
+        self._stats[provider].record_success(time.perf_counter() - start)
+        return result
+
+    async def _acall_hedged(self, primary: str, backup: str, input: Any, config: Optional[dict], kwargs: dict):
+        primary_task = asyncio.ensure_future(self._acall(primary, input, config, kwargs))
+        done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_after_seconds)
+        if done and (primary_task.exception() is None or classify_error(primary_task.exception()) is None):
+            return primary_task.result()  # Success, or an error another provider would repeat
+
+        # Primary is slow (or already failed): race it against the backup
+        if not done:
+            logger.info("Model pool: hedging slow '%s' call with '%s'", primary, backup)
+        self._stats[backup].record_hedge_launched()
+        backup_task = asyncio.ensure_future(self._acall(backup, input, self._hedge_config(config), kwargs))
+        pending = {backup_task} if done else {primary_task, backup_task}
+        error = primary_task.exception() if done else None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup_task:
+                            self._stats[backup].record_hedge_win()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def ainvoke(self, input: Any, config: Optional[dict] = None, **kwargs):
+        """
+        Route one async call through the pool.
+
+        Raises:
+            Exception: The first non-retryable error, or the last error once
+                       every provider has failed.
+        """
+        order = self.ranked()
+        last_error = None
+        i = 0
+        while i < len(order):
+            hedge = self.hedge_after_seconds is not None and i + 1 < len(order)
+            try:
+                if hedge:
+                    return await self._acall_hedged(order[i], order[i + 1], input, config, kwargs)
+                return await self._acall(order[i], input, config, kwargs)
+            except Exception as e:
+                if classify_error(e) is None:
+                    raise
+                last_error = e
+            i += 2 if hedge else 1
+        raise last_error
+
+    # --------------------------
+    # Sync path
+    # --------------------------
+    def _call(self, provider: str, input: Any, config: Optional[dict], kwargs: dict):
+        # The slot is held until the provider call really returns, even after the caller timed out
+        self._claim(provider)
+        start = time.perf_counter()
+        try:
+            result = self.models[provider].invoke(input, config, **kwargs)
+        except Exception as e:
+            self._record_failure(provider, e)
+            raise
+        finally:
+            self._stats[provider].release()
+        self._stats[provider].record_success(time.perf_counter() - start)
+        return result
+
+    def _submit(self, provider: str, input: Any, config: Optional[dict], kwargs: dict):
+        # Copy the context so callbacks/tracing of the current run follow the call into the thread
+        context = contextvars.copy_context()
+        return _executor.submit(context.run, self._call, provider, input, config, kwargs)
+
+    def _call_with_timeout(self, provider: str, input: Any, config: Optional[dict], kwargs: dict):
+        if not self.timeout_seconds:
+            return self._call(provider, input, config, kwargs)
+        future = self._submit(provider, input, config, kwargs)
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except TimeoutError as e:
+            # The worker thread cannot be interrupted: it ends at the client's request
+            # timeout, keeping its in-flight slot until then; its late result is discarded
+            self._record_failure(provider, e)
+            raise
+
+    def _call_hedged(self, primary: str, backup: str, input: Any, config: Optional[dict], kwargs: dict):
+        deadline = time.monotonic() + (self.timeout_seconds or float("inf"))
+        primary_future = self._submit(primary, input, config, kwargs)
+        done, _ = wait({primary_future}, timeout=self.hedge_after_seconds)
+        if done and (primary_future.exception() is None or classify_error(primary_future.exception()) is None):
+            return primary_future.result()  # Success, or an error another provider would repeat
+
+        if not done:
+            logger.info("Model pool: hedging slow '%s' call with '%s'", primary, backup)
+        self._stats[backup].record_hedge_launched()
+        backup_future = self._submit(backup, input, self._hedge_config(config), kwargs)
+        pending = {backup_future} if done else {primary_future, backup_future}
+        error = primary_future.exception() if done else None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                error = TimeoutError(f"Model pool: '{primary}' and '{backup}' timed out")
+                for provider, future in ((primary, primary_future), (backup, backup_future)):
+                    if future in pending:
+                        self._record_failure(provider, error)
+                raise error
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup_future:
+                        self._stats[backup].record_hedge_win()
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def invoke(self, input: Any, config: Optional[dict] = None, **kwargs):
+        """Sync variant of `ainvoke`."""
+        order = self.ranked()
+        last_error = None
+        i = 0
+        while i < len(order):
+            hedge = self.hedge_after_seconds is not None and i + 1 < len(order)
+            try:
+                if hedge:
+                    return self._call_hedged(order[i], order[i + 1], input, config, kwargs)
+                return self._call_with_timeout(order[i], input, config, kwargs)
+            except Exception as e:
+                if classify_error(e) is None:
+                    raise
+                last_error = e
+            i += 2 if hedge else 1
+        raise last_error
@@ -1,42 +1,226 @@
-from langchain_tavily import TavilySearch
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from utils.cache import TieredCache, normalize_key
+from utils.config_loader import load_config
+from utils.logger import Truncated, get_logger
+from utils.single_flight import SingleFlight
+
+logger = get_logger(__name__)
+
+
+# Query templates per search category
+SEARCH_QUERIES = {
+    "attractions": "top attractive places in and around {place}",
+    "restaurants": "what are the top 10 restaurants and eateries in and around {place}.",
+    "activities": "activties in and around {place}",
+    "transportation": "What are the different modes of transportations available in {place}",
+}
+
+_shared_cache = None
+_shared_executor = None
+_shared_lock = threading.Lock()
+
+# Like the cache, coalescing is process-wide: concurrent misses for the same
+# category and place (from any conversation) share one Tavily request
+_search_flights = SingleFlight("place_search")
+
+
+def get_place_search_cache() -> TieredCache:
+    """
+    Return the process-wide place search cache, built from the
+    `place_search_cache` section of config.yaml on first use.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = TieredCache.from_config(load_config().get("place_search_cache"))
+    return _shared_cache
+
+
+def get_place_search_executor() -> ThreadPoolExecutor:
+    """
+    Return the process-wide, bounded thread pool used to fan out sync searches.
+    Its size (`place_search.max_workers` in config.yaml) caps concurrent
+    Tavily calls across all conversations.
+    """
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_lock:
+            if _shared_executor is None:
+                max_workers = (load_config().get("place_search") or {}).get("max_workers", 8)
+                _shared_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="place-search")
+    return _shared_executor
 
 
 class TavilyPlaceSearchTool:
-    def __init__(self):
-        pass
+    def __init__(self, cache: TieredCache = None, ttl_seconds: dict = None):
+        """
+        Initialize the TavilyPlaceSearchTool.
+        Args:
+            cache (TieredCache): Result cache; defaults to the shared place search cache.
+            ttl_seconds (dict): Per-category TTLs; defaults to config.yaml values.
+        """
+        self.cache = cache if cache is not None else get_place_search_cache()
+        if ttl_seconds is None:
+            ttl_seconds = (load_config().get("place_search_cache") or {}).get("ttl_seconds", {})
+        self.ttl_seconds = ttl_seconds
+        self.flights = _search_flights
 
-    @staticmethod
-    def tavily_search_attractions(place: str) -> dict:
-        """Searches for attractions in the specified place using TavilySearch."""
+        # langchain_tavily (and aiohttp with it) is imported here, at startup
+        # warm-up, rather than when the API module is imported
+        from langchain_tavily import TavilySearch
+        from utils.tavily_client import PooledTavilySearchAPIWrapper
 
-        tavily_tool = TavilySearch(topic="general", include_answer="advanced")
-        result = tavily_tool.invoke({"query": f"top attractive places in and around {place}"})
-        print(result)
-        return result.get("answer") if isinstance(result, dict) and result.get("answer") else result
+        # Built once and reused for every search
+        self.tavily_tool = TavilySearch(
+            topic="general", include_answer="advanced", api_wrapper=PooledTavilySearchAPIWrapper()
+        )
 
     @staticmethod
-    def tavily_search_restaurants(place: str) -> dict:
-        """Searches for available restaurants in the specified place using TavilySearch."""
-
-        tavily_tool = TavilySearch(topic="general", include_answer="advanced")
-        result = tavily_tool.invoke({"query": f"what are the top 10 restaurants and eateries in and around {place}."})
-        print(result)
+    def _extract_answer(result):
+        """Prefer Tavily's generated answer; fall back to the raw result."""
         return result.get("answer") if isinstance(result, dict) and result.get("answer") else result
 
     @staticmethod
-    def tavily_search_activity(place: str) -> dict:
+    def _cache_key(category: str, place: str) -> str:
+        return f"{category}:{normalize_key(place)}"
+
+    @staticmethod
+    def _is_cacheable(result) -> bool:
+        # Never cache failures; they should be retried on the next call
+        return bool(result) and not (isinstance(result, dict) and result.get("error"))
+
+    def fetch_live(self, category: str, place: str):
+        """Run a Tavily search for one category, bypassing the cache (used by the index refresh)."""
+        result = self.tavily_tool.invoke({"query": SEARCH_QUERIES[category].format(place=place)})
+        logger.debug("Tavily result for '%s / %s': %s", category, place, Truncated(result))
+        return self._extract_answer(result)
+
+    def _search(self, category: str, place: str):
+        """Run a cached Tavily search for one category."""
+        key = self._cache_key(category, place)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug("Cache hit for '%s'", key)
+            return cached
+
+        def fetch():
+            # A flight that finished after the lookup above has already filled the (memory) cache
+            cached = self.cache.memory.peek(key)
+            if cached is not None:
+                return cached
+            result = self.fetch_live(category, place)
+            if self._is_cacheable(result):
+                self.cache.set(key, result, ttl=self.ttl_seconds.get(category))
+            return result
+
+        return self.flights.do(key, fetch)
+
+    async def _asearch(self, category: str, place: str):
+        """Async variant of `_search`; cache disk I/O runs off the event loop."""
+        key = self._cache_key(category, place)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            return cached
+
+        async def fetch():
+            # A flight that finished after the lookup above has already filled the (memory) cache
+            cached = self.cache.memory.peek(key)
+            if cached is not None:
+                return cached
+            result = await self.tavily_tool.ainvoke({"query": SEARCH_QUERIES[category].format(place=place)})
+            result = self._extract_answer(result)
+
+            if self._is_cacheable(result):
+                await self.cache.aset(key, result, ttl=self.ttl_seconds.get(category))
+            return result
+
+        return await self.flights.ado(key, fetch)
+
+    def tavily_search_attractions(self, place: str) -> dict:
+        """Searches for attractions in the specified place using TavilySearch."""
+        return self._search("attractions", place)
+
+    def tavily_search_restaurants(self, place: str) -> dict:
+        """Searches for available restaurants in the specified place using TavilySearch."""
+        return self._search("restaurants", place)
+
+    def tavily_search_activity(self, place: str) -> dict:
         """Searches for popular activities in the specified place using TavilySearch."""
+        return self._search("activities", place)
 
-        tavily_tool = TavilySearch(topic="general", include_answer="advanced")
-        result = tavily_tool.invoke({"query": f"activties in and around {place}"})
-        print(result)
-        return result.get("answer") if isinstance(result, dict) and result.get("answer") else result
+    def tavily_search_transportation(self, place: str) -> dict:
+        """Searches for available modes of transportation in the specified place using TavilySearch."""
+        return self._search("transportation", place)
 
+    # --------------------------
+    # Async variants (non-blocking for the event loop)
+    # --------------------------
+    async def atavily_search_attractions(self, place: str) -> dict:
+        """Async variant of `tavily_search_attractions`."""
+        return await self._asearch("attractions", place)
+
+    async def atavily_search_restaurants(self, place: str) -> dict:
+        """Async variant of `tavily_search_restaurants`."""
+        return await self._asearch("restaurants", place)
+
+    async def atavily_search_activity(self, place: str) -> dict:
+        """Async variant of `tavily_search_activity`."""
+        return await self._asearch("activities", place)
+
+    async def atavily_search_transportation(self, place: str) -> dict:
+        """Async variant of `tavily_search_transportation`."""
+        return await self._asearch("transportation", place)
+
+    # --------------------------
+    # Combined destination profile (all categories concurrently)
+    # --------------------------
     @staticmethod
-    def tavily_search_transportation(place: str) -> dict:
-        """Searches for available modes of transportation in the specified place using TavilySearch."""
+    def resolve_categories(categories: Optional[Iterable[str]]) -> list:
+        if not categories:
+            return list(SEARCH_QUERIES)
+        unknown = [category for category in categories if category not in SEARCH_QUERIES]
+        if unknown:
+            raise ValueError(f"Unknown categories {unknown}; expected any of {list(SEARCH_QUERIES)}")
+        return list(dict.fromkeys(categories))  # de-duplicate, keep order
 
-        tavily_tool = TavilySearch(topic="general", include_answer="advanced")
-        result = tavily_tool.invoke({"query": f"What are the different modes of transportations available in {place}"})
-        print(result)
-        return result.get("answer") if isinstance(result, dict) and result.get("answer") else result
+    def search_destination_profile(self, place: str, categories: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        """
+        Run the searches for several categories concurrently on the shared thread pool.
+
+        Args:
+            place (str): Destination name.
+            categories (Iterable[str]): Subset of SEARCH_QUERIES keys; all when omitted.
+
+        Returns:
+            dict: Category -> result. A failed category maps to {"error": message}
+                  instead of failing the whole profile.
+        """
+        executor = get_place_search_executor()
+        # One context copy per search, so request spans and tracing follow each into its thread
+        futures = {category: executor.submit(contextvars.copy_context().run, self._search, category, place)
+                   for category in self.resolve_categories(categories)}
+
+        results = {}
+        for category, future in futures.items():
+            try:
+                results[category] = future.result()
+            except Exception as e:
+                results[category] = {"error": str(e)}
+        return results
+
+    async def asearch_destination_profile(self, place: str, categories: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        """Async variant of `search_destination_profile` (uses asyncio.gather)."""
+        categories = self.resolve_categories(categories)
+        outcomes = await asyncio.gather(
+            *(self._asearch(category, place) for category in categories), return_exceptions=True
+        )
+        return {
+            category: {"error": str(outcome)} if isinstance(outcome, Exception) else outcome
+            for category, outcome in zip(categories, outcomes)
+        }
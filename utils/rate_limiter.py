@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+from utils.config_loader import load_config
+from utils.logger import get_logger
+from utils.metrics import UPSTREAM_QUEUE_TIMEOUTS, UPSTREAM_QUEUE_WAIT, current_spans
+
+logger = get_logger(__name__)
+
+
+class UpstreamQueueTimeout(TimeoutError):
+    """Raised when a call could not get an upstream slot before its deadline."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by sync and async callers.
+
+    Tokens are handed out by reservation: a caller that finds the bucket
+    empty is given the time its token becomes available and the bucket goes
+    into debt, so waiting callers are served in arrival order at `rate`.
+    """
+
+    def __init__(self, rate_per_second: float, burst: float):
+        self.rate = rate_per_second
+        self.capacity = max(burst, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Take one token, possibly from the future.
+
+        Args:
+            max_wait (float): Longest acceptable wait for the token.
+
+        Returns:
+            float: Seconds to wait before using the token, or None (nothing
+                   reserved) if that would exceed `max_wait`.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (1.0 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1.0
+            return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for `seconds` (e.g. after a 429 with Retry-After)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class UpstreamLimiter:
+    """
+    Rate limit plus max-in-flight cap for one upstream API.
+
+    Callers over either limit queue for up to `max_wait_seconds`, then get
+    UpstreamQueueTimeout. The bucket is process-wide; the in-flight cap is
+    enforced separately for sync callers and for each event loop.
+    """
+
+    def __init__(self, name: str, rate_per_second: float, burst: float = 1, max_in_flight: int = 10,
+                 max_wait_seconds: float = 10):
+        """
+        Initialize the UpstreamLimiter.
+
+        Args:
+            name (str): Upstream name used in metrics (e.g. "tavily").
+            rate_per_second (float): Sustained request rate.
+            burst (float): Requests allowed at once after an idle period.
+            max_in_flight (int): Concurrent requests allowed.
+            max_wait_seconds (float): Longest a caller queues before giving up.
+        """
+        self.name = name
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.max_in_flight = max_in_flight
+        self.max_wait_seconds = max_wait_seconds
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_slots.get(loop)
+        if semaphore is None:
+            semaphore = self._async_slots[loop] = asyncio.Semaphore(self.max_in_flight)
+        return semaphore
+
+    def _timeout(self, reason: str) -> UpstreamQueueTimeout:
+        UPSTREAM_QUEUE_TIMEOUTS.inc(upstream=self.name, reason=reason)
+        logger.warning("Upstream '%s' still %s after %.1fs; giving up", self.name, reason, self.max_wait_seconds)
+        return UpstreamQueueTimeout(f"{self.name}: {reason} for more than {self.max_wait_seconds}s")
+
+    def _record_wait(self, seconds: float) -> None:
+        UPSTREAM_QUEUE_WAIT.observe(seconds, upstream=self.name)
+        spans = current_spans.get()
+        if spans is not None and seconds > 0.001:
+            spans.add("upstream_queue", seconds)
+
+    @contextmanager
+    def acquire(self):
+        """Hold one request slot (sync), waiting for a slot and a token first."""
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.max_wait_seconds):
+            raise self._timeout("at max in-flight")
+        try:
+            wait = self.bucket.reserve(self.max_wait_seconds - (time.monotonic() - start))
+            if wait is None:
+                raise self._timeout("rate limited")
+            if wait > 0:
+                time.sleep(wait)
+            self._record_wait(time.monotonic() - start)
+            yield
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def aacquire(self):
+        """Async variant of `acquire`; waiting never blocks the event loop."""
+        start = time.monotonic()
+        semaphore = self._async_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            raise self._timeout("at max in-flight") from None
+        try:
+            wait = self.bucket.reserve(self.max_wait_seconds - (time.monotonic() - start))
+            if wait is None:
+                raise self._timeout("rate limited")
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._record_wait(time.monotonic() - start)
+            yield
+        finally:
+            semaphore.release()
+
+    def backoff(self, seconds: float) -> None:
+        """Stop sending to this upstream for `seconds` (it answered 429)."""
+        logger.warning("Upstream '%s' is rate limiting us; pausing for %.1fs", self.name, seconds)
+        self.bucket.pause(seconds)
+
+
+# ------------------------------
+# Limiters per upstream, built from the `rate_limits` section of config.yaml
+# ------------------------------
+_limiters: Optional[Dict[str, UpstreamLimiter]] = None
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(upstream: str) -> Optional[UpstreamLimiter]:
+    """
+    Return the limiter for an upstream name (see http_client.UPSTREAM_NAMES),
+    or None when rate limiting is disabled or the upstream is not configured.
+    """
+    global _limiters
+    if _limiters is None:
+        with _limiters_lock:
+            if _limiters is None:
+                settings = load_config().get("rate_limits") or {}
+                limiters = {}
+                if settings.get("enabled", True):
+                    for name, limits in (settings.get("upstreams") or {}).items():
+                        limiters[name] = UpstreamLimiter(name, **limits)
+                _limiters = limiters
+    return _limiters.get(upstream)
+
+
+def reset_limiters() -> None:
+    """Drop all limiters; they are rebuilt from the current config on next use."""
+    global _limiters
+    with _limiters_lock:
+        _limiters = None
@@ -1,41 +1,34 @@
 import os
 import datetime
-import textwrap
+
+from utils.document_export import content_address, render_markdown
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 def save_document(response_text: str, directory: str = "./output", filename: str = None):
-    """Export travel plan to Markdown file with proper formatting."""
+    """
+    Export travel plan to Markdown file with proper formatting (synchronously;
+    the API uses utils.document_export.DocumentExporter instead).
+    """
     os.makedirs(directory, exist_ok=True)
 
     # Create markdown content with metadata header
-    markdown_content = textwrap.dedent(f"""\
-    # 🌍 AI Travel Plan
-
-    # **Generated:** {datetime.datetime.now().strftime('%Y-%m-%d at %H:%M')}  
-    # **Created by:** Travel Agent
-
-    ---
-
-    {response_text}
-
-    ---
-
-    *This travel plan was generated by AI. Please verify all information, especially prices, operating hours, and travel requirements before your trip.*
-    """)
+    markdown_content = render_markdown(response_text, datetime.datetime.now())
 
     try:
-        # Generate timestamp-based filename if not provided
+        # Name the file after its content so repeated saves of a plan never collide
         if not filename:
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            filename = f"AI_Trip_Planner_{timestamp}.md"
+            filename = f"travel_plan_{content_address(response_text)}.md"
         filepath = os.path.join(directory, filename)
 
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(markdown_content)
 
-        print(f"Markdown file saved as: {filepath}")
+        logger.info("Markdown file saved as: %s", filepath)
         return filepath
 
     except Exception as e:
-        print(f"Error saving markdown file: {e}")
+        logger.error("Error saving markdown file: %s", e)
         return None
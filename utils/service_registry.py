@@ -0,0 +1,135 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from utils import http_client
+from utils.config_loader import load_config, load_environment, reload_config
+from utils.currency_converter import CurrencyConverter
+from utils.destination_index import DestinationIndex
+from utils.logger import configure_logging, get_logger
+from utils.model_loader import ModelLoader
+from utils.model_pool import ModelPool
+from utils.place_search import TavilyPlaceSearchTool
+from utils.weather_info import WeatherForecastTool
+
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+
+class ServiceRegistry:
+    """
+    Process-wide home of config, environment and upstream clients.
+
+    Config and .env are loaded once; each client (LLM per provider, weather,
+    currency, Tavily search) is built on first use and then shared by every
+    GraphBuilder and tool wrapper. `warm_up` builds them at startup so no
+    initialization happens on the request path; `reload` re-reads config and
+    .env and drops the clients so they are rebuilt with the new settings.
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, key: str, factory: Callable[[], Any]) -> Any:
+        # A factory may return None (feature disabled); that outcome is cached too
+        instance = self._instances.get(key, _MISSING)
+        if instance is not _MISSING:
+            return instance
+
+        # Double-checked locking so concurrent first users build a client only once
+        with self._lock:
+            instance = self._instances.get(key, _MISSING)
+            if instance is _MISSING:
+                logger.info("Initializing shared client '%s'", key)
+                instance = self._instances[key] = factory()
+        return instance
+
+    @property
+    def config(self) -> dict:
+        """The parsed config.yaml (read-only)."""
+        return load_config()
+
+    def llm(self, model_provider: str = "google"):
+        """
+        Shared chat model for a provider ("groq", "openai", "google"), or the
+        ModelPool over all configured providers for "pool".
+        """
+        load_environment()
+        if model_provider == "pool":
+            return self._get("llm:pool", lambda: ModelPool.from_config(self.config.get("model_pool")))
+        return self._get(f"llm:{model_provider}", lambda: ModelLoader(model_provider=model_provider).load_llm())
+
+    def weather_service(self) -> WeatherForecastTool:
+        """Shared OpenWeatherMap client (with its per-city caches)."""
+        load_environment()
+        return self._get("weather", lambda: WeatherForecastTool(os.environ.get("OPENWEATHERMAP_API_KEY")))
+
+    def currency_service(self) -> CurrencyConverter:
+        """Shared ExchangeRate-API client (with its rate-table cache)."""
+        load_environment()
+        return self._get("currency", lambda: CurrencyConverter(os.environ.get("EXCHANGE_RATE_API_KEY")))
+
+    def place_search(self) -> TavilyPlaceSearchTool:
+        """Shared Tavily search client."""
+        load_environment()
+        return self._get("place_search", TavilyPlaceSearchTool)
+
+    def destination_index(self) -> Optional[DestinationIndex]:
+        """
+        Shared local destination index, or None when disabled or not built yet.
+        A cached None is dropped once the index file exists, so an index built
+        while the API runs is picked up.
+        """
+        settings = self.config.get("destination_index")
+        index = self._get("destination_index", lambda: DestinationIndex.from_config(settings))
+        if index is None:
+            path = DestinationIndex.configured_path(settings)
+            if path is not None and os.path.exists(path):
+                with self._lock:
+                    if self._instances.get("destination_index") is None:
+                        self._instances.pop("destination_index", None)
+                index = self._get("destination_index", lambda: DestinationIndex.from_config(settings))
+        return index
+
+    def warm_up(self, model_providers: Iterable[str] = ()) -> None:
+        """
+        Build every client ahead of the first request.
+
+        Args:
+            model_providers (Iterable[str]): LLM providers to load.
+        """
+        for model_provider in model_providers:
+            self.llm(model_provider)
+        self.weather_service()
+        self.currency_service()
+        self.place_search()
+        self.destination_index()
+        http_client.get_session()
+
+    def clear(self) -> None:
+        """Drop all shared clients; the next lookup rebuilds them. The destination index is closed."""
+        with self._lock:
+            index = self._instances.get("destination_index")
+            self._instances.clear()
+        if index is not None:
+            index.close()
+
+    def reload(self) -> None:
+        """
+        Re-read config.yaml and .env and drop all shared clients; the next
+        lookup rebuilds them. Compiled graphs keep their old clients until
+        rebuilt (see GraphRegistry.reload).
+        """
+        with self._lock:
+            reload_config()
+            load_environment(reload=True)
+            configure_logging(force=True)
+            http_client.reset()
+            self.clear()
+        logger.info("Config and environment reloaded; shared clients will be rebuilt")
+
+
+# Shared instance used by the API process
+services = ServiceRegistry()
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+from utils.metrics import SINGLE_FLIGHT_CALLS
+
+
+class _LeaderCancelled(Exception):
+    """The call that others were waiting on was cancelled; they retry it themselves."""
+
+
+def _copy_error(error: BaseException) -> BaseException:
+    """
+    A copy of a flight's exception for one waiter. Raising appends to an
+    exception's traceback, so waiters in different threads must not all raise
+    the leader's instance.
+    """
+    try:
+        copy = type(error).__new__(type(error), *error.args)
+        copy.__dict__.update(getattr(error, "__dict__", {}))
+    except Exception:
+        return error
+    return copy
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for a key is in flight,
+    further callers with the same key wait for its outcome instead of issuing
+    their own upstream request, and all of them get its result or its error
+    (each waiter raises its own copy, chained to the leader's exception).
+
+    Sync (thread-pool) and async callers share the same flights; the outcome
+    is published on a concurrent.futures.Future, which threads wait on directly
+    and coroutines await via `asyncio.wrap_future`. Nothing is cached: once a
+    call completes, the next caller starts a new one.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the SingleFlight.
+
+        Args:
+            name (str): Label for the coalescing metrics (e.g. "weather").
+        """
+        self.name = name
+        self._flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _join(self, key: str):
+        """Return (future, is_leader) for a key, starting a flight if none is running."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                outcome = "coalesced"
+            else:
+                future = Future()
+                # A running future cannot be cancelled by a waiter giving up
+                future.set_running_or_notify_cancel()
+                self._flights[key] = future
+                self.leaders += 1
+                outcome = "leader"
+        SINGLE_FLIGHT_CALLS.inc(name=self.name, outcome=outcome)
+        return future, outcome == "leader"
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    @staticmethod
+    def _outcome(future) -> Any:
+        """
+        Result of a finished flight (a concurrent or asyncio future); its error
+        is raised as this waiter's own copy.
+        """
+        error = future.exception()
+        if error is None:
+            return future.result()
+        raise _copy_error(error) from error
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """
+        Run `func()` unless an identical call is already in flight, in which
+        case wait for that call's outcome.
+
+        Args:
+            key (str): Identity of the call (same key = same upstream request).
+            func (Callable): Performs the call.
+
+        Returns:
+            Any: The result of the call (shared by every coalesced caller).
+        """
+        while True:
+            future, is_leader = self._join(key)
+            if is_leader:
+                try:
+                    result = func()
+                except BaseException as e:
+                    future.set_exception(e)
+                    raise
+                else:
+                    future.set_result(result)
+                    return result
+                finally:
+                    self._finish(key, future)
+            if isinstance(future.exception(), _LeaderCancelled):
+                continue
+            return self._outcome(future)
+
+    async def ado(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async variant of `do`; `func` returns an awaitable. Waiting never
+        blocks the event loop, and a flight led by a thread is awaited too.
+        """
+        while True:
+            future, is_leader = self._join(key)
+            if is_leader:
+                try:
+                    result = await func()
+                except asyncio.CancelledError:
+                    # The leader's request went away; let the waiters run the call instead
+                    future.set_exception(_LeaderCancelled())
+                    raise
+                except BaseException as e:
+                    future.set_exception(e)
+                    raise
+                else:
+                    future.set_result(result)
+                    return result
+                finally:
+                    self._finish(key, future)
+            # Wait without raising: the outcome is read from the finished future
+            waiter = asyncio.wrap_future(future)
+            try:
+                await asyncio.wait({waiter})
+            except asyncio.CancelledError:
+                waiter.cancel()  # Only detaches this waiter; the flight itself is running
+                raise
+            if isinstance(waiter.exception(), _LeaderCancelled):
+                continue
+            return self._outcome(waiter)
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._flights)
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": in_flight}
@@ -0,0 +1,45 @@
+# langchain_tavily exports no public path for the wrapper class that TavilySearch
+# validates `api_wrapper` against; requirements.txt pins langchain-tavily to the
+# version this subclass is tested with (0.2.13), so upgrades are deliberate
+from langchain_tavily._utilities import TavilySearchAPIWrapper
+
+from utils import http_client
+
+# Defined here rather than imported with the wrapper's other internals
+TAVILY_API_URL = "https://api.tavily.com"
+
+
+class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    """
+    TavilySearchAPIWrapper that sends requests through the shared pooled
+    transport (keep-alive connections, configured timeouts) instead of a
+    fresh `requests.post` / aiohttp session per call.
+    """
+
+    def _request_args(self, query: str, kwargs: dict) -> tuple:
+        params = {"query": query, **{k: v for k, v in kwargs.items() if v is not None}}
+        headers = {
+            "Authorization": f"Bearer {self.tavily_api_key.get_secret_value()}",
+            "Content-Type": "application/json",
+            "X-Client-Source": "langchain-tavily",
+        }
+        return f"{self.api_base_url or TAVILY_API_URL}/search", params, headers
+
+    @staticmethod
+    def _parse(response) -> dict:
+        if response.status_code != 200:
+            try:
+                detail = response.json().get("detail", {})
+            except Exception:
+                detail = {}
+            error_message = detail.get("error") if isinstance(detail, dict) else "Unknown error"
+            raise ValueError(f"Error {response.status_code}: {error_message}")
+        return response.json()
+
+    def raw_results(self, query: str, **kwargs) -> dict:
+        url, params, headers = self._request_args(query, kwargs)
+        return self._parse(http_client.request("POST", url, json=params, headers=headers))
+
+    async def raw_results_async(self, query: str, **kwargs) -> dict:
+        url, params, headers = self._request_args(query, kwargs)
+        return self._parse(await http_client.arequest("POST", url, json=params, headers=headers))
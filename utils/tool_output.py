@@ -0,0 +1,198 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from utils.cache import normalize_key
+from utils.logger import get_logger
+from utils.metrics import TOOL_OUTPUT_BYTES_SAVED, TOOL_OUTPUT_TOKENS_SAVED
+
+logger = get_logger(__name__)
+
+_MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_URL = re.compile(r"(?:https?://|www\.)\S+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-ZÀ-Ỹ0-9\"'(])")
+# Navigation / legal / promo fragments scraped along with page content
+_BOILERPLATE = re.compile(
+    r"cookie|privacy policy|terms of (use|service)|all rights reserved|subscribe|sign up|log ?in\b|newsletter"
+    r"|advertisement|skip to (main )?content|read more|click here|share (this|on)|follow us|©",
+    re.IGNORECASE,
+)
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def render_search_result(result) -> str:
+    """
+    Render a raw Tavily result dict (no generated answer) as plain text: one
+    line per hit with its page content only (titles, URLs, scores and request
+    metadata add tokens but little for planning). Other values are returned
+    as their string form.
+    """
+    if isinstance(result, dict) and isinstance(result.get("results"), list):
+        lines = [
+            " ".join((hit.get("content") or "").split())
+            for hit in result["results"] if isinstance(hit, dict)
+        ]
+        return "\n".join(line for line in lines if line)
+    return str(result)
+
+
+class ToolOutputCompactor:
+    """
+    Trims string tool outputs to a per-tool token budget before they become
+    ToolMessages (which are re-sent on every later agent turn).
+
+    Compaction is extractive: URLs, link markup and short boilerplate lines
+    are removed, duplicate segments dropped, and if the output is still over
+    budget whole segments are kept in order of position within each section
+    ("#" headings), taken round-robin across sections so each keeps its
+    lead. A heading counts against the budget and is kept only with its
+    section's first kept segment. Outputs already within budget are
+    returned unchanged.
+    """
+
+    def __init__(self, max_tokens: Optional[Dict[str, int]] = None, default_max_tokens: int = 600,
+                 count_tokens: Optional[Callable[[str], int]] = None):
+        """
+        Initialize the ToolOutputCompactor.
+
+        Args:
+            max_tokens (Dict[str, int]): Budget per tool name.
+            default_max_tokens (int): Budget for tools not listed.
+            count_tokens (Callable): Token counter; defaults to a ~4 characters/token estimate.
+        """
+        self.max_tokens = max_tokens or {}
+        self.default_max_tokens = default_max_tokens
+        self.count_tokens = count_tokens or _estimate_tokens
+
+    @classmethod
+    def from_config(cls, settings: Optional[dict],
+                    count_tokens: Optional[Callable[[str], int]] = None) -> Optional["ToolOutputCompactor"]:
+        """Build from the `tool_output` section of config.yaml; None when disabled."""
+        settings = settings or {}
+        if not settings.get("enabled", True):
+            return None
+        return cls(
+            max_tokens=settings.get("max_tokens") or {},
+            default_max_tokens=settings.get("default_max_tokens", 600),
+            count_tokens=count_tokens,
+        )
+
+    # --------------------------
+    # Compaction
+    # --------------------------
+    @staticmethod
+    def _is_heading(line: str) -> bool:
+        # Only Markdown headings; scraped prose often ends lines with ":" too
+        return line.startswith("#")
+
+    def _sections(self, text: str) -> List[Tuple[Optional[str], List[str]]]:
+        """Clean the text and split it into (heading, de-duplicated segments) sections."""
+        text = _URL.sub("", _MARKDOWN_LINK.sub(r"\1", text))
+        sections: List[Tuple[Optional[str], List[str]]] = [(None, [])]
+        seen = set()
+        for line in text.splitlines():
+            line = " ".join(line.split())
+            if not line:
+                continue
+            if self._is_heading(line):
+                # A repeated heading continues the current section
+                key = normalize_key(line)
+                if key and key not in seen:
+                    seen.add(key)
+                    sections.append((line, []))
+                continue
+            for segment in _SENTENCE_END.split(line):
+                key = normalize_key(segment)
+                if not key or key in seen:
+                    continue
+                if len(key.split()) < 12 and _BOILERPLATE.search(segment):
+                    continue
+                seen.add(key)
+                sections[-1][1].append(segment)
+        return [(heading, segments) for heading, segments in sections if heading or segments]
+
+    def compact(self, tool_name: str, text: str) -> str:
+        """
+        Compact one tool output.
+
+        Args:
+            tool_name (str): Name of the tool (selects the budget).
+            text (str): The tool's output.
+
+        Returns:
+            str: The compacted output.
+        """
+        budget = self.max_tokens.get(tool_name, self.default_max_tokens)
+        if self.count_tokens(text) <= budget:
+            return text
+
+        sections = self._sections(text)
+        # Segments are taken by rank (1st of every section, then 2nd, ...)
+        # while they fit in the budget; a section's heading is paid for with
+        # its first kept segment, and headings of empty sections are dropped
+        used = self.count_tokens("[999 less relevant passages omitted]")  # Room for the note below
+        kept = [[False] * len(segments) for _, segments in sections]
+        for rank in range(max((len(segments) for _, segments in sections), default=0)):
+            for s, (heading, segments) in enumerate(sections):
+                if rank < len(segments):
+                    cost = self.count_tokens(segments[rank])
+                    if heading and not any(kept[s]):
+                        cost += self.count_tokens(heading)
+                    if used + cost <= budget:
+                        kept[s][rank] = True
+                        used += cost
+
+        lines, dropped = [], 0
+        for s, (heading, segments) in enumerate(sections):
+            body = [segment for i, segment in enumerate(segments) if kept[s][i]]
+            dropped += len(segments) - len(body)
+            if body:
+                if heading:
+                    lines.append(heading)
+                lines.append(" ".join(body))
+        compacted = "\n".join(lines)
+        if dropped:
+            compacted += f"\n[{dropped} less relevant passages omitted]"
+
+        saved_bytes = len(text.encode()) - len(compacted.encode())
+        saved_tokens = self.count_tokens(text) - self.count_tokens(compacted)
+        TOOL_OUTPUT_BYTES_SAVED.inc(max(saved_bytes, 0), tool=tool_name)
+        TOOL_OUTPUT_TOKENS_SAVED.inc(max(saved_tokens, 0), tool=tool_name)
+        logger.debug("Compacted '%s' output: %d -> %d bytes", tool_name, len(text.encode()), len(compacted.encode()))
+        return compacted
+
+    # --------------------------
+    # Tool wrapping
+    # --------------------------
+    def wrap(self, tool: BaseTool) -> BaseTool:
+        """
+        Return a copy of a StructuredTool whose string outputs are compacted.
+        Name, description and argument schema are unchanged; other tools and
+        non-string outputs pass through.
+        """
+        if not isinstance(tool, StructuredTool):
+            return tool
+
+        def compact(output):
+            return self.compact(tool.name, output) if isinstance(output, str) else output
+
+        func = coroutine = None
+        if tool.func is not None:
+            def func(*args, **kwargs):
+                return compact(tool.func(*args, **kwargs))
+        if tool.coroutine is not None:
+            async def coroutine(*args, **kwargs):
+                return compact(await tool.coroutine(*args, **kwargs))
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            func=func,
+            coroutine=coroutine,
+            return_direct=tool.return_direct,
+        )
@@ -1,4 +1,10 @@
-import requests
+import time
+from typing import Optional
+
+from utils import http_client
+from utils.cache import TTLCache, normalize_key
+from utils.config_loader import load_config
+from utils.single_flight import SingleFlight
 
 class WeatherForecastTool:
     def __init__(self, api_key: str):
@@ -10,6 +16,100 @@ class WeatherForecastTool:
         self.api_key = api_key
         self.base_url = "https://api.openweathermap.org/data/2.5"
 
+        # Per-city caches: short TTL for current conditions, longer for forecasts
+        settings = load_config().get("weather") or {}
+        max_entries = settings.get("max_entries", 256)
+        self.current_cache = TTLCache(max_entries, settings.get("current_ttl_seconds", 600))
+        self.forecast_cache = TTLCache(max_entries, settings.get("forecast_ttl_seconds", 3600))
+
+        # When enabled, a current-weather miss is answered from the forecast
+        # (one upstream call for both tools) if a forecast slot is close enough to now.
+        # Slots are 3 hours apart and the first one can be up to 3 hours ahead, so a
+        # shorter limit often misses and costs a forecast call plus a current call.
+        self.derive_current_from_forecast = settings.get("derive_current_from_forecast", True)
+        self.current_max_staleness = settings.get("current_max_staleness_seconds", 10800)
+
+        # Concurrent cache misses for the same city share one upstream call
+        self.flights = SingleFlight("weather")
+
+    def _current_params(self, place: str) -> dict:
+        return {
+            "q": place,
+            "appid": self.api_key,
+            "units": "metric"
+        }
+
+    def _forecast_params(self, place: str) -> dict:
+        return {
+            "q": place,
+            "appid": self.api_key,
+            "cnt": 10,           # Number of forecast entries (each is 3-hour step)
+            "units": "metric"    # Temp in Celsius instead of Kelvin
+        }
+
+    @staticmethod
+    def _is_cacheable(data: dict) -> bool:
+        # Failed calls return {} or {"error": ...} and must not be cached
+        return bool(data) and "error" not in data
+
+    def _derive_current(self, forecast: dict) -> Optional[dict]:
+        """
+        Build a current-weather shaped dict from the forecast slot nearest to now,
+        or return None if no slot is within `current_max_staleness` seconds.
+        """
+        slots = forecast.get("list") or []
+        if not slots:
+            return None
+
+        now = time.time()
+        nearest = min(slots, key=lambda item: abs(item.get("dt", 0) - now))
+        if abs(nearest.get("dt", 0) - now) > self.current_max_staleness:
+            return None
+
+        return {
+            "name": (forecast.get("city") or {}).get("name"),
+            "dt": nearest.get("dt"),
+            "main": nearest.get("main", {}),
+            "weather": nearest.get("weather", [{}]),
+            "derived_from_forecast": True,
+        }
+
+    def _fetch_current(self, place: str) -> dict:
+        try:
+            url = f"{self.base_url}/weather"
+            response = http_client.request("GET", url, params=self._current_params(place))
+            return response.json() if response.status_code == 200 else {}
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _fetch_forecast(self, place: str) -> dict:
+        try:
+            url = f"{self.base_url}/forecast"
+            response = http_client.request("GET", url, params=self._forecast_params(place))
+            return response.json() if response.status_code == 200 else {}
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def _afetch_current(self, place: str) -> dict:
+        try:
+            url = f"{self.base_url}/weather"
+            response = await http_client.arequest("GET", url, params=self._current_params(place))
+            return response.json() if response.status_code == 200 else {}
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def _afetch_forecast(self, place: str) -> dict:
+        try:
+            url = f"{self.base_url}/forecast"
+            response = await http_client.arequest("GET", url, params=self._forecast_params(place))
+            return response.json() if response.status_code == 200 else {}
+
+        except Exception as e:
+            return {"error": str(e)}
+
     def get_current_weather(self, place: str):
         """
         Get current weather for a city/place.
@@ -18,20 +118,29 @@ class WeatherForecastTool:
         Returns:
             dict: JSON response containing current weather data, or empty dict if failed.
         """
-        try:
-            url = f"{self.base_url}/weather"
-            params = {
-                "q": place,
-                "appid": self.api_key,
-                "units": "metric"
-            }
-            
-            response = requests.get(url, params=params)
-            return response.json() if response.status_code == 200 else {}
-        
-        except Exception as e:
-            return {"error": str(e)}
-    
+        key = normalize_key(place)
+        cached = self.current_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self.derive_current_from_forecast:
+            derived = self._derive_current(self.get_forecast_weather(place))
+            if derived is not None:
+                self.current_cache.set(key, derived)
+                return derived
+
+        def fetch():
+            # A flight that finished after the lookup above has already filled the cache
+            cached = self.current_cache.peek(key)
+            if cached is not None:
+                return cached
+            data = self._fetch_current(place)
+            if self._is_cacheable(data):
+                self.current_cache.set(key, data)
+            return data
+
+        return self.flights.do(f"current:{key}", fetch)
+
     def get_forecast_weather(self, place: str):
         """
         Get weather forecast for a city/place.
@@ -40,17 +149,80 @@ class WeatherForecastTool:
         Returns:
             dict: JSON response containing forecast data, or empty dict if failed.
         """
-        try:
-            url = f"{self.base_url}/forecast"
-            params = {
-                "q": place,
-                "appid": self.api_key,
-                "cnt": 10,           # Number of forecast entries (each is 3-hour step)
-                "units": "metric"    # Temp in Celsius instead of Kelvin
-            }
-            
-            response = requests.get(url, params=params)
-            return response.json() if response.status_code == 200 else {}
-        
-        except Exception as e:
-            return {"error": str(e)}
+        key = normalize_key(place)
+        cached = self.forecast_cache.get(key)
+        if cached is not None:
+            return cached
+
+        def fetch():
+            # A flight that finished after the lookup above has already filled the cache
+            cached = self.forecast_cache.peek(key)
+            if cached is not None:
+                return cached
+            data = self._fetch_forecast(place)
+            if self._is_cacheable(data):
+                self.forecast_cache.set(key, data)
+            return data
+
+        return self.flights.do(f"forecast:{key}", fetch)
+
+    async def aget_current_weather(self, place: str):
+        """
+        Async variant of `get_current_weather` that does not block the event loop.
+        Args:
+            place (str): City name.
+        Returns:
+            dict: JSON response containing current weather data, or empty dict if failed.
+        """
+        key = normalize_key(place)
+        cached = self.current_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self.derive_current_from_forecast:
+            derived = self._derive_current(await self.aget_forecast_weather(place))
+            if derived is not None:
+                self.current_cache.set(key, derived)
+                return derived
+
+        async def fetch():
+            # A flight that finished after the lookup above has already filled the cache
+            cached = self.current_cache.peek(key)
+            if cached is not None:
+                return cached
+            data = await self._afetch_current(place)
+            if self._is_cacheable(data):
+                self.current_cache.set(key, data)
+            return data
+
+        return await self.flights.ado(f"current:{key}", fetch)
+
+    async def aget_forecast_weather(self, place: str):
+        """
+        Async variant of `get_forecast_weather` that does not block the event loop.
+        Args:
+            place (str): City name.
+        Returns:
+            dict: JSON response containing forecast data, or empty dict if failed.
+        """
+        key = normalize_key(place)
+        cached = self.forecast_cache.get(key)
+        if cached is not None:
+            return cached
+
+        async def fetch():
+            # A flight that finished after the lookup above has already filled the cache
+            cached = self.forecast_cache.peek(key)
+            if cached is not None:
+                return cached
+            data = await self._afetch_forecast(place)
+            if self._is_cacheable(data):
+                self.forecast_cache.set(key, data)
+            return data
+
+        return await self.flights.ado(f"forecast:{key}", fetch)
+
+    def stats(self) -> dict:
+        """Report hit/miss counters for the current and forecast caches, and request coalescing."""
+        return {"current": self.current_cache.stats(), "forecast": self.forecast_cache.stats(),
+                "single_flight": self.flights.stats()}